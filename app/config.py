@@ -21,6 +21,7 @@ if not LOCAL_MODE:
 
     secrets = get_secrets()
     youtube_api_key = secrets['youtube_api_key']
+    openai_api_key = secrets.get('openai_api_key', os.getenv('OPENAI_API_KEY'))
     bucket_name = get_parameter('/osintube/s3_bucket_name')
     cognito_user_pool_id = get_parameter('/osintube/cognito_user_pool_id')
     cognito_client_id = get_parameter('/osintube/cognito_client_id')
@@ -37,6 +38,7 @@ else:
         return param_map.get(name, 'local-mock-value')
 
     youtube_api_key = os.getenv('LOCAL_YOUTUBE_API_KEY', 'your-local-youtube-api-key')
+    openai_api_key = os.getenv('OPENAI_API_KEY')
     bucket_name = get_parameter('/osintube/s3_bucket_name')
     cognito_user_pool_id = get_parameter('/osintube/cognito_user_pool_id')
     cognito_client_id = get_parameter('/osintube/cognito_client_id')
@@ -45,10 +47,52 @@ else:
 # Common configuration values
 comments_maxResult = 80
 search_limit = 5
+max_concurrency = 4  # videos fetched and enriched in parallel by extract_data
+youtube_http_timeout = 30  # seconds
+youtube_api_url = os.getenv('YOUTUBE_API_URL')  # e.g. a local shared_func/youtube_fake_server.py; None = the real API
+youtube_prefetch_workers = None  # threads downloading the next comment page, one per running crawl (None = max_concurrency x monitor_concurrency); crawls beyond it wait
+youtube_daily_quota = 10000  # YouTube Data API units per day (resets at midnight Pacific Time)
+youtube_quota_shared = not LOCAL_MODE  # count daily quota in DynamoDB, shared by home.py, monitor.py and restarts
+youtube_quota_flush_interval = 5  # seconds between background writes of the shared quota counter
+youtube_quota_flush_units = 100  # unflushed units that trigger an early write
+youtube_max_retries = 4  # retries of a transient or rate-limited YouTube call
+youtube_retry_base_delay = 0.5  # seconds; backoff doubles per retry, with full jitter
+youtube_retry_max_delay = 30  # seconds
+youtube_breaker_threshold = 5  # consecutive failures that open an endpoint's circuit breaker
+youtube_breaker_reset = 30  # seconds an open circuit fails fast before a trial call
+include_replies = False  # also ingest the reply chains of comment threads (delta runs only get replies of new threads)
+max_replies_per_thread = 100  # replies fetched per thread when include_replies is on
+youtube_reply_workers = 8  # threads fetching reply pages in parallel
+comments_time_budget = None  # seconds per video before the comment crawler stops paging (None = no limit)
+search_cache_size = 256  # distinct searches kept in memory
+search_cache_ttl = 600  # seconds a search result is reused before search().list is called again
+comprehend_batch_workers = 4  # concurrent Comprehend batch calls (25 documents each)
+local_language_id = True  # skip Comprehend (and translation) for text a local stopword check finds clearly English
+aws_region = os.environ.get('AWS_REGION', 'us-east-1')  # region of the shared Translate/Comprehend/Bedrock/S3 clients
+aws_max_pool_connections = 32  # kept-alive connections per shared AWS client (boto3 default: 10)
+aws_connect_timeout = 5  # seconds
+aws_read_timeout = 60  # seconds; Bedrock generations can take a while
+aws_max_attempts = 5  # botocore attempts per AWS call, adaptive retry mode
+translate_batch_workers = 4  # concurrent Translate calls, each carrying a chunk of same-language comments
+monitor_interval = 900  # seconds between polls of a saved query or video
+monitor_concurrency = 8  # saved queries/videos ingested at the same time by monitor.py
 bedrock_model_id = "us.meta.llama4-scout-17b-instruct-v1:0"
 default_file_name = "data.pickle"
 output_path = f"output/{default_file_name}"
 delete_file = False
+cache_dir = os.getenv('OSINTUBE_CACHE_DIR', 'output/cache')
+channel_cache_size = 5000
+channel_cache_ttl = 24 * 3600  # seconds
+translation_cache_size = 20000  # detected languages and translations kept in memory
+translation_cache_ttl = 30 * 24 * 3600  # seconds
+translation_cache_max_entries = 500000  # rows kept on disk before the oldest are evicted
+sentiment_backend = os.getenv('SENTIMENT_BACKEND', 'comprehend')  # comprehend, lexicon, transformers, bedrock or openai
+sentiment_workers = 4  # concurrent calls for backends that score one text per request (bedrock, openai)
+local_sentiment_model = 'distilbert-base-uncased-finetuned-sst-2-english'  # transformer of the local sentiment backend
+local_sentiment_batch_size = 32  # texts per CPU forward pass
+sentiment_cache_size = 20000  # sentiment scores kept in memory
+sentiment_cache_ttl = 90 * 24 * 3600  # seconds
+sentiment_cache_max_entries = 500000
 img_path = "media/osintube.webp"
 
 readme = """
@@ -10,9 +10,11 @@ from config_loader import get_base_url
 import config
 from shared_func.s3_objects import *
 from shared_func.llama_agent import analyze_dataset_with_llama
-from shared_func.dynamodb_func import log_search_to_dynamodb
+from shared_func.dynamodb_func import log_search_to_dynamodb, get_latest_search, save_video_watermarks
 from shared_func.cognito_func import is_authenticated, get_current_user, logout_user
-from shared_func.main_func import extract_data
+from shared_func.main_func import iter_extract_data, combine_frames, video_watermarks
+from shared_func.quota_func import quota_ledger, estimate_run_cost, reply_limit
+from shared_func.resilience_func import retry_metrics
 import pyfiglet
 
 # Check authentication - redirect to login if not authenticated
@@ -146,10 +148,16 @@ with col2:
     search_limit = st.number_input("Max Videos", min_value=1, max_value=20, value=5, step=1)
 with col3:
     order_by_date = st.checkbox("📅 Order by Date", value=True, help="If unchecked, results will be ordered by relevance")
+    delta_mode = st.checkbox("🔁 Only New Comments", value=False, help="Fetch only comments posted since the last run of this query and merge them into its dataset")
+    fresh_search = st.checkbox("🔄 Fresh Search", value=False, help=f"Ignore search results cached in the last {config.search_cache_ttl // 60} minutes (a new search costs 100 quota units)")
+    include_replies = st.checkbox("💬 Include Replies", value=config.include_replies, help=f"Also collect up to {config.max_replies_per_thread} replies per comment thread (1 quota unit per 100 replies; with Only New Comments, only replies of new threads)")
 
 config.comments_maxResult = comments_maxResult
 config.search_limit = search_limit
 
+st.caption(f"📉 Estimated YouTube quota: up to {estimate_run_cost(search_limit, comments_maxResult, max_replies=reply_limit(include_replies))} units "
+           f"({quota_ledger.remaining_today()} of {quota_ledger.daily_limit} remaining today)")
+
 # Input section
 st.markdown("### 🔍 Analysis")
 input_data = st.text_input("Enter YouTube search query:")
@@ -184,15 +192,41 @@ if run_button and input_data:
     # Progress indicators
     progress_bar = st.progress(0)
     status_text = st.empty()
+    partial_results = st.empty()
     
     try:
         status_text.text('🎥 Searching YouTube videos...')
-        progress_bar.progress(20)
+        progress_bar.progress(5)
+        
+        # Delta mode starts from the dataset of the previous run of this query
+        previous_df = None
+        previous_s3 = None
+        if delta_mode:
+            previous_search = get_latest_search(input_data)
+            if previous_search:
+                previous_s3 = previous_search['s3']
+                previous_df = load_dataframe_from_s3(config.bucket_name, previous_s3)
         
-        df = extract_data(input_data, search_limit, comments_maxResult, order_by_date)
+        # Videos stream in as they finish; show partial results and real progress
+        frames = {}
+        retries_before = retry_metrics.total('retries')
+        with quota_ledger.run(input_data) as quota_usage:
+            for index, total, result, video_df in iter_extract_data(input_data, search_limit, comments_maxResult,
+                                                                    order_by_date, previous_df=previous_df,
+                                                                    use_cache=not fresh_search,
+                                                                    include_replies=include_replies,
+                                                                    previous_s3=previous_s3):
+                frames[index] = video_df
+                status_text.text(f'💬 Processed {len(frames)}/{total} videos: {result["title"]}')
+                progress_bar.progress(10 + int(70 * len(frames) / total))
+                if video_df is not None:
+                    partial_results.dataframe(combine_frames(list(frames.values())), use_container_width=True, height=400)
+        st.caption(f"📉 YouTube quota used: {quota_usage.units} units in {quota_usage.calls} calls "
+                   f"({quota_ledger.remaining_today()} remaining today, "
+                   f"{retry_metrics.total('retries') - retries_before} retried)")
         
-        status_text.text('💬 Processing comments...')
-        progress_bar.progress(60)
+        df = combine_frames([frames[index] for index in sorted(frames)], previous_df)
+        partial_results.empty()
         
         if df.empty:
             st.warning("⚠️ No data found for this search")
@@ -213,6 +247,7 @@ if run_button and input_data:
             # Log to DynamoDB
             comments_found = len(df)
             log_search_to_dynamodb(input_data, s3_key, comments_maxResult, search_limit, comments_found)
+            save_video_watermarks(input_data, video_watermarks(df), s3_key)
             
             status_text.text('✅ Complete!')
             progress_bar.progress(100)
@@ -242,6 +277,7 @@ if run_button and input_data:
         # Clear progress indicators
         progress_bar.empty()
         status_text.empty()
+        partial_results.empty()
         st.session_state.processing = False
 
 # Credits - CI/CD Test
@@ -0,0 +1,205 @@
+"""
+Headless monitor: polls saved queries and videos on a schedule and stores
+every run through the same S3/DynamoDB paths as the Run button in home.py.
+
+Usage: python monitor.py --config monitor.json [--once]
+
+The config file is a JSON list of watches, either a search query or a video:
+
+    [
+        {"query": "election fraud", "interval": 900, "max_videos": 5, "max_comments": 200},
+        {"video": "https://www.youtube.com/watch?v=dQw4w9WgXcQ", "interval": 300}
+    ]
+
+Optional keys: "interval" (seconds, defaults to config.monitor_interval),
+"max_videos", "max_comments", "order_by_date", "replies" (defaults to
+config.include_replies) and "delta" (default true: only comments newer than
+the previous run are fetched and merged into it; new replies to threads
+already stored are not picked up).
+"""
+import sys
+import os
+import json
+import uuid
+import signal
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from shared_func.s3_objects import upload_dataframe_to_s3, load_dataframe_from_s3, normalize_key_name
+from shared_func.dynamodb_func import log_search_to_dynamodb, get_latest_search, save_video_watermarks, extract_youtube_links
+from shared_func.main_func import iter_extract_data, iter_extract_videos, combine_frames, video_watermarks
+from shared_func.youtube_search import get_videos
+from shared_func.quota_func import quota_ledger, plan_run, reply_limit, QuotaExceededError
+from shared_func.sentiment_func import check_backend
+
+logger = logging.getLogger("monitor")
+
+def load_watches(path):
+    """Read the watch list and fill in the defaults of every entry."""
+    with open(path) as f:
+        entries = json.load(f)
+
+    watches = []
+    for entry in entries:
+        if not entry.get("query") and not entry.get("video"):
+            raise ValueError(f"Watch needs a 'query' or a 'video': {entry}")
+        watches.append({
+            "query": entry.get("query"),
+            "video": entry.get("video"),
+            "interval": entry.get("interval", config.monitor_interval),
+            "max_videos": entry.get("max_videos", 1),
+            "max_comments": entry.get("max_comments", 10),
+            "order_by_date": entry.get("order_by_date", True),
+            "replies": entry.get("replies", config.include_replies),
+            "delta": entry.get("delta", True),
+        })
+    return watches
+
+def watch_name(watch):
+    return watch["query"] or watch["video"]
+
+def load_previous_dataset(name):
+    """(dataset, S3 key) of the latest stored run of a query, or (None, None)."""
+    latest = get_latest_search(name)
+    if not latest or not latest.get("s3"):
+        return None, None
+    return load_dataframe_from_s3(config.bucket_name, latest["s3"]), latest["s3"]
+
+def store_dataset(name, df, max_comments, max_videos):
+    """Upload a run and log it like home.py does. Returns the S3 key."""
+    timestamp_suffix = datetime.now().strftime("%Y%m%d_%H%M%S")
+    s3_key = f"dataset/{normalize_key_name(name)}_{timestamp_suffix}/{config.default_file_name}"
+    # Concurrent runs must not share the local file upload_dataframe_to_s3 writes to
+    local_path = os.path.join(os.path.dirname(config.output_path), "monitor", f"{uuid.uuid4().hex}.pickle")
+    upload_dataframe_to_s3(df, config.bucket_name, s3_key, local_path, True)
+    log_search_to_dynamodb(name, s3_key, max_comments, max_videos, len(df))
+    save_video_watermarks(name, video_watermarks(df), s3_key)
+    return s3_key
+
+def run_watch(watch, state):
+    """
+    Poll one watch once (blocking). `state` persists between polls of the
+    same watch and keeps the latest dataset for delta runs. Returns the
+    number of new comments stored.
+    """
+    name = watch_name(watch)
+
+    previous_df = previous_s3 = None
+    if watch["delta"]:
+        if "previous_df" not in state:
+            state["previous_df"], state["previous_s3"] = load_previous_dataset(name)
+        previous_df, previous_s3 = state["previous_df"], state["previous_s3"]
+
+    with quota_ledger.run(name) as usage:
+        if watch["video"]:
+            # No search, just the videos.list lookup of get_videos
+            _, max_comments = plan_run(1, watch["max_comments"], searches=0, max_replies=reply_limit(watch["replies"]),
+                                       lookups=1)
+            video_ids = [link.split("v=")[-1] for link in extract_youtube_links(watch["video"]) if "v=" in link]
+            if not video_ids:
+                raise ValueError(f"Not a YouTube video URL: {watch['video']}")
+            results = iter_extract_videos(get_videos(video_ids), max_comments, previous_df=previous_df,
+                                          include_replies=watch["replies"], dataset=name, previous_s3=previous_s3)
+        else:
+            # Each poll looks for new videos, so it never reuses a cached search
+            results = iter_extract_data(name, watch["max_videos"], watch["max_comments"],
+                                        watch["order_by_date"], previous_df=previous_df, use_cache=False,
+                                        include_replies=watch["replies"], previous_s3=previous_s3)
+        frames = {index: df for index, _, _, df in results}
+
+    new_comments = sum(len(df) for df in frames.values() if df is not None)
+    logger.info("%s: %d new comments, %d quota units", name, new_comments, usage.units)
+    if new_comments == 0:
+        return 0
+
+    df = combine_frames([frames[index] for index in sorted(frames)], previous_df)
+    s3_key = store_dataset(name, df, watch["max_comments"], watch["max_videos"])
+    if watch["delta"]:
+        state["previous_df"], state["previous_s3"] = df, s3_key
+    return new_comments
+
+async def monitor_watch(watch, delay, executor, semaphore, stop):
+    """Poll a watch every `interval` seconds until `stop` is set."""
+    loop = asyncio.get_running_loop()
+    state = {}
+    timeout = delay
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=timeout)
+            break
+        except asyncio.TimeoutError:
+            pass
+
+        async with semaphore:
+            try:
+                await loop.run_in_executor(executor, run_watch, watch, state)
+            except QuotaExceededError as e:
+                logger.warning("%s: skipped, %s", watch_name(watch), e)
+            except Exception:
+                logger.exception("%s: run failed", watch_name(watch))
+        timeout = watch["interval"]
+
+async def monitor(watches, concurrency=None, stop=None):
+    """
+    Poll every watch on its own schedule, running at most `concurrency`
+    (defaults to config.monitor_concurrency) ingestions at a time. First
+    polls are spread over the shortest interval so hundreds of watches do
+    not all start at once.
+    """
+    if concurrency is None:
+        concurrency = config.monitor_concurrency
+    if stop is None:
+        stop = asyncio.Event()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="monitor")
+    spread = min((watch["interval"] for watch in watches), default=0)
+    try:
+        await asyncio.gather(*(
+            monitor_watch(watch, spread * i / len(watches), executor, semaphore, stop)
+            for i, watch in enumerate(watches)
+        ))
+    finally:
+        executor.shutdown(wait=True)
+
+async def main_async(args):
+    watches = load_watches(args.config)
+    # Refuse to start rather than fail every poll after fetching its comments
+    check_backend()
+    logger.info("Monitoring %d watches, %d at a time", len(watches), args.concurrency or config.monitor_concurrency)
+
+    if args.once:
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=args.concurrency or config.monitor_concurrency) as executor:
+            results = await asyncio.gather(*(loop.run_in_executor(executor, run_watch, watch, {})
+                                             for watch in watches), return_exceptions=True)
+        for watch, result in zip(watches, results):
+            if isinstance(result, Exception):
+                logger.error("%s: run failed: %s", watch_name(watch), result)
+        return
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await monitor(watches, args.concurrency, stop)
+    logger.info("Monitor stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll saved YouTube queries and videos without a browser session")
+    parser.add_argument("--config", required=True, help="JSON file with the list of watches")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="ingestions running at the same time (default: config.monitor_concurrency)")
+    parser.add_argument("--once", action="store_true", help="poll every watch once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
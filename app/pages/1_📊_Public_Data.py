@@ -73,7 +73,8 @@ try:
     
     # Get data from DynamoDB
     response = dynamodb_client.scan(TableName='osintube')
-    items = response.get('Items', [])
+    # Per-video watermarks and quota counters share the table with the search log
+    items = [item for item in response.get('Items', []) if 'record_type' not in item]
     
     if not items:
         st.info("📭 No datasets found")
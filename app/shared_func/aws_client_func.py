@@ -0,0 +1,48 @@
+import threading
+import boto3
+from botocore.config import Config
+import config
+
+# One client per (service, region), shared by every thread of the process
+_clients = {}
+_lock = threading.Lock()
+_session = None
+
+def client_config():
+    """Connection pool, keep-alive, timeout and retry settings shared by all clients."""
+    return Config(
+        max_pool_connections=config.aws_max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=config.aws_connect_timeout,
+        read_timeout=config.aws_read_timeout,
+        retries={'max_attempts': config.aws_max_attempts, 'mode': 'adaptive'}
+    )
+
+def get_client(service, region_name=None):
+    """
+    Process-wide boto3 client for `service`, created on first use.
+
+    boto3 clients are thread-safe, so the same client (and its pool of
+    kept-alive connections) serves every caller. Creation is locked because
+    boto3 sessions are not.
+    """
+    global _session
+    region_name = region_name or config.aws_region
+    key = (service, region_name)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        if key not in _clients:
+            if _session is None:
+                _session = boto3.session.Session()
+            _clients[key] = _session.client(service, region_name=region_name, config=client_config())
+        return _clients[key]
+
+def reset_clients():
+    """Drop the shared clients, e.g. after credentials or config changed."""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
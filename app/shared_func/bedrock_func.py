@@ -1,4 +1,3 @@
-import boto3
 import json
 import config
 import re
@@ -25,16 +24,20 @@ def rate_limit_check():
     _request_times['bedrock'].append(now)
 
 def get_bedrock_client():
-    return boto3.client('bedrock-runtime', region_name='us-east-1')
+    return get_client('bedrock-runtime')
 
 from shared_func.boto3_session import create_boto3_session
+from shared_func.aws_client_func import get_client
+from shared_func.sentiment_cache_func import cached_sentiment
+
+SENTIMENT_PROMPT_VERSION = '1'  # part of the sentiment cache key with the model id; bump when the prompt changes
 
 def get_dynamodb_client():
     session = create_boto3_session()
     return session.client('dynamodb', region_name='us-east-1')
 
 def get_s3_client():
-    return boto3.client('s3', region_name='us-east-1')
+    return get_client('s3')
 
 def sentiment_analysis(transcription):
     """
@@ -47,6 +50,12 @@ def sentiment_analysis(transcription):
     if not transcription or len(transcription.strip()) == 0:
         return 0.5
     
+    version = f"{config.bedrock_model_id}/{SENTIMENT_PROMPT_VERSION}"
+    score = cached_sentiment('bedrock', version, transcription, request_sentiment)
+    return 0.5 if score is None else score
+
+def request_sentiment(transcription):
+    """Score text with one Llama invocation. Returns None if the call fails."""
     bedrock = get_bedrock_client()
     
     prompt = f"""Analyze the sentiment of this text and provide a numerical score between 0 and 1, where:
@@ -87,7 +96,7 @@ Respond with only the numerical score (e.g., 0.3):"""
             
     except Exception as e:
         print(f"Bedrock sentiment analysis error: {e}")
-        return 0.5  # Default neutral score
+        return None
 
 def enhanced_threat_analysis(comments_list: List[Dict], dataset_id: str, query_context: str = "") -> Dict:
     """
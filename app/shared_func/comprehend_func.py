@@ -1,27 +1,35 @@
-import boto3
 import json
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import config
+from shared_func.aws_client_func import get_client
+from shared_func.translate_func import truncate_utf8, COMPREHEND_MAX_BYTES
+from shared_func.sentiment_cache_func import cached_sentiment, cached_sentiments
+from shared_func.text_func import as_text
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_BATCH_SIZE = 25  # batch_detect_sentiment accepts up to 25 documents
+SENTIMENT_VERSION = 'comprehend-1'  # part of the sentiment cache key; bump when the score mapping changes
 
 def get_comprehend_client():
-    return boto3.client('comprehend', region_name='us-east-1')
+    return get_client('comprehend')
 
 def sentiment_analysis(text):
     """
     Analyze sentiment using Amazon Comprehend
     Returns a score between 0 and 1 (0=negative, 1=positive)
     """
-    # Handle different input types
-    if text is None:
-        return 0.5
-    
-    # Convert list to string if needed
-    if isinstance(text, list):
-        text = ' '.join(str(item) for item in text)
-    
-    # Convert to string and check if empty
-    text_str = str(text).strip()
+    text_str = as_text(text)
     if not text_str:
         return 0.5  # Neutral for empty text
     
+    score = cached_sentiment('comprehend', SENTIMENT_VERSION, text_str, request_sentiment)
+    return 0.5 if score is None else score  # Default neutral score
+
+def request_sentiment(text_str):
+    """One detect_sentiment call mapped to a 0-1 score, None if it fails."""
     comprehend = get_comprehend_client()
     
     try:
@@ -46,4 +54,86 @@ def sentiment_analysis(text):
             
     except Exception as e:
         print(f"Comprehend error: {e}")
-        return 0.5  # Default neutral score
+        return None
+
+def sentiment_scores(sentiments, positive):
+    """
+    Vectorized sentiment_analysis mapping: POSITIVE scores its Positive
+    confidence, NEGATIVE 0, NEUTRAL 0.5, MIXED 0.7 x Positive; anything
+    else (empty text, failed documents) is neutral.
+    """
+    sentiments = np.asarray(sentiments, dtype=object)
+    positive = np.asarray(positive, dtype=float)
+    return np.select(
+        [sentiments == 'POSITIVE', sentiments == 'NEGATIVE', sentiments == 'NEUTRAL', sentiments == 'MIXED'],
+        [positive, 0.0, 0.5, positive * 0.7],
+        default=0.5
+    )
+
+def detect_sentiment_batch(texts):
+    """
+    Sentiment labels and Positive confidences of up to 25 non-empty texts with
+    one batch_detect_sentiment call. Failed documents get label '' and 0.
+    Returns None if the whole call fails.
+    """
+    sentiments, positive = [''] * len(texts), [0.0] * len(texts)
+    comprehend = get_comprehend_client()
+    try:
+        response = comprehend.batch_detect_sentiment(
+            TextList=[truncate_utf8(text, COMPREHEND_MAX_BYTES) for text in texts],
+            LanguageCode='en'
+        )
+    except Exception as e:
+        # e.g. AccessDenied when the role lacks comprehend:BatchDetectSentiment
+        logger.error(f"Batch sentiment detection failed, scoring {len(texts)} documents one by one: {e}")
+        return None
+
+    for result in response.get('ResultList', []):
+        sentiments[result['Index']] = result['Sentiment']
+        positive[result['Index']] = result['SentimentScore']['Positive']
+    for error in response.get('ErrorList', []):
+        logger.warning(f"Sentiment detection failed for a document: {error.get('ErrorMessage')}")
+    return sentiments, positive
+
+def sentiment_analysis_batch(texts, max_workers=None):
+    """
+    sentiment_analysis for many texts: 25 documents per batch_detect_sentiment
+    call, batches sent concurrently (config.comprehend_batch_workers).
+    Empty texts, cached texts and duplicates are not sent.
+    Returns a float array, one score per text.
+    """
+    texts = [as_text(text) for text in texts]
+    indexes = [i for i, text in enumerate(texts) if text]
+    scores = np.full(len(texts), 0.5)
+    if indexes:
+        found = cached_sentiments('comprehend', SENTIMENT_VERSION, [texts[i] for i in indexes],
+                                  lambda pending: request_sentiments(pending, max_workers))
+        scores[indexes] = [0.5 if score is None else score for score in found]
+    return scores
+
+def request_sentiments(texts, max_workers=None):
+    """
+    Score non-empty texts with concurrent batch_detect_sentiment calls. A batch
+    whose call fails is scored one detect_sentiment call per document instead.
+    Returns a list, None for failed documents.
+    """
+    if max_workers is None:
+        max_workers = config.comprehend_batch_workers
+
+    batches = [texts[i:i + SENTIMENT_BATCH_SIZE] for i in range(0, len(texts), SENTIMENT_BATCH_SIZE)]
+
+    def run(batch_texts):
+        result = detect_sentiment_batch(batch_texts)
+        if result is None:
+            return [request_sentiment(text) for text in batch_texts]
+        sentiments, positive = result
+        return [None if sentiment == '' else score
+                for sentiment, score in zip(sentiments, sentiment_scores(sentiments, positive))]
+
+    if len(batches) <= 1 or max_workers <= 1:
+        results = [run(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            results = list(executor.map(run, batches))
+
+    return [score for batch_scores in results for score in batch_scores]
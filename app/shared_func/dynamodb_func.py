@@ -4,6 +4,8 @@ import pytz
 import re
 import hashlib
 from shared_func.boto3_session import create_boto3_session
+from shared_func.aws_client_func import get_client
+from shared_func.text_func import normalize_key_name
 
 def get_dynamodb_client():
     session = create_boto3_session()
@@ -83,3 +85,141 @@ def log_search_to_dynamodb(video_query, s3_key, max_comments=10, max_videos=1, c
     except Exception as e:
         print(f"DynamoDB error: {e}")
         return False
+
+def watermark_key(dataset, video_id):
+    """
+    PK of a video's watermark item in the osintube table. Watermarks belong to
+    a dataset (the query or watch name), so datasets sharing a video do not
+    overwrite each other's progress.
+    """
+    return f"watermark#{normalize_key_name(dataset)}#{video_id}"
+
+def get_video_watermarks(dataset, video_ids, s3_key=None):
+    """
+    Load the latest ingested comment of each video of a dataset from DynamoDB.
+    Returns a dict of video_id -> {'published_at', 'comment_id', 's3'} for the videos that have one.
+    With `s3_key` (where the dataset being extended was loaded from), watermarks
+    saved with any other dataset version are dropped, so those videos are fetched in full.
+    """
+    dynamodb = get_dynamodb_client()
+    unique_ids = list(dict.fromkeys(video_ids))
+    watermarks = {}
+    
+    try:
+        # batch_get_item accepts up to 100 keys per call
+        for i in range(0, len(unique_ids), 100):
+            keys = [{'video': {'S': watermark_key(dataset, video_id)}} for video_id in unique_ids[i:i + 100]]
+            request = {'osintube': {'Keys': keys}}
+            while request:
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response.get('Responses', {}).get('osintube', []):
+                    watermarks[item['video_id']['S']] = {
+                        'published_at': item['published_at']['S'],
+                        'comment_id': item['comment_id']['S'],
+                        's3': item.get('s3', {}).get('S', '')
+                    }
+                request = response.get('UnprocessedKeys')
+    except Exception as e:
+        print(f"DynamoDB error: {e}")
+    
+    if s3_key is not None:
+        watermarks = {video_id: watermark for video_id, watermark in watermarks.items() if watermark['s3'] == s3_key}
+    return watermarks
+
+def save_video_watermarks(dataset, watermarks, s3_key):
+    """
+    Store the per-video watermarks ({video_id: {'published_at', 'comment_id'}})
+    of a dataset, stored at `s3_key`, next to its search log.
+    """
+    dynamodb = get_dynamodb_client()
+    sp_tz = pytz.timezone('America/Sao_Paulo')
+    timestamp = datetime.now(sp_tz).isoformat()
+    
+    requests = [{
+        'PutRequest': {
+            'Item': {
+                'video': {'S': watermark_key(dataset, video_id)},
+                'dataset': {'S': dataset},
+                'record_type': {'S': 'watermark'},
+                'video_id': {'S': video_id},
+                'published_at': {'S': watermark['published_at']},
+                'comment_id': {'S': watermark['comment_id']},
+                's3': {'S': s3_key},
+                'timestamp': {'S': timestamp}
+            }
+        }
+    } for video_id, watermark in watermarks.items()]
+    
+    try:
+        # batch_write_item accepts up to 25 requests per call
+        for i in range(0, len(requests), 25):
+            pending = {'osintube': requests[i:i + 25]}
+            while pending:
+                response = dynamodb.batch_write_item(RequestItems=pending)
+                pending = response.get('UnprocessedItems')
+        return True
+    except Exception as e:
+        print(f"DynamoDB error: {e}")
+        return False
+
+def quota_key(day):
+    """PK of the item counting the YouTube quota units spent on `day` (YYYY-MM-DD, Pacific Time)."""
+    return f"quota#{day}"
+
+def add_quota_usage(day, units):
+    """
+    Atomically add `units` to the YouTube quota spent on `day` by every
+    process sharing the osintube table. Returns the new total, or None if
+    DynamoDB could not be reached. Uses the shared process-wide client.
+    """
+    try:
+        response = get_client('dynamodb', region_name='us-east-1').update_item(
+            TableName='osintube',
+            Key={'video': {'S': quota_key(day)}},
+            UpdateExpression='ADD units :units SET record_type = :record_type',
+            ExpressionAttributeValues={':units': {'N': str(units)}, ':record_type': {'S': 'quota'}},
+            ReturnValues='UPDATED_NEW'
+        )
+        return int(response['Attributes']['units']['N'])
+    except Exception as e:
+        print(f"DynamoDB error: {e}")
+        return None
+
+def get_quota_usage(day):
+    """YouTube quota units spent on `day` by every process, or None if DynamoDB could not be reached."""
+    try:
+        response = get_client('dynamodb', region_name='us-east-1').get_item(
+            TableName='osintube',
+            Key={'video': {'S': quota_key(day)}},
+            ConsistentRead=True
+        )
+        return int(response.get('Item', {}).get('units', {}).get('N', 0))
+    except Exception as e:
+        print(f"DynamoDB error: {e}")
+        return None
+
+def get_latest_search(video_query):
+    """Return the most recent search log item ({'s3', 'timestamp', ...}) for a query, or None."""
+    dynamodb = get_dynamodb_client()
+    
+    try:
+        items = []
+        kwargs = {
+            'TableName': 'osintube',
+            'FilterExpression': 'video_query = :query AND attribute_not_exists(record_type)',
+            'ExpressionAttributeValues': {':query': {'S': video_query}}
+        }
+        while True:
+            response = dynamodb.scan(**kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        if not items:
+            return None
+        latest = max(items, key=lambda item: item.get('timestamp', {}).get('S', ''))
+        return {key: list(value.values())[0] for key, value in latest.items()}
+    except Exception as e:
+        print(f"DynamoDB error: {e}")
+        return None
@@ -1,63 +1,510 @@
 import os
 import re
+import sys
+import json
+import time
+import queue
+import threading
+import httplib2
 import config
-from googleapiclient.discovery import build
+from concurrent.futures import ThreadPoolExecutor
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from shared_func.cache_func import TTLCache, SqliteCache, TieredCache
+from shared_func.quota_func import quota_ledger, submit_in_run
+from shared_func.resilience_func import call_with_retry
+
+# Channel metadata keyed by channel id, shared across videos, searches and runs
+channel_cache = TieredCache(
+    TTLCache(maxsize=config.channel_cache_size, ttl=config.channel_cache_ttl),
+    SqliteCache(os.path.join(config.cache_dir, 'channels.sqlite'), ttl=config.channel_cache_ttl)
+)
+
+# YouTube client pool: httplib2 is not thread-safe, so every thread gets its own
+# client (and its own keep-alive connections), built once from a parsed discovery document
+_discovery_document = None
+_discovery_lock = threading.Lock()
+_thread_clients = threading.local()
+_client_generation = 0
+_prefetch_executor = None
+_prefetch_running = 0
+_reply_executor = None
+
+def get_discovery_document():
+    """Parse the static YouTube v3 discovery document shipped with googleapiclient, once per process."""
+    global _discovery_document
+    with _discovery_lock:
+        if _discovery_document is None:
+            _discovery_document = json.loads(get_static_doc('youtube', 'v3'))
+    return _discovery_document
 
 def connect_to_youtube():
-    # Build the YouTube API service using the API key
-    youtube = build('youtube', 'v3', developerKey=config.youtube_api_key)
+    """
+    Return the calling thread's YouTube client, building it on first use.
+    Clients are reused across calls and keep their HTTP connections alive.
+    """
+    youtube = getattr(_thread_clients, 'youtube', None)
+    if youtube is None or _thread_clients.generation != _client_generation:
+        http = httplib2.Http(timeout=config.youtube_http_timeout)
+        # config.youtube_api_url redirects every call, e.g. to the local fake server used for load tests
+        client_options = {'api_endpoint': config.youtube_api_url} if config.youtube_api_url else None
+        youtube = build_from_document(get_discovery_document(), developerKey=config.youtube_api_key,
+                                      http=http, client_options=client_options)
+        _thread_clients.youtube = youtube
+        _thread_clients.generation = _client_generation
     return youtube
 
-def scrap_youtube_comments(video_url, youtube, max_comments=10):
-    # Retrieve comments for a specific video
-    video_id = video_url.split("v=")[-1]
-    try:
-        response = youtube.commentThreads().list(
+def reset_youtube_clients():
+    """Make every thread build a fresh client on its next call, e.g. after changing the API key."""
+    global _client_generation
+    _client_generation += 1
+
+def prefetch_workers():
+    """
+    Size of the prefetch pool. Every streaming crawl holds a worker until it
+    ends, so by default there is one for each crawl extract_batch or the
+    monitor can run at once.
+    """
+    return config.youtube_prefetch_workers or config.max_concurrency * config.monitor_concurrency
+
+def _get_prefetch_executor():
+    # Long-lived worker threads, so prefetching reuses their per-thread clients
+    global _prefetch_executor
+    with _discovery_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=prefetch_workers(),
+                thread_name_prefix='youtube-prefetch'
+            )
+    return _prefetch_executor
+
+def _get_reply_executor():
+    # Separate from the prefetch pool: reply fetches are submitted from prefetch workers
+    global _reply_executor
+    with _discovery_lock:
+        if _reply_executor is None:
+            _reply_executor = ThreadPoolExecutor(
+                max_workers=config.youtube_reply_workers,
+                thread_name_prefix='youtube-replies'
+            )
+    return _reply_executor
+
+def execute_request(request, endpoint):
+    """
+    Execute a googleapiclient request, charging its quota cost to the ledger.
+    `endpoint` is the API method, e.g. 'search.list' or 'commentThreads.list'.
+
+    Transient and rate-limit errors are retried with backoff behind a
+    per-endpoint circuit breaker (see resilience_func.call_with_retry);
+    every attempt is charged.
+    """
+    def attempt():
+        quota_ledger.record(endpoint)
+        return request.execute()
+    return call_with_retry(endpoint, attempt)
+
+COMMENTS_PER_PAGE = 100  # commentThreads().list maxResults ceiling
+
+def is_newer_than(item, watermark):
+    """True if a comment thread was published after the watermark ({'published_at', 'comment_id'})."""
+    published_at = item['snippet']['topLevelComment']['snippet'].get('publishedAt', '')
+    if published_at != watermark['published_at']:
+        # RFC 3339 UTC timestamps compare correctly as strings
+        return published_at > watermark['published_at']
+    return item.get('id') != watermark['comment_id']
+
+def fetch_replies(parent_id, youtube=None, max_replies=None):
+    """
+    Fetch the replies of a comment thread with paginated comments().list(parentId=...)
+    calls of up to 100 replies each. Returns a list of comment resources.
+    """
+    if youtube is None:
+        youtube = connect_to_youtube()
+    if max_replies is None:
+        max_replies = config.max_replies_per_thread
+
+    replies = []
+    page_token = None
+    while len(replies) < max_replies:
+        request = youtube.comments().list(
             part='snippet',
+            parentId=parent_id,
+            maxResults=min(max_replies - len(replies), COMMENTS_PER_PAGE),
+            pageToken=page_token
+        )
+        response = execute_request(request, 'comments.list')
+        replies.extend(response.get('items', [])[:max_replies - len(replies)])
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    return replies
+
+def load_replies(items, max_replies=None):
+    """
+    Complete the reply chains of a page of threads fetched with part='snippet,replies'.
+
+    The API only inlines a few replies per thread. Threads whose totalReplyCount
+    exceeds the inline set get all their replies (up to `max_replies`) from
+    fetch_replies, run concurrently on the reply pool. The replies are stored in
+    item['replies']['comments']. A thread whose replies cannot be fetched keeps
+    its inline replies.
+    """
+    if max_replies is None:
+        max_replies = config.max_replies_per_thread
+
+    incomplete = [
+        item for item in items
+        if item['snippet'].get('totalReplyCount', 0) > len(item.get('replies', {}).get('comments', []))
+        and len(item.get('replies', {}).get('comments', [])) < max_replies
+    ]
+    if not incomplete:
+        return items
+
+    executor = _get_reply_executor()
+    futures = {
+        submit_in_run(executor, fetch_replies, item['id'], None, max_replies): item
+        for item in incomplete
+    }
+    for future, item in futures.items():
+        try:
+            item.setdefault('replies', {})['comments'] = future.result()
+        except Exception as e:
+            print(f"Could not fetch replies of {item['id']}: {e}")
+    return items
+
+def iter_comment_pages(video_url, youtube=None, max_comments=10, time_budget=None, watermark=None, replies=False):
+    """
+    Crawl the comment threads of a video page by page, following nextPageToken.
+
+    Yields the list of items of each page. Stops once `max_comments` threads
+    have been yielded, when there are no more pages, or when `time_budget`
+    seconds have elapsed since the crawl started. API errors propagate.
+    With youtube=None the thread that runs the crawl uses its own pooled client.
+
+    With a `watermark` only threads newer than it are yielded. Threads come
+    newest first, so paging stops at the first thread at or below the watermark.
+    `max_comments` does not apply then: the crawl must reach the watermark, or
+    the newer threads it skipped would end up below the next one. A
+    `time_budget` still ends it early, leaving such a gap.
+
+    With `replies` the threads carry their reply chains (see load_replies).
+    """
+    if youtube is None:
+        youtube = connect_to_youtube()
+    video_id = video_url.split("v=")[-1]
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    remaining = max_comments if watermark is None else sys.maxsize
+    page_token = None
+
+    while remaining > 0:
+        request = youtube.commentThreads().list(
+            part='snippet,replies' if replies else 'snippet',
             videoId=video_id,
-            maxResults=max_comments
-        ).execute()
-        return response
-    except:
-        return None
+            order='time',
+            maxResults=min(remaining, COMMENTS_PER_PAGE),
+            pageToken=page_token
+        )
+        response = execute_request(request, 'commentThreads.list')
+
+        items = response.get('items', [])[:remaining]
+        reached_watermark = False
+        if watermark is not None:
+            fresh = [item for item in items if is_newer_than(item, watermark)]
+            reached_watermark = len(fresh) < len(items)
+            items = fresh
+        if items:
+            if replies:
+                load_replies(items)
+            yield items
+        remaining -= len(items)
+
+        page_token = response.get('nextPageToken')
+        if not page_token or not items or reached_watermark:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+
+def scrap_youtube_comments(video_url, youtube, max_comments=10, time_budget=None):
+    """
+    Retrieve comments for a specific video as a single commentThreads-like response.
+    Returns None if the first page fails; a failure on a later page keeps what was fetched.
+    """
+    items = []
+    try:
+        for page in iter_comment_pages(video_url, youtube, max_comments, time_budget):
+            items.extend(page)
+    except Exception as e:
+        if not items:
+            return None
+        print(f"Comment crawl for {video_url} stopped early: {e}")
+    return {'items': items}
+
+def _prefetch(pages, depth=1):
+    """
+    Run a page generator on the prefetch pool, keeping up to `depth` pages ready
+    so the consumer can process one page while the next is downloading.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
 
-def get_youtube_comments(video_url='https://www.youtube.com/watch?v=8OOciVqvalU', max_comments=10):
+    def put(entry):
+        # Give up once the consumer has gone away so pool workers never block forever
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        global _prefetch_running
+        try:
+            for page in pages:
+                if not put((page, None)):
+                    break
+        except Exception as e:
+            put((None, e))
+        finally:
+            put((done, None))
+            pages.close()
+            with _discovery_lock:
+                _prefetch_running -= 1
+
+    global _prefetch_running
+    with _discovery_lock:
+        _prefetch_running += 1
+        waiting = _prefetch_running - prefetch_workers()
+    if waiting > 0:
+        print(f"Warning: all {prefetch_workers()} prefetch workers are busy, {waiting} comment crawls waiting "
+              f"(raise config.youtube_prefetch_workers)")
+    submit_in_run(_get_prefetch_executor(), produce)
+    try:
+        while True:
+            page, error = buffer.get()
+            if error is not None:
+                raise error
+            if page is done:
+                return
+            yield page
+    finally:
+        stop.set()
+
+def iter_youtube_comments(video_url, max_comments=10, time_budget=None, prefetch=True, watermark=None, replies=False):
+    """
+    Stream a video's comments, yielding one analysed page ({person: [comments]}) at a time.
+    With a `watermark` only comments newer than it are fetched (see iter_comment_pages).
+    With `replies` the replies of each thread are included, tagged with its id.
+
+    With `prefetch` the next page is downloaded in the background while the caller
+    works on the current one. Errors on the first page propagate; errors on a
+    later page end the stream with the pages already yielded.
+    """
+    youtube = connect_to_youtube()
+    if prefetch:
+        # The crawl runs on a prefetch worker, which uses that thread's own client
+        pages = _prefetch(iter_comment_pages(video_url, None, max_comments, time_budget, watermark, replies))
+    else:
+        pages = iter_comment_pages(video_url, youtube, max_comments, time_budget, watermark, replies)
+
+    first = True
+    try:
+        for page in pages:
+            first = False
+            yield analyse({'items': page}, youtube)
+    except Exception as e:
+        if first:
+            raise
+        print(f"Comment crawl for {video_url} stopped early: {e}")
+
+def get_youtube_comments(video_url='https://www.youtube.com/watch?v=8OOciVqvalU', max_comments=10, time_budget=None):
     youtube = connect_to_youtube()
-    result = scrap_youtube_comments(video_url, youtube, max_comments)
+    result = scrap_youtube_comments(video_url, youtube, max_comments, time_budget)
     if result is None:
         return None
     else:
         return analyse(result , youtube)
 
-def analyse(response, youtube):
-    comments_dict = {}
+CHANNELS_PER_REQUEST = 50  # channels().list accepts up to 50 comma-separated ids
+
+def fetch_channels(youtube, channel_ids, part='snippet'):
+    """
+    Look up channels in batches of up to 50 ids per channels().list call.
+    Duplicate and empty ids are dropped. Returns a dict of channel id -> channel resource.
+    """
+    unique_ids = list(dict.fromkeys(cid for cid in channel_ids if cid))
+    channels = {}
+    for i in range(0, len(unique_ids), CHANNELS_PER_REQUEST):
+        batch = unique_ids[i:i + CHANNELS_PER_REQUEST]
+        request = youtube.channels().list(
+            part=part,
+            id=','.join(batch),
+            maxResults=CHANNELS_PER_REQUEST
+        )
+        response = execute_request(request, 'channels.list')
+        for item in response.get('items', []):
+            channels[item['id']] = item
+    return channels
+
+def channel_metadata(channel):
+    """Reduce a channels().list item to the fields we cache."""
+    snippet = channel.get('snippet', {})
+    return {
+        'id': channel['id'],
+        'title': snippet.get('title', ''),
+        'custom_url': snippet.get('customUrl', ''),
+        'uploads_playlist': channel.get('contentDetails', {}).get('relatedPlaylists', {}).get('uploads', '')
+    }
+
+def get_channels_metadata(channel_ids, youtube=None):
+    """
+    Read-through lookup of channel metadata via channel_cache.
+    Only ids missing from both cache tiers reach the API, batched by fetch_channels.
+    """
+    unique_ids = list(dict.fromkeys(cid for cid in channel_ids if cid))
+    found = channel_cache.get_many(unique_ids)
+    missing = [cid for cid in unique_ids if cid not in found]
+    if missing:
+        if youtube is None:
+            youtube = connect_to_youtube()
+        for cid, channel in fetch_channels(youtube, missing, part='snippet,contentDetails').items():
+            metadata = channel_metadata(channel)
+            channel_cache.set(cid, metadata)
+            found[cid] = metadata
+    return found
+
+def resolve_channel(kind, value, youtube=None):
+    """
+    Resolve a channel reference to its cached metadata (see channel_metadata), or None.
+
+    `kind` is 'id', 'handle' (@name), 'user' (legacy /user/ name) or 'custom'
+    (legacy /c/ name). Aliases are cached next to the channel ids, so each one
+    reaches the API only once.
+    """
+    if kind == 'id':
+        return get_channels_metadata([value], youtube).get(value)
+
+    alias = f"{kind}:{value.lower()}"
+    metadata = channel_cache.get(alias)
+    if metadata is not None:
+        return metadata
+
+    if youtube is None:
+        youtube = connect_to_youtube()
+    if kind == 'handle':
+        request = youtube.channels().list(part='snippet,contentDetails', forHandle=value)
+    elif kind == 'user':
+        request = youtube.channels().list(part='snippet,contentDetails', forUsername=value)
+    elif kind == 'custom':
+        # Legacy custom names have no lookup parameter; a channel search finds them (100 units, once)
+        request = youtube.search().list(part='snippet', q=value, type='channel', maxResults=1)
+        items = execute_request(request, 'search.list').get('items', [])
+        if not items:
+            return None
+        metadata = resolve_channel('id', items[0]['snippet']['channelId'], youtube)
+        if metadata is not None:
+            channel_cache.set(alias, metadata)
+        return metadata
+    else:
+        raise ValueError(f"Unknown channel reference kind: {kind}")
+
+    items = execute_request(request, 'channels.list').get('items', [])
+    if not items:
+        return None
+    metadata = channel_metadata(items[0])
+    channel_cache.set(metadata['id'], metadata)
+    channel_cache.set(alias, metadata)
+    return metadata
+
+PLAYLIST_ITEMS_PER_PAGE = 50  # playlistItems().list maxResults ceiling
+
+def iter_playlist_pages(playlist_id, youtube=None, max_results=50):
+    """
+    Crawl a playlist page by page (1 quota unit per 50 videos), yielding lists
+    of playlistItems resources. Private and deleted videos are skipped.
+    """
+    if youtube is None:
+        youtube = connect_to_youtube()
+
+    remaining = max_results
+    page_token = None
+    while remaining > 0:
+        request = youtube.playlistItems().list(
+            part='snippet,contentDetails',
+            playlistId=playlist_id,
+            maxResults=PLAYLIST_ITEMS_PER_PAGE,
+            pageToken=page_token
+        )
+        response = execute_request(request, 'playlistItems.list')
+        # Private and deleted entries carry no video publication date
+        items = [item for item in response.get('items', []) if item.get('contentDetails', {}).get('videoPublishedAt')]
+        items = items[:remaining]
+        remaining -= len(items)
+        yield items
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+def iter_playlist_items(playlist_id, max_results=50, prefetch=True):
+    """
+    Stream up to `max_results` videos of a playlist. Page tokens only come with
+    the previous page, so with `prefetch` the crawl runs ahead on the prefetch
+    pool, keeping the next pages in flight while the caller consumes this one.
+    """
+    if prefetch:
+        pages = _prefetch(iter_playlist_pages(playlist_id, None, max_results), depth=2)
+    else:
+        pages = iter_playlist_pages(playlist_id, None, max_results)
+    for page in pages:
+        yield from page
+
+def analyse(response, youtube=None):
+    """
+    Group comments by author.
+
+    Author names come from the commentThreads snippet itself. Only comments
+    without an authorDisplayName fall back to the cached channel metadata
+    (looked up with `youtube`, or a fresh client when it is None).
+    Replies carried by the threads are included with `parent_id` set to the
+    id of their thread (empty for top-level comments).
+    """
+    comments = []
     for item in response['items']:
-        commenter_id = item['snippet']['topLevelComment']['snippet']['authorChannelId']['value']
-        comment = item['snippet']['topLevelComment']['snippet']['textDisplay']
+        thread_id = item.get('id', '')
+        snippets = [(thread_id, '', item['snippet']['topLevelComment']['snippet'])]
+        for reply in item.get('replies', {}).get('comments', []):
+            snippets.append((reply.get('id', ''), thread_id, reply['snippet']))
 
-        # Retrieve commenter details
-        commenter_response = youtube.channels().list(
-            part='snippet',
-            id=commenter_id
-        ).execute()
+        for comment_id, parent_id, snippet in snippets:
+            commenter_id = snippet.get('authorChannelId', {}).get('value', '')
+            comments.append((commenter_id, snippet.get('authorDisplayName'), {
+                'comment': snippet['textDisplay'],
+                'comment_id': comment_id,
+                'published_at': snippet.get('publishedAt', ''),
+                'parent_id': parent_id
+            }))
 
-        # Extract commenter info
-        commenter_username = commenter_response['items'][0]['snippet']['title']
-        channel_url = f"https://www.youtube.com/channel/{commenter_id}"
+    missing_ids = [commenter_id for commenter_id, name, _ in comments if not name]
+    channel_titles = {}
+    if missing_ids:
+        channels = get_channels_metadata(missing_ids, youtube)
+        channel_titles = {cid: metadata['title'] for cid, metadata in channels.items()}
+
+    comments_dict = {}
+    for commenter_id, commenter_username, entry in comments:
+        if not commenter_username:
+            commenter_username = channel_titles.get(commenter_id, commenter_id)
+        entry['user_channel'] = f"https://www.youtube.com/channel/{commenter_id}"
         
         # Create separate user info (username only)
         user_info = commenter_username
 
         if user_info in comments_dict:
-            comments_dict[user_info].append({
-                'comment': comment,
-                'user_channel': channel_url
-            })
+            comments_dict[user_info].append(entry)
         else:
-            comments_dict[user_info] = [{
-                'comment': comment,
-                'user_channel': channel_url
-            }]
+            comments_dict[user_info] = [entry]
 
     return comments_dict
 
@@ -17,6 +17,9 @@ def get_search_history():
         # Convert DynamoDB format to DataFrame
         items = []
         for item in response['Items']:
+            # Skip per-video watermarks and quota counters stored alongside the search log
+            if 'record_type' in item:
+                continue
             record = {
                 'Search Query': item.get('video', {}).get('S', ''),
                 'S3 Path': item.get('s3', {}).get('S', ''),
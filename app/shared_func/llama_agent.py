@@ -1,5 +1,4 @@
 import json
-import boto3
 import pandas as pd
 import re
 from datetime import datetime
@@ -8,15 +7,16 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from config import bedrock_model_id
+from shared_func.aws_client_func import get_client
 
 class ThreatAnalysisAgent:
     """Enhanced Threat Analysis Agent with multi-layered detection capabilities"""
     
     def __init__(self, region='us-east-1'):
         self.region = region
-        self.bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-        self.s3 = boto3.client('s3', region_name='us-east-1')
-        self.dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+        self.bedrock = get_client('bedrock-runtime', region_name=region)
+        self.s3 = get_client('s3', region_name=region)
+        self.dynamodb = get_client('dynamodb', region_name=region)
         
         # Enhanced threat patterns
         self.threat_patterns = {
@@ -0,0 +1,143 @@
+"""
+CPU-only sentiment scoring, without AWS round trips.
+
+Two backends return the same 0-1 contract as comprehend_func.sentiment_analysis
+(0 = negative, 0.5 = neutral, 1 = positive) for whole batches of texts:
+
+- lexicon_sentiment_batch: an embedded English valence lexicon with negation
+  and intensifier handling, aggregated with NumPy. No downloads, tens of
+  thousands of comments per second. Comments are translated to English before
+  scoring, so one lexicon covers every source language.
+- transformer_sentiment_batch: a small distilled transformer
+  (config.local_sentiment_model) through the optional `transformers` package
+  (plus PyTorch), run in batches on the CPU. Scores are memoized in the
+  sentiment cache.
+"""
+import re
+import threading
+import numpy as np
+import config
+from shared_func.sentiment_cache_func import cached_sentiments
+from shared_func.text_func import as_text
+
+# Word valences from -4 (most negative) to +4 (most positive)
+LEXICON = {
+    # positive
+    'good': 1.9, 'great': 3.1, 'excellent': 3.2, 'amazing': 2.8, 'awesome': 3.1, 'fantastic': 2.6,
+    'wonderful': 2.7, 'brilliant': 2.8, 'perfect': 2.7, 'best': 3.2, 'better': 1.9, 'nice': 1.8,
+    'love': 3.2, 'loved': 2.9, 'loves': 2.7, 'like': 1.5, 'liked': 1.8, 'enjoy': 2.2, 'enjoyed': 2.3,
+    'happy': 2.7, 'glad': 2.0, 'beautiful': 2.9, 'cool': 1.3, 'fun': 2.3, 'funny': 1.9, 'helpful': 1.8,
+    'useful': 1.9, 'interesting': 1.7, 'informative': 1.6, 'clear': 1.2, 'clearly': 1.1, 'true': 1.2,
+    'right': 1.0, 'correct': 1.3, 'agree': 1.5, 'thanks': 1.9, 'thank': 1.5, 'grateful': 2.0,
+    'congratulations': 2.9, 'congrats': 2.4, 'respect': 2.1, 'support': 1.7, 'hope': 1.9, 'peace': 2.5,
+    'safe': 1.9, 'fair': 1.3, 'honest': 2.3, 'brave': 2.4, 'strong': 2.3, 'win': 2.8, 'won': 2.7,
+    'success': 2.7, 'proud': 2.1, 'recommend': 1.5, 'impressive': 2.3, 'incredible': 2.2, 'genius': 1.9,
+    'well': 1.1, 'yes': 1.0, 'ok': 0.9, 'okay': 0.9, 'wow': 2.8, 'lol': 1.8, 'haha': 1.6, 'kkk': 1.6,
+    'bravo': 2.1, 'friend': 2.2, 'friends': 2.1, 'free': 2.3, 'trust': 2.3, 'truth': 1.3, 'smart': 1.7,
+    # negative
+    'bad': -2.5, 'worse': -2.1, 'worst': -3.1, 'terrible': -2.1, 'horrible': -2.5, 'awful': -2.0,
+    'poor': -2.1, 'hate': -2.7, 'hated': -3.2, 'hates': -1.9, 'dislike': -1.6, 'disagree': -1.6,
+    'wrong': -2.1, 'false': -1.3, 'fake': -2.1, 'lie': -1.6, 'lies': -1.8, 'liar': -2.6, 'lying': -2.4,
+    'stupid': -2.4, 'idiot': -2.3, 'idiots': -2.6, 'dumb': -2.3, 'ridiculous': -1.5, 'nonsense': -1.7,
+    'disgusting': -2.4, 'shame': -2.1, 'shameful': -2.2, 'sad': -2.1, 'angry': -2.3, 'annoying': -1.7,
+    'boring': -1.3, 'useless': -1.8, 'waste': -1.8, 'garbage': -2.2, 'trash': -1.9, 'crap': -1.6,
+    'scam': -2.5, 'fraud': -2.8, 'corrupt': -3.0, 'corruption': -3.0, 'propaganda': -1.8, 'evil': -3.4,
+    'kill': -3.7, 'killed': -3.5, 'killing': -3.4, 'murder': -3.7, 'death': -2.9, 'die': -2.9,
+    'dead': -3.3, 'violence': -3.1, 'attack': -2.1, 'war': -2.9, 'threat': -2.4, 'threaten': -2.5,
+    'danger': -2.4, 'dangerous': -2.1, 'destroy': -2.5, 'destroyed': -2.7, 'hurt': -2.4, 'pain': -2.3,
+    'fear': -2.2, 'afraid': -2.2, 'terrorist': -3.7, 'terrorism': -3.6, 'racist': -3.1, 'hateful': -3.1,
+    'disgrace': -2.2, 'pathetic': -2.2, 'failure': -2.3, 'fail': -2.5, 'failed': -2.3, 'problem': -1.7,
+    'crisis': -3.1, 'criminal': -2.4, 'crime': -2.5, 'steal': -2.2, 'stolen': -2.3, 'sick': -2.3,
+    'no': -1.2, 'never': -0.5, 'disappointed': -2.3, 'disappointing': -2.2, 'unfair': -2.1, 'cringe': -1.5,
+}
+NEGATIONS = {'not', 'no', 'never', 'nothing', 'nobody', 'neither', 'nor', 'none', 'cannot', 'without',
+             "don't", "doesn't", "didn't", "isn't", "aren't", "wasn't", "weren't", "won't", "wouldn't",
+             "can't", "couldn't", "shouldn't", "hasn't", "haven't", "ain't", 'dont', 'doesnt', 'didnt',
+             'isnt', 'arent', 'wasnt', 'cant', 'wont'}
+INTENSIFIERS = {'very': 0.3, 'really': 0.3, 'so': 0.2, 'extremely': 0.4, 'absolutely': 0.3, 'totally': 0.3,
+                'completely': 0.3, 'incredibly': 0.3, 'super': 0.3, 'most': 0.3, 'too': 0.2,
+                'slightly': -0.3, 'somewhat': -0.3, 'barely': -0.4, 'kinda': -0.3, 'little': -0.2}
+NEGATION_SCALAR = -0.74  # a negated word keeps roughly three quarters of its valence, inverted
+NEGATION_WINDOW = 3  # tokens before a word that can negate it
+NORMALIZATION_ALPHA = 15  # sum / sqrt(sum**2 + alpha) squashes the valence sum into (-1, 1)
+
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+def lexicon_sentiment_batch(texts):
+    """
+    Score texts with the embedded lexicon. Tokenization is per text; lookups,
+    negation, intensifiers and per-text sums are vectorized over all tokens
+    of the batch. Returns a float array, 0.5 for empty or neutral texts.
+    """
+    texts = [as_text(text) for text in texts]
+    tokens = [TOKEN_PATTERN.findall(text.lower()) for text in texts]
+    counts = np.fromiter((len(doc) for doc in tokens), dtype=np.int64, count=len(tokens))
+    flat = [token for doc in tokens for token in doc]
+    if not flat:
+        return np.full(len(texts), 0.5)
+
+    doc_ids = np.repeat(np.arange(len(texts)), counts)
+    valence = np.fromiter((LEXICON.get(token, 0.0) for token in flat), dtype=float, count=len(flat))
+    negation = np.fromiter((token in NEGATIONS for token in flat), dtype=bool, count=len(flat))
+    boost = np.fromiter((INTENSIFIERS.get(token, 0.0) for token in flat), dtype=float, count=len(flat))
+
+    # A word directly after an intensifier of the same text is scaled by it
+    scale = np.ones(len(flat))
+    same_doc = doc_ids[1:] == doc_ids[:-1]
+    scale[1:] += np.where(same_doc, boost[:-1], 0.0)
+
+    # A word within NEGATION_WINDOW tokens after a negation of the same text is inverted
+    negated = np.zeros(len(flat), dtype=bool)
+    for distance in range(1, NEGATION_WINDOW + 1):
+        negated[distance:] |= negation[:-distance] & (doc_ids[distance:] == doc_ids[:-distance])
+    # A negation word is not itself negated by an earlier one ("no, not bad")
+    valence = valence * scale * np.where(negated & ~negation, NEGATION_SCALAR, 1.0)
+
+    sums = np.bincount(doc_ids, weights=valence, minlength=len(texts))
+    compound = sums / np.sqrt(sums * sums + NORMALIZATION_ALPHA)
+    return (compound + 1) / 2
+
+def lexicon_sentiment(text):
+    """lexicon_sentiment_batch for a single text."""
+    return float(lexicon_sentiment_batch([text])[0])
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_transformer_pipeline():
+    """
+    The text-classification pipeline of config.local_sentiment_model on the
+    CPU, loaded once. Requires `transformers` and PyTorch.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            try:
+                from transformers import pipeline
+            except ImportError as e:
+                raise ImportError("The transformer sentiment backend needs `transformers` and `torch` installed") from e
+            _pipeline = pipeline('sentiment-analysis', model=config.local_sentiment_model, device=-1)
+        return _pipeline
+
+def transformer_sentiment_batch(texts, batch_size=None):
+    """
+    Score texts with the local transformer, config.local_sentiment_batch_size
+    texts per forward pass. The score is the probability of the positive
+    label. Empty texts are neutral; cached texts are not scored again.
+    """
+    if batch_size is None:
+        batch_size = config.local_sentiment_batch_size
+    texts = [as_text(text) for text in texts]
+    indexes = [i for i, text in enumerate(texts) if text]
+    scores = np.full(len(texts), 0.5)
+    if not indexes:
+        return scores
+
+    def classify(pending):
+        results = get_transformer_pipeline()(pending, batch_size=batch_size, truncation=True)
+        return [result['score'] if result['label'].upper().startswith('POS') else 1 - result['score']
+                for result in results]
+
+    scores[indexes] = cached_sentiments('transformers', config.local_sentiment_model,
+                                        [texts[i] for i in indexes], classify)
+    return scores
@@ -1,65 +1,309 @@
-from shared_func.youtube_search import search_youtube
+from shared_func.youtube_search import search_youtube, cached_search
 import os
+import config
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from googleapiclient.discovery import build
-from shared_func.googleapiclient_func import get_youtube_comments
-from shared_func.translate_func import translate_text
+from shared_func.googleapiclient_func import iter_youtube_comments
+from shared_func.translate_func import detect_languages, translate_texts
 from collections import Counter
 import matplotlib.pyplot as plt
 from shared_func.text_func import *
 from shared_func.nlp_func import *
-from shared_func.comprehend_func import sentiment_analysis
+from shared_func.sentiment_func import score_batch, check_backend
+from shared_func.dynamodb_func import get_video_watermarks
+from shared_func.row_builder import RowBuilder
+from shared_func.quota_func import plan_run, reply_limit, submit_in_run, QuotaExceededError
 
-def extract_data(search_str, max_videos=1, max_comments=10, order_by_date=True):
-    search_results = search_youtube(search_str, max_results=max_videos, order_by_date=order_by_date)
-    links = [result['link'] for result in search_results]
+COLUMNS = ["sentiment_score","comment","title","person","user_channel","link","translated","normalized","comment_id","published_at","parent_id","language"]
 
-    # Initialize empty DataFrame with required columns
-    df = pd.DataFrame(columns=["title", "link", "person", "user_channel", "comment", "translated"])
-    
-    for result in search_results:
-        link = result["link"]
-        title = result["title"]
-        print(f"title: {title}; link:{link}")
-        comments = get_youtube_comments(link, max_comments)
-
-        if comments is None:
-            continue
-        if len(comments) <= 1:
-            continue
-
-        for person in comments.keys():
-            for comment_data in comments.get(person):
-                # Handle new structure with separate comment and channel info
-                if isinstance(comment_data, dict):
-                    comment = comment_data['comment']
-                    user_channel = comment_data['user_channel']
-                else:
-                    # Fallback for old structure
-                    comment = comment_data
-                    user_channel = ""
-                
-                # Clean HTML tags from comment
-                cleaned_comment = clean_html_tags(comment) if comment else comment
-                tmp = pd.DataFrame({
-                    "title": [title],
-                    "link": [link],
-                    "person": [person],
-                    "user_channel": [user_channel],
-                    "comment": [cleaned_comment],
-                    "translated": [translate_text(cleaned_comment)]
-                })
-                df = pd.concat([tmp, df])
+def process_video(result, max_comments=10, time_budget=None, watermark=None, include_replies=False):
+    """
+    Fetch and translate the comments of a single search result.
+
+    Comments are streamed page by page, so translation of a page overlaps the
+    download of the next one. The languages of a page are detected in
+    batches and recorded in the `language` column. With a `watermark` all comments newer than it
+    are fetched, `max_comments` not applying. With `include_replies` reply rows are added, tagged with
+    the id of their thread in `parent_id`. Returns a DataFrame with one row
+    per comment, or None when the video has no usable comments.
+    """
+    link = result["link"]
+    title = result["title"]
+    print(f"title: {title}; link:{link}")
+
+    rows = RowBuilder(["title", "link", "person", "user_channel", "comment", "translated", "comment_id", "published_at", "parent_id", "language"])
+    people = set()
+    try:
+        for comments in iter_youtube_comments(link, max_comments, time_budget, watermark=watermark, replies=include_replies):
+            people.update(comments.keys())
+            page = []
+            for person in comments.keys():
+                for comment_data in comments.get(person):
+                    # Handle new structure with separate comment and channel info
+                    if isinstance(comment_data, dict):
+                        comment = comment_data['comment']
+                        user_channel = comment_data['user_channel']
+                        comment_id = comment_data.get('comment_id', '')
+                        published_at = comment_data.get('published_at', '')
+                        parent_id = comment_data.get('parent_id', '')
+                    else:
+                        # Fallback for old structure
+                        comment = comment_data
+                        user_channel = ""
+                        comment_id = ""
+                        published_at = ""
+                        parent_id = ""
+                    
+                    # Clean HTML tags from comment
+                    cleaned_comment = clean_html_tags(comment) if comment else comment
+                    page.append({
+                        "title": title,
+                        "link": link,
+                        "person": person,
+                        "user_channel": user_channel,
+                        "comment": cleaned_comment,
+                        "comment_id": comment_id,
+                        "published_at": published_at,
+                        "parent_id": parent_id
+                    })
+
+            texts = [row["comment"] for row in page]
+            languages = detect_languages(texts)
+            translations = translate_texts(texts, source_languages=languages)
+            for row, language, translated in zip(page, languages, translations):
+                rows.append(row, language=language, translated=translated)
+    except Exception as e:
+        print(f"Could not fetch comments for {link}: {e}")
+        return None
+
+    # A delta run may legitimately find a single new commenter
+    if watermark is None and len(people) <= 1:
+        return None
+    return rows.to_frame()
+
+def video_watermarks(df):
+    """Latest top-level comment of each video in a dataset, as {video_id: {'published_at', 'comment_id'}}."""
+    if df.empty or 'published_at' not in df.columns:
+        return {}
+    rows = df[df['published_at'].notna() & (df['published_at'] != '')]
+    if 'parent_id' in rows.columns:
+        # Threads are paged by their own publication time, so a newer reply must not move the watermark
+        rows = rows[rows['parent_id'].isna() | (rows['parent_id'] == '')]
+    latest = rows.sort_values('published_at', kind='stable').groupby('link').tail(1)
+    return {
+        row['link'].split("v=")[-1]: {'published_at': row['published_at'], 'comment_id': row['comment_id']}
+        for _, row in latest.iterrows()
+    }
+
+def merge_datasets(new_df, previous_df):
+    """Append a delta run to the previous dataset, keeping one row per comment id."""
+    previous_df = previous_df.reindex(columns=COLUMNS)
+    df = pd.concat([new_df, previous_df], ignore_index=True)
+    # Datasets written before comment ids were recorded have no id to deduplicate on
+    has_id = df['comment_id'].notna() & (df['comment_id'] != '')
+    df = df[~has_id | ~df['comment_id'].duplicated(keep='first')]
+    return df.sort_values("sentiment_score", kind="stable")
+
+def score_comments(df, sentiment_backend=None):
+    """
+    Normalize the translated text and add sentiment scores with `sentiment_backend`
+    (defaults to config.sentiment_backend), returning the dataset columns.
+    """
+    df = df.copy()
+    df["normalized"] = df["translated"].apply(lambda x: normalize(x) if x is not None else None)
+    df['sentiment_score'] = score_batch(df['normalized'].tolist(), sentiment_backend)
+    return df[COLUMNS]
+
+def iter_extract_data(search_str, max_videos=1, max_comments=10, order_by_date=True, max_concurrency=None, time_budget=None, previous_df=None, use_cache=True, include_replies=None, sentiment_backend=None, previous_s3=None):
+    """
+    Streaming variant of extract_data.
+
+    Yields (index, total, result, df) as soon as each video has been fetched,
+    translated and scored, in completion order. `index` is the video's position
+    in the search results, `result` its search result and `df` its enriched
+    rows (None when the video has no usable comments). Use combine_frames()
+    to build the final dataset from the yielded frames.
+
+    The run is first fitted into the remaining daily YouTube quota by
+    plan_run(), which may reduce max_videos/max_comments or raise
+    QuotaExceededError. A search the cache answers is not budgeted.
+    `use_cache=False` bypasses the search result cache. A sentiment backend
+    whose packages are missing raises before any API call.
+    """
+    check_backend(sentiment_backend)
+    if include_replies is None:
+        include_replies = config.include_replies
+    cached = cached_search(search_str, max_videos, order_by_date) if use_cache else None
+    max_videos, max_comments = plan_run(max_videos, max_comments, searches=0 if cached is not None else 1,
+                                        max_replies=reply_limit(include_replies))
+    if cached is not None:
+        search_results = cached[:max_videos]
+    else:
+        search_results = search_youtube(search_str, max_results=max_videos, order_by_date=order_by_date, use_cache=use_cache)
+    yield from iter_extract_videos(search_results, max_comments, max_concurrency, time_budget, previous_df, include_replies,
+                                   sentiment_backend, dataset=search_str, previous_s3=previous_s3)
+
+def iter_extract_videos(search_results, max_comments=10, max_concurrency=None, time_budget=None, previous_df=None, include_replies=None, sentiment_backend=None, dataset=None, previous_s3=None):
+    """
+    Fetch, translate and score a given list of videos (dicts shaped like
+    search_youtube results), yielding (index, total, result, df) in completion
+    order. With `previous_df`, loaded from `previous_s3`, only comments newer
+    than the watermarks saved for `dataset` (the query or watch name) with
+    that same dataset version are fetched; other videos are fetched in full.
+    See iter_extract_data.
+    """
+    check_backend(sentiment_backend)
+    total = len(search_results)
+
+    watermarks = {}
+    if previous_df is not None and dataset:
+        watermarks = get_video_watermarks(dataset, [result['id'] for result in search_results], previous_s3)
+
+    if max_concurrency is None:
+        max_concurrency = config.max_concurrency
+    if time_budget is None:
+        time_budget = config.comments_time_budget
+    if include_replies is None:
+        include_replies = config.include_replies
+    workers = max(1, min(max_concurrency, total))
+
+    def run(result):
+        df = process_video(result, max_comments, time_budget, watermarks.get(result['id']), include_replies)
+        if df is None or df.empty:
+            return None
+        return score_comments(df, sentiment_backend)
+
+    if workers == 1:
+        for index, result in enumerate(search_results):
+            yield index, total, result, run(result)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            submit_in_run(executor, run, result): index
+            for index, result in enumerate(search_results)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            yield index, total, search_results[index], future.result()
+    finally:
+        # Do not start queued videos if the consumer stopped early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def combine_frames(frames, previous_df=None):
+    """
+    Build the final dataset from per-video frames given in search order
+    (None entries are skipped), merged into `previous_df` for delta runs.
+    """
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
 
     # Only process if we have data
-    if not df.empty:
-        df["normalized"] = df["translated"].apply(lambda x: normalize(x) if x is not None else None)
-        df['sentiment_score'] = df['normalized'].apply(sentiment_analysis)
-        df = df[["sentiment_score","comment","title","person","user_channel","link","translated","normalized"]]
-        df = df.sort_values("sentiment_score")
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+        df = df.sort_values("sentiment_score", kind="stable")
     else:
         # Return empty DataFrame with all required columns
-        df = pd.DataFrame(columns=["sentiment_score","comment","title","person","user_channel","link","translated","normalized"])
+        df = pd.DataFrame(columns=COLUMNS)
+
+    if previous_df is not None and not previous_df.empty:
+        df = merge_datasets(df, previous_df)
     
     return df
 
+def extract_data(search_str, max_videos=1, max_comments=10, order_by_date=True, max_concurrency=None, time_budget=None, previous_df=None, use_cache=True, include_replies=None, sentiment_backend=None, previous_s3=None):
+    """
+    Search YouTube and build the enriched comments DataFrame.
+
+    Videos are fetched and enriched concurrently by a pool of at most
+    `max_concurrency` workers (defaults to config.max_concurrency; 1 runs
+    sequentially). Results are merged in search order, so the output does
+    not depend on which video finishes first. `time_budget` caps the seconds
+    spent paging through each video's comments (defaults to
+    config.comments_time_budget). `include_replies` (defaults to
+    config.include_replies) adds the replies of each thread as rows tagged
+    with their thread id in `parent_id`; `max_comments` still counts threads
+    and the quota planner budgets every reply page of every thread.
+    `sentiment_backend` picks the sentiment_func backend scoring the comments
+    (defaults to config.sentiment_backend).
+
+    Delta mode: when `previous_df` (the dataset of an earlier run of the same
+    query, loaded from S3 key `previous_s3`) is given, the per-video
+    watermarks saved with it are loaded from DynamoDB, only newer comments
+    are fetched and enriched, and the result is merged into `previous_df`.
+    Paging stops at the newest thread already stored, so new replies to
+    threads of the previous run are not fetched in delta mode. Every thread
+    newer than it is fetched, even beyond `max_comments` (and the quota
+    plan), so the next watermark never skips over threads; only
+    `time_budget` can cut a delta crawl short, and threads it did not reach
+    are not fetched later.
+    Save the new watermarks with
+    save_video_watermarks(search_str, video_watermarks(df), s3_key) once the dataset is stored.
+
+    Identical searches within config.search_cache_ttl are served from the
+    search result cache; `use_cache=False` forces a fresh search.
+    """
+    frames = {}
+    for index, total, result, df in iter_extract_data(search_str, max_videos, max_comments, order_by_date,
+                                                       max_concurrency, time_budget, previous_df, use_cache,
+                                                       include_replies, sentiment_backend, previous_s3):
+        frames[index] = df
+    return combine_frames([frames[index] for index in sorted(frames)], previous_df)
+
+def extract_batch(queries, max_videos=1, max_comments=10, order_by_date=True, max_concurrency=None, time_budget=None, use_cache=True, include_replies=None, sentiment_backend=None):
+    """
+    Run extract_data for several related queries, enriching shared videos once.
+
+    All searches run concurrently, the union of their videos is fetched,
+    translated and scored exactly once by iter_extract_videos, and the rows
+    are fanned back out. Returns {query: DataFrame}, each dataset built as
+    extract_data would for that query alone. API calls and wall time scale
+    with the number of unique videos rather than the sum over queries.
+
+    The run is fitted into the remaining daily quota assuming no overlap, so
+    max_videos may be reduced for every query; QuotaExceededError is raised
+    when not even one video per query fits. Searches the cache answers are
+    not budgeted.
+    """
+    queries = list(dict.fromkeys(queries))
+    if not queries:
+        return {}
+    if max_concurrency is None:
+        max_concurrency = config.max_concurrency
+    if include_replies is None:
+        include_replies = config.include_replies
+    check_backend(sentiment_backend)
+
+    cached = {}
+    if use_cache:
+        cached = {query: cached_search(query, max_videos, order_by_date) for query in queries}
+        cached = {query: results for query, results in cached.items() if results is not None}
+    total_videos, max_comments = plan_run(max_videos * len(queries), max_comments, searches=len(queries) - len(cached),
+                                          max_replies=reply_limit(include_replies))
+    if total_videos < len(queries):
+        raise QuotaExceededError(f"Only {total_videos} videos fit in the remaining quota, "
+                                 f"fewer than one for each of the {len(queries)} queries")
+    max_videos = total_videos // len(queries)
+
+    def search(query):
+        if query in cached:
+            return cached[query][:max_videos]
+        return search_youtube(query, max_results=max_videos, order_by_date=order_by_date, use_cache=use_cache)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(queries)))) as executor:
+        futures = [submit_in_run(executor, search, query) for query in queries]
+        search_results = {query: future.result() for query, future in zip(queries, futures)}
+
+    unique_videos = list({result['id']: result for results in search_results.values() for result in results}.values())
+    print(f"{sum(len(results) for results in search_results.values())} search results, {len(unique_videos)} unique videos")
+
+    frames = {}
+    for index, total, result, df in iter_extract_videos(unique_videos, max_comments, max_concurrency, time_budget,
+                                                         include_replies=include_replies,
+                                                         sentiment_backend=sentiment_backend):
+        frames[result['id']] = df
+    return {
+        query: combine_frames([frames.get(result['id']) for result in results])
+        for query, results in search_results.items()
+    }
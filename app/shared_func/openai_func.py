@@ -1,15 +1,29 @@
 import config
-from openai import OpenAI
 import re
+from shared_func.text_func import as_text
 
-# Initialize OpenAI client with your API key
-client = OpenAI(api_key = config.openai_api_key)
+OPENAI_MODEL = "gpt-4"
+
+_client = None
+
+def get_openai_client():
+    """OpenAI client created on first use, so importing this module needs neither the package nor a key."""
+    global _client
+    if _client is None:
+        if not config.openai_api_key:
+            raise RuntimeError("No OpenAI API key configured (secret openai_api_key or OPENAI_API_KEY)")
+        from openai import OpenAI
+        _client = OpenAI(api_key=config.openai_api_key)
+    return _client
 
 
 def sentiment_analysis(transcription):
-    transcription = ", ".join(transcription)
+    transcription = as_text(transcription)
+    if not transcription:
+        return 0.5
+    client = get_openai_client()
     response = client.chat.completions.create(
-        model="gpt-4",
+        model=OPENAI_MODEL,
         temperature=0,
         messages=[
             {
@@ -33,4 +47,4 @@ def sentiment_analysis(transcription):
     else:
         raise ValueError("No numeric sentiment score found in the response")
 
-    return sentiment_score
+    return max(0, min(1, sentiment_score))
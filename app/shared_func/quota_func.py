@@ -0,0 +1,221 @@
+import math
+import atexit
+import time
+import threading
+import contextvars
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytz
+import config
+from shared_func.dynamodb_func import add_quota_usage, get_quota_usage
+
+# YouTube Data API v3 quota cost per call; every other list call costs 1 unit
+QUOTA_COSTS = {
+    'search.list': 100,
+}
+COMMENTS_PER_PAGE = 100
+
+# The daily quota resets at midnight Pacific Time
+QUOTA_TIMEZONE = pytz.timezone('America/Los_Angeles')
+
+_current_run = contextvars.ContextVar('quota_run', default=None)
+
+
+class QuotaExceededError(Exception):
+    """Raised when a run cannot fit in the remaining daily YouTube quota."""
+
+
+def quota_cost(endpoint):
+    return QUOTA_COSTS.get(endpoint, 1)
+
+
+def quota_day():
+    return datetime.now(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+
+class RunUsage:
+    """Quota units spent by one run, broken down by endpoint."""
+
+    def __init__(self, name):
+        self.name = name
+        self.units = 0
+        self.calls = 0
+        self.by_endpoint = defaultdict(int)
+
+
+class QuotaLedger:
+    """
+    Thread-safe record of YouTube quota spent per call, per run and per day.
+
+    Runs are tracked through a context variable: wrap a run in `with
+    ledger.run(name):` and every call recorded from that context (including
+    worker threads started with a copy of it) is attributed to the run.
+
+    With `shared`, the daily total is also kept in a counter in DynamoDB, so
+    it survives restarts and is shared by every process using the same API
+    key. Recorded units are added to it atomically by a background thread
+    every `flush_interval` seconds or `flush_units` units, and when a run
+    ends, never on the calling thread; used_today() reads the counter back
+    plus the units not flushed yet. The in-process count is the fallback
+    when DynamoDB cannot be reached.
+    """
+
+    def __init__(self, daily_limit, history=1000, shared=False, flush_interval=None, flush_units=None):
+        self.daily_limit = daily_limit
+        self.shared = shared
+        self.flush_interval = config.youtube_quota_flush_interval if flush_interval is None else flush_interval
+        self.flush_units = config.youtube_quota_flush_units if flush_units is None else flush_units
+        self.calls = deque(maxlen=history)
+        self._daily = defaultdict(int)
+        self._pending = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_wanted = threading.Event()
+        self._flusher = None
+
+    def record(self, endpoint, units=None):
+        """Record one API call and return the units it cost."""
+        if units is None:
+            units = quota_cost(endpoint)
+        usage = _current_run.get()
+        day = quota_day()
+        with self._lock:
+            self._daily[day] += units
+            self.calls.append((time.time(), endpoint, units, usage.name if usage else None))
+            if usage is not None:
+                usage.units += units
+                usage.calls += 1
+                usage.by_endpoint[endpoint] += units
+            if self.shared:
+                self._pending[day] += units
+                flush_due = self._pending[day] >= self.flush_units
+        if self.shared:
+            self._start_flusher()
+            if flush_due:
+                self._flush_wanted.set()
+        return units
+
+    def _start_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='quota-flush', daemon=True)
+                self._flusher.start()
+                atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            self._flush_wanted.wait(self.flush_interval)
+            self._flush_wanted.clear()
+            self.flush()
+
+    def flush(self):
+        """Add the units recorded since the last flush to the shared counter. Failed days stay pending."""
+        with self._lock:
+            pending = {day: units for day, units in self._pending.items() if units}
+            self._pending.clear()
+        for day, units in pending.items():
+            if add_quota_usage(day, units) is None:
+                with self._lock:
+                    self._pending[day] += units
+
+    @contextmanager
+    def run(self, name):
+        """Attribute the calls made inside the block to a new RunUsage, which is yielded."""
+        usage = RunUsage(name)
+        token = _current_run.set(usage)
+        try:
+            yield usage
+        finally:
+            _current_run.reset(token)
+            if self.shared:
+                self.flush()
+
+    def used_today(self):
+        day = quota_day()
+        with self._lock:
+            used = self._daily[day]
+            pending = self._pending[day]
+        if self.shared:
+            stored = get_quota_usage(day)
+            if stored is not None:
+                return max(used, stored + pending)
+        return used
+
+    def remaining_today(self):
+        return max(0, self.daily_limit - self.used_today())
+
+    def daily_usage(self):
+        with self._lock:
+            return dict(self._daily)
+
+
+quota_ledger = QuotaLedger(config.youtube_daily_quota, shared=config.youtube_quota_shared)
+
+
+def submit_in_run(executor, fn, *args):
+    """
+    executor.submit(fn, *args) in a copy of the caller's context, so the
+    quota spent by the worker is charged to the caller's run.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def reply_limit(include_replies):
+    """Replies fetched per thread, the `max_replies` of estimate_run_cost and plan_run."""
+    return config.max_replies_per_thread if include_replies else 0
+
+
+def estimate_run_cost(max_videos, max_comments, searches=1, max_replies=0, lookups=0):
+    """
+    Upper bound of the quota units an extract_data run will spend:
+    `searches` searches, `lookups` videos.list calls (runs over given videos
+    instead of a search), every comment page of every video and, when up to
+    `max_replies` replies are fetched per thread, every reply page of every
+    thread.
+    """
+    pages_per_video = max(1, math.ceil(max_comments / COMMENTS_PER_PAGE))
+    reply_pages_per_video = max_comments * math.ceil(max_replies / COMMENTS_PER_PAGE)
+    return (searches * quota_cost('search.list')
+            + lookups * quota_cost('videos.list')
+            + max_videos * pages_per_video * quota_cost('commentThreads.list')
+            + max_videos * reply_pages_per_video * quota_cost('comments.list'))
+
+
+def plan_run(max_videos, max_comments, ledger=None, searches=1, max_replies=0, lookups=0):
+    """
+    Fit a run into the remaining daily quota.
+
+    Returns (max_videos, max_comments), downsized if needed: comment pages per
+    video are reduced first, then the number of videos and, when replies are
+    fetched, the number of threads of the single video left. Raises
+    QuotaExceededError when not even one video with one page of comments
+    (one thread, with replies) fits.
+    """
+    if ledger is None:
+        ledger = quota_ledger
+    remaining = ledger.remaining_today()
+
+    videos, comments = max_videos, max_comments
+    while estimate_run_cost(videos, comments, searches, max_replies, lookups) > remaining:
+        if comments > COMMENTS_PER_PAGE:
+            comments = (math.ceil(comments / COMMENTS_PER_PAGE) - 1) * COMMENTS_PER_PAGE
+        elif videos > 1:
+            videos -= 1
+        elif max_replies and comments > 1:
+            # Every thread costs its reply pages: keep as many threads as the rest of the quota pays for
+            reply_units = math.ceil(max_replies / COMMENTS_PER_PAGE) * quota_cost('comments.list')
+            comments = max(1, min(comments - 1, (remaining - estimate_run_cost(1, 0, searches, 0, lookups)) // reply_units))
+        else:
+            smallest = 1 if max_replies else min(comments, COMMENTS_PER_PAGE)
+            raise QuotaExceededError(
+                f"Run needs at least {estimate_run_cost(1, smallest, searches, max_replies, lookups)} quota units "
+                f"but only {remaining} remain today"
+            )
+
+    if (videos, comments) != (max_videos, max_comments):
+        print(f"Quota planner downsized run from {max_videos} videos x {max_comments} comments "
+              f"to {videos} x {comments} ({remaining} units remaining)")
+    return videos, comments
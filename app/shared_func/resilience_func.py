@@ -0,0 +1,229 @@
+import json
+import time
+import random
+import socket
+import threading
+from collections import defaultdict
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+import config
+from shared_func.quota_func import QuotaExceededError
+
+# Error classes returned by classify_error
+TRANSIENT = 'transient'        # 5xx, timeouts, dropped connections: retry with backoff
+RATE_LIMITED = 'rate_limited'  # 429 or 403 rate limit reasons: retry with a longer backoff
+QUOTA = 'quota'                # daily quota exhausted: retrying cannot succeed before the reset
+FATAL = 'fatal'                # bad request, not found, comments disabled, ...: do not retry
+
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded', 'concurrentLimitExceeded'}
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open."""
+
+
+def error_reasons(error):
+    """The `reason` fields of a googleapiclient HttpError body, e.g. {'quotaExceeded'}."""
+    try:
+        data = json.loads(error.content.decode('utf-8'))
+        return {detail.get('reason', '') for detail in data['error'].get('errors', [])}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+
+
+def classify_error(error):
+    """Sort an exception raised by a YouTube call into TRANSIENT, RATE_LIMITED, QUOTA or FATAL."""
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        reasons = error_reasons(error)
+        if reasons & QUOTA_REASONS:
+            return QUOTA
+        if status == 429 or reasons & RATE_LIMIT_REASONS:
+            return RATE_LIMITED
+        if status >= 500:
+            return TRANSIENT
+        return FATAL
+    if isinstance(error, (socket.timeout, TimeoutError, ConnectionError, httplib2.HttpLib2Error)):
+        return TRANSIENT
+    return FATAL
+
+
+def backoff_delay(attempt, base_delay, max_delay, rng=random):
+    """Full-jitter exponential backoff: a random delay in [0, min(max_delay, base_delay * 2**attempt)]."""
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def retry_after(error):
+    """Seconds requested by a Retry-After header, or None."""
+    resp = getattr(error, 'resp', None)
+    try:
+        return float(resp.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    After `failure_threshold` consecutive retryable failures the circuit opens
+    and calls fail fast with CircuitOpenError for `reset_timeout` seconds. Then
+    one trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return
+        raise CircuitOpenError(f"Circuit for {self.name} is open after {self.failures} consecutive failures")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        """Count a retryable failure. Returns True if this opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            was_open = self.opened_at is not None
+            if was_open or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+            return not was_open and self.opened_at is not None
+
+
+class RetryMetrics:
+    """Thread-safe counters of calls, retries and failures per endpoint."""
+
+    def __init__(self):
+        self._counters = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def increment(self, endpoint, counter, amount=1):
+        with self._lock:
+            self._counters[endpoint][counter] += amount
+
+    def stats(self):
+        """Snapshot as {endpoint: {counter: value}}, e.g. calls, retries, failures, errors.transient."""
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in self._counters.items()}
+
+    def total(self, counter):
+        with self._lock:
+            return sum(counters.get(counter, 0) for counters in self._counters.values())
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+retry_metrics = RetryMetrics()
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint):
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker(endpoint, config.youtube_breaker_threshold,
+                                                 config.youtube_breaker_reset)
+        return _breakers[endpoint]
+
+
+def reset_breakers():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def call_with_retry(endpoint, func, max_retries=None, base_delay=None, max_delay=None, sleep=time.sleep):
+    """
+    Call `func()` (one YouTube API call to `endpoint`), retrying transient and
+    rate-limit errors with full-jitter exponential backoff.
+
+    Rate-limited calls back off four times longer, or as long as a
+    Retry-After header asks. Daily quota errors are raised as
+    QuotaExceededError and fatal errors are raised at once. Every retryable
+    failure counts towards the endpoint's circuit breaker; while it is open
+    calls raise CircuitOpenError without reaching the API. Defaults come
+    from config.youtube_max_retries / youtube_retry_base_delay / youtube_retry_max_delay.
+    """
+    if max_retries is None:
+        max_retries = config.youtube_max_retries
+    if base_delay is None:
+        base_delay = config.youtube_retry_base_delay
+    if max_delay is None:
+        max_delay = config.youtube_retry_max_delay
+    breaker = get_breaker(endpoint)
+
+    attempt = 0
+    while True:
+        try:
+            breaker.allow()
+        except CircuitOpenError:
+            retry_metrics.increment(endpoint, 'short_circuited')
+            raise
+
+        retry_metrics.increment(endpoint, 'calls')
+        try:
+            result = func()
+        except Exception as e:
+            kind = classify_error(e)
+            retry_metrics.increment(endpoint, f'errors.{kind}')
+            if kind == QUOTA:
+                # Also ends a half-open trial; the quota reset, not the breaker, decides when calls succeed again
+                breaker.record_success()
+                retry_metrics.increment(endpoint, 'failures')
+                raise QuotaExceededError(f"YouTube daily quota exhausted ({endpoint})") from e
+            if kind == FATAL:
+                # The endpoint answered; a bad request says nothing about its health
+                breaker.record_success()
+                retry_metrics.increment(endpoint, 'failures')
+                raise
+            if breaker.record_failure():
+                retry_metrics.increment(endpoint, 'circuit_opened')
+            if attempt >= max_retries or breaker.state == 'open':
+                retry_metrics.increment(endpoint, 'failures')
+                raise
+
+            delay = backoff_delay(attempt, base_delay * (4 if kind == RATE_LIMITED else 1), max_delay)
+            if kind == RATE_LIMITED and retry_after(e) is not None:
+                delay = max(delay, min(retry_after(e), max_delay))
+            retry_metrics.increment(endpoint, 'retries')
+            attempt += 1
+            sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
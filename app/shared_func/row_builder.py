@@ -0,0 +1,53 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+
+
+class RowBuilder:
+    """
+    Columnar accumulator for DataFrame rows.
+
+    Rows are appended into one buffer per column and the DataFrame is
+    materialized once by to_frame(), instead of concatenating a one-row
+    DataFrame per record (which copies the whole frame every time).
+    Columns listed in `float_columns` are kept in compact float64 buffers;
+    the dtype of the other columns is inferred by pandas, as with a list of rows.
+    """
+
+    def __init__(self, columns, float_columns=()):
+        self.columns = list(columns)
+        self._buffers = {
+            column: array('d') if column in float_columns else []
+            for column in self.columns
+        }
+        self._length = 0
+
+    def append(self, row=None, **values):
+        """Append one row given as a dict and/or keyword arguments. Missing columns become None (NaN for floats)."""
+        if row:
+            values = {**row, **values}
+        for column, buffer in self._buffers.items():
+            value = values.get(column)
+            if isinstance(buffer, array):
+                buffer.append(np.nan if value is None else value)
+            else:
+                buffer.append(value)
+        self._length += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return self._length
+
+    def to_frame(self):
+        """Materialize the accumulated rows as a DataFrame with the builder's column order."""
+        data = {}
+        for column, buffer in self._buffers.items():
+            if isinstance(buffer, array):
+                data[column] = np.frombuffer(buffer, dtype=np.float64).copy()
+            else:
+                data[column] = buffer
+        return pd.DataFrame(data, columns=self.columns)
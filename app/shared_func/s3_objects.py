@@ -2,6 +2,7 @@ import re
 import unicodedata
 import boto3
 import os
+import pickle
 from shared_func.boto3_session import *
 import config
 
@@ -157,6 +158,16 @@ def download_file_from_s3(bucket_name, file_key, destination_path):
     except Exception as e:
         print(f"Error downloading file: {e}")
 
+def load_dataframe_from_s3(bucket_name, key_name):
+    """Load a pickled DataFrame (as written by upload_dataframe_to_s3) from S3. Returns None on error."""
+    s3 = session.client('s3')
+    try:
+        response = s3.get_object(Bucket=bucket_name, Key=key_name)
+        return pickle.loads(response['Body'].read())
+    except Exception as e:
+        print(f"Error loading dataset from S3: {e}")
+        return None
+
 def upload_dataframe_to_s3(dataframe, bucket_name, key_name, path, delete=True):
     msg = f"uploading: {key_name}"
     print(msg)
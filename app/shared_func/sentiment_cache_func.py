@@ -0,0 +1,57 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+import config
+from shared_func.cache_func import TTLCache, SqliteCache, TieredCache
+
+# Sentiment scores keyed by backend, model version and normalized text, shared across runs and datasets
+sentiment_cache = TieredCache(
+    TTLCache(maxsize=config.sentiment_cache_size, ttl=config.sentiment_cache_ttl),
+    SqliteCache(os.path.join(config.cache_dir, 'sentiment.sqlite'), ttl=config.sentiment_cache_ttl,
+                max_entries=config.sentiment_cache_max_entries)
+)
+
+def normalize_for_key(text):
+    """Case, Unicode form and whitespace do not change a sentiment score; drop them from the key."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text)).strip().lower()
+
+def sentiment_key(backend, version, text):
+    """Content address of a score: sha256 of the backend, its model version and the normalized text."""
+    parts = [backend, version, normalize_for_key(text)]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def cached_sentiment(backend, version, text, score):
+    """
+    Read-through sentiment_cache lookup for one text. `score(text)` computes
+    a missing score and returns None on failure, which is not cached.
+    """
+    key = sentiment_key(backend, version, text)
+    cached = sentiment_cache.get(key)
+    if cached is not None:
+        return cached
+    result = score(text)
+    if result is not None:
+        sentiment_cache.set(key, result)
+    return result
+
+def cached_sentiments(backend, version, texts, score_many):
+    """
+    cached_sentiment for a list of texts. Only uncached texts are passed to
+    `score_many(texts)`, once each, which returns one score per text (None
+    on failure). Returns one score per text, None where scoring failed.
+    """
+    keys = [sentiment_key(backend, version, text) for text in texts]
+    known = sentiment_cache.get_many(set(keys))
+    pending = {}
+    for text, key in zip(texts, keys):
+        if key not in known and key not in pending:
+            pending[key] = text
+
+    if pending:
+        scores = dict(zip(pending, score_many(list(pending.values()))))
+        scored = {key: score for key, score in scores.items() if score is not None}
+        sentiment_cache.set_many(scored)
+        known.update(scored)
+    return [known.get(key) for key in keys]
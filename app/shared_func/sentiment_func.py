@@ -0,0 +1,77 @@
+import logging
+from importlib import import_module
+from importlib.util import find_spec
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import config
+
+logger = logging.getLogger(__name__)
+
+# name -> (module, function, batched, requires); modules are imported on first use so
+# optional dependencies (transformers, openai) are only needed when selected
+_backends = {}
+
+def register_backend(name, module, function, batched=True, requires=()):
+    """
+    Make `module.function` selectable as sentiment backend `name`.
+    Batched functions take a list of texts and return one 0-1 score per
+    text; others score a single text and are called concurrently.
+    `requires` names the packages the function imports when first called.
+    """
+    _backends[name] = (module, function, batched, tuple(requires))
+
+register_backend('comprehend', 'shared_func.comprehend_func', 'sentiment_analysis_batch')
+register_backend('lexicon', 'shared_func.local_sentiment_func', 'lexicon_sentiment_batch')
+register_backend('transformers', 'shared_func.local_sentiment_func', 'transformer_sentiment_batch',
+                 requires=('transformers', 'torch'))
+register_backend('bedrock', 'shared_func.bedrock_func', 'sentiment_analysis', batched=False)
+register_backend('openai', 'shared_func.openai_func', 'sentiment_analysis', batched=False)
+
+def available_backends():
+    return sorted(_backends)
+
+def get_backend(name=None):
+    """The scoring function of backend `name` (default config.sentiment_backend)."""
+    name = name or config.sentiment_backend
+    if name not in _backends:
+        raise ValueError(f"Unknown sentiment backend {name!r}, expected one of {available_backends()}")
+    module, function, batched, _ = _backends[name]
+    score = getattr(import_module(module), function)
+    return score if batched else one_by_one(score)
+
+def check_backend(name=None):
+    """
+    Raise now if backend `name` cannot run, so a run fails before spending
+    quota on comments it could not score.
+    """
+    name = name or config.sentiment_backend
+    get_backend(name)
+    missing = [package for package in _backends[name][3] if find_spec(package) is None]
+    if missing:
+        raise ImportError(f"The {name} sentiment backend needs {' and '.join(missing)} installed")
+
+def one_by_one(score, max_workers=None):
+    """Batch interface over a single-text scorer, config.sentiment_workers texts at a time. Failures score 0.5."""
+    if max_workers is None:
+        max_workers = config.sentiment_workers
+
+    def safe_score(text):
+        try:
+            return score(text)
+        except Exception as e:
+            logger.warning(f"Sentiment scoring failed: {e}")
+            return 0.5
+
+    def score_batch(texts):
+        if len(texts) <= 1 or max_workers <= 1:
+            return [safe_score(text) for text in texts]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(texts))) as executor:
+            return list(executor.map(safe_score, texts))
+    return score_batch
+
+def score_batch(texts, backend=None):
+    """Score texts with the selected backend. Returns a float array, one 0-1 score per text."""
+    texts = list(texts)
+    if not texts:
+        return np.empty(0)
+    return np.asarray(get_backend(backend)(texts), dtype=float)
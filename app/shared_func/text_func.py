@@ -41,6 +41,14 @@ def normalize_key_name(key_name):
     
     return normalized
 
+def as_text(text):
+    """Text input as a stripped string ('' for None), joining lists of tokens."""
+    if text is None:
+        return ''
+    if isinstance(text, list):
+        text = ' '.join(str(item) for item in text)
+    return str(text).strip()
+
 def normalize(text):
     if not text:
         return ""
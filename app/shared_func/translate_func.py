@@ -1,29 +1,277 @@
-import boto3
+import os
+import re
+import json
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+import config
+from shared_func.cache_func import TTLCache, SqliteCache, TieredCache
+from shared_func.aws_client_func import get_client
 
 logger = logging.getLogger(__name__)
 
+LANGUAGE_BATCH_SIZE = 25  # batch_detect_dominant_language accepts up to 25 documents
+COMPREHEND_MAX_BYTES = 4999  # per-document limit is 5000 bytes of UTF-8
+TRANSLATE_MAX_BYTES = 9000  # translate_text accepts 10,000 bytes; keep headroom for the delimiters
+# Joins the comments packed into one translate_text request; Translate leaves it untouched
+TRANSLATE_DELIMITER = '\n\n[[#]]\n\n'
+TRANSLATE_DELIMITER_PATTERN = re.compile(r'\s*\[\[\s*#\s*\]\]\s*')
+
+# Detected languages and translations keyed by a hash of their inputs, shared across runs and datasets
+translation_cache = TieredCache(
+    TTLCache(maxsize=config.translation_cache_size, ttl=config.translation_cache_ttl),
+    SqliteCache(os.path.join(config.cache_dir, 'translations.sqlite'), ttl=config.translation_cache_ttl,
+                max_entries=config.translation_cache_max_entries)
+)
+
+def cache_key(kind, *parts):
+    """Content address of a cached result: sha256 of the kind and its inputs."""
+    return hashlib.sha256(json.dumps([kind, *parts], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+# Function words of the languages most seen in our comments, for guess_language
+STOPWORDS = {
+    'en': set("""the and is are was were be been to of in that it this for on with as at by from have has had
+        not but or you your i my me we our they their he she his her them what which who will would can could
+        should there here about just do does did don't it's i'm so if than then very really all no yes""".split()),
+    'pt': set("""o os as um uma de do da dos das em no na nos nas que é não para com por mais como mas foi ser
+        está isso esse essa ele ela eles você vocês eu meu minha muito também já quando só sua seu""".split()),
+    'es': set("""el la los las un una de del en que es no por con para más como pero fue ser está esto ese
+        esa él ella ellos usted yo mi muy también ya cuando solo su sus hay lo le se""".split()),
+    'fr': set("""le la les un une de des du en et est que qui ne pas pour avec sur plus comme mais été être
+        ce cette il elle ils vous je mon ma très aussi déjà quand seulement son sa au aux""".split()),
+    'de': set("""der die das ein eine und ist nicht zu mit von für auf den dem des sich auch es ich du er sie
+        wir ihr sind war wie aber noch nur schon wenn sehr bei aus""".split()),
+    'it': set("""il lo la gli le un una di del della che è non per con più come ma è stato essere questo
+        questa lui lei loro io mio mia molto anche già quando solo suo sua sono""".split()),
+}
+LOCALLY_TRUSTED_LANGUAGES = {'en'}  # guesses accepted without asking Comprehend
+NON_ENGLISH_LETTERS = set('áàâãäåçéèêëíìîïñóòôõöúùûüßœæ')
+
+def guess_language(text):
+    """
+    CPU-only language guess from stopword overlap. Returns a language code
+    only when the text is long enough, written in Latin script and clearly
+    dominated by one language's function words; None when ambiguous.
+    """
+    if not text:
+        return None
+    words = re.findall(r"[^\W\d_]+(?:'[^\W\d_]+)?", text.lower())
+    if len(words) < 3:
+        return None
+
+    letters = [char for char in text.lower() if char.isalpha()]
+    if sum(1 for char in letters if not char.isascii() and char not in NON_ENGLISH_LETTERS) > len(letters) * 0.1:
+        # Mostly non-Latin script (Cyrillic, Arabic, CJK, ...)
+        return None
+
+    hits = {language: sum(word in stopwords for word in words) for language, stopwords in STOPWORDS.items()}
+    ranked = sorted(hits.items(), key=lambda item: item[1], reverse=True)
+    (best, best_hits), (_, second_hits) = ranked[0], ranked[1]
+    if best_hits < 2 or best_hits < len(words) * 0.2 or best_hits < 2 * second_hits + 1:
+        return None
+    if best == 'en' and sum(char in NON_ENGLISH_LETTERS for char in letters) > len(letters) * 0.02:
+        return None
+    return best
+
+def local_language(text):
+    """The guess_language result when it is trusted enough to skip Comprehend (config.local_language_id), else None."""
+    if not config.local_language_id:
+        return None
+    language = guess_language(text)
+    return language if language in LOCALLY_TRUSTED_LANGUAGES else None
+
 def get_translate_client():
-    return boto3.client('translate', region_name='us-east-1')
+    return get_client('translate')
 
 def get_comprehend_client():
-    return boto3.client('comprehend', region_name='us-east-1')
+    return get_client('comprehend')
 
 def detect_language(text):
     """Detect the language of the input text using AWS Comprehend"""
     if not text or len(text.strip()) < 3:
         return 'auto'
     
+    language = local_language(text)
+    if language is not None:
+        return language
+    
+    key = cache_key('language', text)
+    cached = translation_cache.get(key)
+    if cached is not None:
+        return cached
+    
     comprehend = get_comprehend_client()
     try:
         response = comprehend.detect_dominant_language(Text=text)
         languages = response.get('Languages', [])
         if languages and languages[0]['Score'] > 0.5:
+            translation_cache.set(key, languages[0]['LanguageCode'])
             return languages[0]['LanguageCode']
     except Exception as e:
         logger.warning(f"Language detection failed: {e}")
     return 'auto'
 
+def truncate_utf8(text, max_bytes):
+    """Cut text to at most max_bytes of UTF-8 without splitting a character."""
+    encoded = text.encode('utf-8')
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode('utf-8', errors='ignore')
+
+def detect_language_batch(texts):
+    """
+    Detect the languages of up to 25 texts with one batch_detect_dominant_language call.
+    Texts too short to detect, failed documents and low-confidence results are 'auto'.
+    """
+    languages = ['auto'] * len(texts)
+    indexes = [i for i, text in enumerate(texts) if text and len(text.strip()) >= 3]
+    if not indexes:
+        return languages
+
+    comprehend = get_comprehend_client()
+    try:
+        response = comprehend.batch_detect_dominant_language(
+            TextList=[truncate_utf8(texts[i], COMPREHEND_MAX_BYTES) for i in indexes]
+        )
+    except Exception as e:
+        logger.warning(f"Batch language detection failed: {e}")
+        return languages
+
+    for result in response.get('ResultList', []):
+        candidates = result.get('Languages', [])
+        if candidates and candidates[0]['Score'] > 0.5:
+            languages[indexes[result['Index']]] = candidates[0]['LanguageCode']
+    for error in response.get('ErrorList', []):
+        logger.warning(f"Language detection failed for a document: {error.get('ErrorMessage')}")
+    return languages
+
+def detect_languages(texts, max_workers=None):
+    """
+    Detect the language of every text, 25 documents per Comprehend call, with
+    the batches sent concurrently (config.comprehend_batch_workers).
+    Texts that guess_language confidently identifies as English, cached
+    texts and duplicates are not sent.
+    Returns one language code per text, 'auto' when unknown.
+    """
+    texts = list(texts)
+    if max_workers is None:
+        max_workers = config.comprehend_batch_workers
+
+    local = [local_language(text) for text in texts]
+    keys = [cache_key('language', text) if text and not language else None for text, language in zip(texts, local)]
+    known = translation_cache.get_many(set(key for key in keys if key))
+    pending = list(dict.fromkeys(text for text, key in zip(texts, keys) if key and key not in known))
+
+    batches = [pending[i:i + LANGUAGE_BATCH_SIZE] for i in range(0, len(pending), LANGUAGE_BATCH_SIZE)]
+    if len(batches) <= 1 or max_workers <= 1:
+        results = [detect_language_batch(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            results = list(executor.map(detect_language_batch, batches))
+
+    detected = {
+        cache_key('language', text): language
+        for text, language in zip(pending, [language for batch in results for language in batch])
+    }
+    # 'auto' means detection failed or was not confident; ask again next time
+    translation_cache.set_many({key: language for key, language in detected.items() if language != 'auto'})
+    known.update(detected)
+    return [language or (known.get(key, 'auto') if key else 'auto') for language, key in zip(local, keys)]
+
+def translate_texts(texts, target_language='en', source_languages=None, max_workers=None):
+    """
+    Translate a list of texts. Source languages are detected in batches by
+    detect_languages unless given (one code per text, 'auto' when unknown).
+
+    Texts needing translation are grouped by source language and packed into
+    chunks of up to TRANSLATE_MAX_BYTES, one translate_text call per chunk,
+    sent concurrently (config.translate_batch_workers). Cached texts and
+    duplicates are not sent; texts of unknown language are translated one by one.
+    """
+    texts = list(texts)
+    if source_languages is None:
+        source_languages = detect_languages(texts)
+    if max_workers is None:
+        max_workers = config.translate_batch_workers
+
+    pairs = list(dict.fromkeys(
+        (text, source_language) for text, source_language in zip(texts, source_languages)
+        if text and text.strip() and source_language != target_language
+    ))
+    keys = {pair: cache_key('translation', pair[0], pair[1], target_language) for pair in pairs}
+    known = translation_cache.get_many(set(keys.values()))
+
+    by_language = {}
+    for text, source_language in pairs:
+        if keys[(text, source_language)] not in known:
+            by_language.setdefault(source_language, []).append(text)
+    jobs = []
+    for source_language, pending in by_language.items():
+        if source_language == 'auto':
+            # Translate would detect one language for the whole chunk
+            jobs.extend(([text], source_language) for text in pending)
+        else:
+            jobs.extend((chunk, source_language) for chunk in chunk_texts(pending, TRANSLATE_MAX_BYTES))
+
+    def run(job):
+        chunk, source_language = job
+        return translate_chunk(chunk, target_language, source_language)
+
+    if len(jobs) <= 1 or max_workers <= 1:
+        results = [run(job) for job in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            results = list(executor.map(run, jobs))
+
+    translated = {}
+    for (chunk, source_language), result in zip(jobs, results):
+        for text, translation in zip(chunk, result):
+            if translation is not None:
+                translated[keys[(text, source_language)]] = translation
+    translation_cache.set_many(translated)
+    known.update(translated)
+
+    return [
+        known.get(keys.get((text, source_language)), text)
+        for text, source_language in zip(texts, source_languages)
+    ]
+
+def chunk_texts(texts, max_bytes):
+    """Group texts into lists whose delimiter-joined UTF-8 size stays within max_bytes."""
+    separator = len(TRANSLATE_DELIMITER.encode('utf-8'))
+    chunks, chunk, size = [], [], 0
+    for text in texts:
+        length = len(text.encode('utf-8'))
+        if chunk and size + separator + length > max_bytes:
+            chunks.append(chunk)
+            chunk, size = [], 0
+        size += (separator if chunk else 0) + length
+        chunk.append(text)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def translate_chunk(texts, target_language, source_language):
+    """
+    Translate texts sharing a source language with one translate_text call,
+    splitting the result on the delimiter. If the texts cannot be joined
+    safely or the pieces do not line up, they are translated one by one.
+    Returns one translation per text, None where translation failed.
+    """
+    translate = get_translate_client()
+    if len(texts) == 1:
+        return [request_translation(translate, texts[0], target_language, source_language)]
+
+    if not any(TRANSLATE_DELIMITER_PATTERN.search(text) for text in texts):
+        joined = request_translation(translate, TRANSLATE_DELIMITER.join(texts), target_language, source_language)
+        if joined is not None:
+            pieces = TRANSLATE_DELIMITER_PATTERN.split(joined.strip())
+            if len(pieces) == len(texts):
+                return pieces
+            logger.warning(f"Chunked translation returned {len(pieces)} pieces for {len(texts)} texts, "
+                           "translating them one by one")
+    return [request_translation(translate, text, target_language, source_language) for text in texts]
+
 def translate_text(text, target_language='en', source_language=None):
     """
     Translate text using AWS Translate with automatic language detection
@@ -41,6 +289,19 @@ def translate_text(text, target_language='en', source_language=None):
     if source_language == target_language:
         return text
     
+    key = cache_key('translation', text, source_language, target_language)
+    cached = translation_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    translated = request_translation(translate, text, target_language, source_language)
+    if translated is None:
+        return text
+    translation_cache.set(key, translated)
+    return translated
+
+def request_translation(translate, text, target_language, source_language):
+    """Call AWS Translate, retrying with source 'auto'. Returns None if both attempts fail."""
     try:
         response = translate.translate_text(
             Text=text,
@@ -60,4 +321,4 @@ def translate_text(text, target_language='en', source_language=None):
             return response['TranslatedText']
         except Exception as e2:
             logger.error(f"Auto-translation also failed: {e2}")
-            return text
+            return None
@@ -0,0 +1,282 @@
+"""
+Local stand-in for the YouTube Data API v3, for load testing the ingestion
+path without spending quota.
+
+It serves synthetic but deterministic search, videos, channels,
+playlistItems, commentThreads and comments responses over HTTP, with
+configurable sizes, latency and error rate. Point the app at it with the
+YOUTUBE_API_URL environment variable (config.youtube_api_url), e.g.
+
+    python -m shared_func.youtube_fake_server --port 8765 --latency 0.05
+    YOUTUBE_API_URL=http://127.0.0.1:8765/youtube/v3/ LOCAL_MODE=true streamlit run home.py
+
+or start it in-process with `with FakeYouTubeServer(...) as server:` and
+use server.url (see benchmarks/bench_ingestion.py).
+"""
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SAMPLE_TEXTS = [
+    "This video explains everything clearly, thanks for sharing",
+    "I completely disagree with what was said here",
+    "Esse vídeo é muito bom, parabéns pelo conteúdo",
+    "No estoy de acuerdo con esta información",
+    "Ce reportage est totalement faux",
+    "Das ist eine interessante Perspektive",
+    "Someone should report this channel, it spreads lies",
+    "Great work, keep it up!",
+]
+INLINE_REPLIES = 5  # the real API inlines at most 5 replies per thread
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_id(prefix, *parts, length=11):
+    digest = hashlib.sha1('/'.join(str(part) for part in parts).encode()).hexdigest()
+    return prefix + digest[:length]
+
+
+def timestamp(minutes):
+    return (BASE_TIME + timedelta(minutes=minutes)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class FakeYouTubeServer:
+    """
+    Threaded HTTP server answering YouTube Data API v3 list calls with synthetic data.
+
+    Every video has `comments_per_video` threads (newest first), each thread
+    `replies_per_thread` replies, every channel `videos_per_channel` uploads.
+    Comment authors are drawn from a pool of `authors`. Each request sleeps
+    `latency` plus up to `jitter` seconds and fails with a 503 backendError
+    with probability `error_rate`. `requests` counts calls per endpoint.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 comments_per_video=200, replies_per_thread=0, videos_per_channel=200, authors=50, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.comments_per_video = comments_per_video
+        self.replies_per_thread = replies_per_thread
+        self.videos_per_channel = videos_per_channel
+        self.authors = authors
+        self.requests = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/youtube/v3/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='fake-youtube', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Request handling
+
+    def handle(self, request):
+        parsed = urlparse(request.path)
+        endpoint = parsed.path.rstrip('/').split('/')[-1]
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+
+        with self._lock:
+            self.requests[endpoint] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            fail = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+
+        handler = getattr(self, f"list_{endpoint}", None)
+        if fail:
+            status, body = 503, self.error(503, 'backendError', 'Backend Error')
+        elif handler is None:
+            status, body = 404, self.error(404, 'notFound', f'Unknown endpoint: {endpoint}')
+        else:
+            status, body = 200, handler(params)
+
+        payload = json.dumps(body).encode()
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json; charset=UTF-8')
+        request.send_header('Content-Length', str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    @staticmethod
+    def error(code, reason, message):
+        return {'error': {'code': code, 'message': message, 'errors': [{'reason': reason, 'message': message}]}}
+
+    @staticmethod
+    def page(params, total, make_item, default_size=5, max_size=50):
+        """One page of `total` synthetic items, paginated with offset page tokens."""
+        start = int(params.get('pageToken') or 0)
+        size = min(int(params.get('maxResults', default_size)), max_size)
+        end = min(start + size, total)
+        response = {'items': [make_item(i) for i in range(start, end)], 'pageInfo': {'totalResults': total}}
+        if end < total:
+            response['nextPageToken'] = str(end)
+        return response
+
+    # Synthetic resources
+
+    def channel_id(self, seed):
+        return make_id('UC', 'channel', seed, length=22)
+
+    def video_snippet(self, video_id, channel_id, minutes):
+        return {
+            'title': f'Video {video_id}',
+            'channelId': channel_id,
+            'channelTitle': f'Channel {channel_id[-6:]}',
+            'publishedAt': timestamp(minutes),
+            'thumbnails': {'default': {'url': f'https://i.ytimg.com/vi/{video_id}/default.jpg'}}
+        }
+
+    def comment(self, comment_id, video_id, index, minutes, parent_id=None):
+        author = int(hashlib.sha1(f'{video_id}/{index}'.encode()).hexdigest(), 16) % self.authors
+        snippet = {
+            'videoId': video_id,
+            'authorDisplayName': f'@user{author}',
+            'authorChannelId': {'value': make_id('UC', 'author', author, length=22)},
+            'textDisplay': SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)],
+            'textOriginal': SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)],
+            'publishedAt': timestamp(minutes),
+            'updatedAt': timestamp(minutes)
+        }
+        if parent_id:
+            snippet['parentId'] = parent_id
+        return {'kind': 'youtube#comment', 'id': comment_id, 'snippet': snippet}
+
+    def list_search(self, params):
+        if params.get('type') == 'channel':
+            def make_item(i):
+                channel_id = self.channel_id(f"{params.get('q')}/{i}")
+                return {'id': {'kind': 'youtube#channel', 'channelId': channel_id},
+                        'snippet': {'channelId': channel_id, 'title': f"{params.get('q')} {i}"}}
+        else:
+            seed = params.get('channelId') or params.get('q', '')
+            channel_id = params.get('channelId') or self.channel_id(seed)
+
+            def make_item(i):
+                video_id = make_id('', 'video', seed, i)
+                return {'id': {'kind': 'youtube#video', 'videoId': video_id},
+                        'snippet': self.video_snippet(video_id, channel_id, -i)}
+        return self.page(params, 500, make_item)
+
+    def list_videos(self, params):
+        ids = [video_id for video_id in params.get('id', '').split(',') if video_id]
+        return {'items': [{'id': video_id, 'snippet': self.video_snippet(video_id, self.channel_id(video_id), 0)}
+                          for video_id in ids]}
+
+    def list_channels(self, params):
+        if params.get('forHandle') or params.get('forUsername'):
+            ids = [self.channel_id(params.get('forHandle') or params.get('forUsername'))]
+        else:
+            ids = [channel_id for channel_id in params.get('id', '').split(',') if channel_id]
+        return {'items': [{
+            'id': channel_id,
+            'snippet': {'title': f'Channel {channel_id[-6:]}', 'customUrl': f'@{channel_id[-6:].lower()}'},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + channel_id[2:]}}
+        } for channel_id in ids]}
+
+    def list_playlistItems(self, params):
+        playlist_id = params.get('playlistId', '')
+        channel_id = 'UC' + playlist_id[2:]
+
+        def make_item(i):
+            video_id = make_id('', 'video', channel_id, i)
+            return {'snippet': self.video_snippet(video_id, channel_id, -i),
+                    'contentDetails': {'videoId': video_id, 'videoPublishedAt': timestamp(-i)}}
+        return self.page(params, self.videos_per_channel, make_item)
+
+    def list_commentThreads(self, params):
+        video_id = params.get('videoId', '')
+        with_replies = 'replies' in params.get('part', '')
+
+        def make_item(i):
+            thread_id = make_id('Ug', 'thread', video_id, i, length=24)
+            # Newest first, like order='time'
+            minutes = self.comments_per_video - i
+            item = {
+                'kind': 'youtube#commentThread',
+                'id': thread_id,
+                'snippet': {
+                    'videoId': video_id,
+                    'topLevelComment': self.comment(thread_id, video_id, i, minutes),
+                    'totalReplyCount': self.replies_per_thread
+                }
+            }
+            if with_replies and self.replies_per_thread:
+                item['replies'] = {'comments': [
+                    self.comment(f'{thread_id}.{r}', video_id, i + r + 1, minutes, thread_id)
+                    for r in range(min(INLINE_REPLIES, self.replies_per_thread))
+                ]}
+            return item
+        return self.page(params, self.comments_per_video, make_item, default_size=20, max_size=100)
+
+    def list_comments(self, params):
+        parent_id = params.get('parentId', '')
+
+        def make_item(r):
+            return self.comment(f'{parent_id}.{r}', '', r + 1, 0, parent_id)
+        return self.page(params, self.replies_per_thread, make_item, default_size=20, max_size=100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic YouTube Data API v3 for load testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many extra random seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests failing with 503")
+    parser.add_argument('--comments-per-video', type=int, default=200)
+    parser.add_argument('--replies-per-thread', type=int, default=0)
+    parser.add_argument('--videos-per-channel', type=int, default=200)
+    parser.add_argument('--authors', type=int, default=50)
+    args = parser.parse_args()
+
+    server = FakeYouTubeServer(args.host, args.port, args.latency, args.jitter, args.error_rate,
+                               args.comments_per_video, args.replies_per_thread, args.videos_per_channel, args.authors)
+    print(f"Fake YouTube Data API listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
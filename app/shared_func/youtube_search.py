@@ -1,14 +1,50 @@
-from shared_func.googleapiclient_func import connect_to_youtube
+import copy
+from urllib.parse import urlparse
+from shared_func.googleapiclient_func import (
+    connect_to_youtube, execute_request, resolve_channel, iter_playlist_items
+)
+from shared_func.cache_func import TTLCache
 import config
 
-def search_youtube(query, max_results=config.search_limit, order_by_date=True):
+# Search results keyed by (query, channel_id, order, max_results): a repeated search costs no quota
+search_cache = TTLCache(config.search_cache_size, config.search_cache_ttl)
+
+def format_video(video_id, snippet, published_at=None):
+    """Convert an API snippet to the video format expected by the app."""
+    return {
+        'id': video_id,
+        'title': snippet['title'],
+        'link': f"https://www.youtube.com/watch?v={video_id}",
+        'channel': {
+            'name': snippet.get('videoOwnerChannelTitle', snippet['channelTitle']),
+            'id': snippet.get('videoOwnerChannelId', snippet['channelId'])
+        },
+        'publishedTime': published_at or snippet['publishedAt'],
+        'thumbnails': snippet['thumbnails']
+    }
+
+def cached_search(query, max_results=config.search_limit, order_by_date=True):
+    """The cached search_youtube results for these arguments, or None when a search would call the API."""
+    cached = search_cache.get((query, None, 'date' if order_by_date else 'relevance', max_results))
+    return None if cached is None else copy.deepcopy(cached)
+
+def search_youtube(query, max_results=config.search_limit, order_by_date=True, use_cache=True):
     """
     Search YouTube for videos using YouTube Data API v3.
+
+    Results are cached for config.search_cache_ttl seconds; pass
+    use_cache=False to force a fresh search (the result is still cached).
     """
-    youtube = connect_to_youtube()
-    
     order = 'date' if order_by_date else 'relevance'
-    
+
+    cache_key = (query, None, order, max_results)
+    if use_cache:
+        cached = cached_search(query, max_results, order_by_date)
+        if cached is not None:
+            return cached
+
+    youtube = connect_to_youtube()
+
     request = youtube.search().list(
         part="snippet",
         q=query,
@@ -16,82 +52,106 @@ def search_youtube(query, max_results=config.search_limit, order_by_date=True):
         order=order,
         maxResults=max_results
     )
-    
-    response = request.execute()
-    
+
+    response = execute_request(request, 'search.list')
+
     # Convert to format expected by the app
-    results = []
-    for item in response['items']:
-        result = {
-            'id': item['id']['videoId'],
-            'title': item['snippet']['title'],
-            'link': f"https://www.youtube.com/watch?v={item['id']['videoId']}",
-            'channel': {
-                'name': item['snippet']['channelTitle'],
-                'id': item['snippet']['channelId']
-            },
-            'publishedTime': item['snippet']['publishedAt'],
-            'thumbnails': item['snippet']['thumbnails']
-        }
-        results.append(result)
-    
+    results = [format_video(item['id']['videoId'], item['snippet']) for item in response['items']]
+
+    search_cache.set(cache_key, copy.deepcopy(results))
     return results
 
-def search_by_channel(channel_url, max_results=config.search_limit, order_by_date=True):
+def search_by_channel(channel_url, max_results=config.search_limit, order_by_date=True, use_cache=True):
     """
-    Search YouTube for videos within a specific channel using YouTube Data API v3.
+    List the videos of a channel given its URL (/channel/, /@handle, /user/ or /c/).
+
+    Newest-first listings walk the channel's uploads playlist, which costs
+    1 quota unit per 50 videos instead of 100 units per search().list page.
+    order_by_date=False needs relevance ranking, which only search().list
+    provides. Handles and legacy names are resolved to a channel id once,
+    through the channel cache. Cached like search_youtube; use_cache=False
+    forces a fresh listing.
     """
-    youtube = connect_to_youtube()
-    
-    # Extract channel ID from URL
-    channel_id = get_channel_id_from_url(channel_url)
-    if not channel_id:
+    kind, value = parse_channel_url(channel_url)
+    if not value:
         raise ValueError("Invalid channel URL")
-    
+
+    channel = resolve_channel(kind, value)
+    if channel is None:
+        raise ValueError(f"Channel not found: {value}")
+    channel_id = channel['id']
+
     order = 'date' if order_by_date else 'relevance'
-    
-    request = youtube.search().list(
-        part="snippet",
-        channelId=channel_id,
-        type="video",
-        order=order,
-        maxResults=max_results
-    )
-    
-    response = request.execute()
-    
-    # Convert to format expected by the app
-    results = []
-    for item in response['items']:
-        result = {
-            'id': item['id']['videoId'],
-            'title': item['snippet']['title'],
-            'link': f"https://www.youtube.com/watch?v={item['id']['videoId']}",
-            'channel': {
-                'name': item['snippet']['channelTitle'],
-                'id': item['snippet']['channelId']
-            },
-            'publishedTime': item['snippet']['publishedAt'],
-            'thumbnails': item['snippet']['thumbnails']
-        }
-        results.append(result)
-    
+
+    cache_key = (None, channel_id, order, max_results)
+    if use_cache:
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+    if order_by_date:
+        # Every channel's uploads playlist id is its channel id with the UC prefix replaced by UU
+        playlist_id = channel.get('uploads_playlist') or 'UU' + channel_id[2:]
+        results = [
+            format_video(item['contentDetails']['videoId'], item['snippet'], item['contentDetails']['videoPublishedAt'])
+            for item in iter_playlist_items(playlist_id, max_results)
+        ]
+    else:
+        youtube = connect_to_youtube()
+        request = youtube.search().list(
+            part="snippet",
+            channelId=channel_id,
+            type="video",
+            order=order,
+            maxResults=max_results
+        )
+        response = execute_request(request, 'search.list')
+        results = [format_video(item['id']['videoId'], item['snippet']) for item in response['items']]
+
+    search_cache.set(cache_key, copy.deepcopy(results))
     return results
 
-def get_channel_id_from_url(channel_url):
-    """Extract channel ID from YouTube channel URL."""
-    from urllib.parse import urlparse
-    
+def get_videos(video_ids):
+    """
+    Look up specific videos (50 ids per videos().list call, 1 quota unit each)
+    and return them in the same format as search_youtube, in the given order.
+    """
+    youtube = connect_to_youtube()
+    unique_ids = list(dict.fromkeys(video_ids))
+
+    items = {}
+    for i in range(0, len(unique_ids), 50):
+        request = youtube.videos().list(
+            part="snippet",
+            id=','.join(unique_ids[i:i + 50]),
+            maxResults=50
+        )
+        response = execute_request(request, 'videos.list')
+        for item in response['items']:
+            items[item['id']] = item
+
+    return [format_video(video_id, items[video_id]['snippet']) for video_id in unique_ids if video_id in items]
+
+def parse_channel_url(channel_url):
+    """
+    Split a YouTube channel URL into (kind, value), where kind is 'id',
+    'handle', 'user' or 'custom' (see resolve_channel). Returns (None, None)
+    for anything else.
+    """
     parsed_url = urlparse(channel_url)
     if 'youtube.com' in parsed_url.netloc:
-        path = parsed_url.path
-        if '/channel/' in path:
-            return path.split('/channel/')[-1]
-        elif '/c/' in path:
-            return path.split('/c/')[-1]
-        elif '/user/' in path:
-            return path.split('/user/')[-1]
-        elif '/@' in path:
-            return path.split('/@')[-1]
-    
-    return None
+        segments = [segment for segment in parsed_url.path.split('/') if segment]
+        if len(segments) >= 2 and segments[0] == 'channel':
+            return 'id', segments[1]
+        elif len(segments) >= 2 and segments[0] == 'c':
+            return 'custom', segments[1]
+        elif len(segments) >= 2 and segments[0] == 'user':
+            return 'user', segments[1]
+        elif segments and segments[0].startswith('@'):
+            return 'handle', segments[0][1:]
+
+    return None, None
+
+def get_channel_id_from_url(channel_url):
+    """Extract the channel id, handle or legacy name from a YouTube channel URL."""
+    return parse_channel_url(channel_url)[1]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Measure throughput and latency of the extract_data ingestion path against
+the local fake YouTube Data API, spending no quota.
+
+Translation and sentiment run through AWS in production; by default they are
+replaced with no-ops so only the YouTube side is measured (--with-aws keeps them).
+
+Usage: LOCAL_MODE=true python benchmarks/bench_ingestion.py [--videos 10] [--comments 500]
+           [--latency 0.05] [--concurrency 1 4 8] [--replies 0]
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import config
+from shared_func import main_func
+from shared_func.googleapiclient_func import reset_youtube_clients
+from shared_func.quota_func import quota_ledger
+from shared_func.resilience_func import retry_metrics
+from shared_func.youtube_fake_server import FakeYouTubeServer
+
+def run(args, concurrency, server):
+    server.requests.clear()
+    retry_metrics.clear()
+    latencies = []
+    # process_video prints every video it starts; keep the table readable
+    with quota_ledger.run('bench') as usage, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        rows = 0
+        for _, _, _, df in main_func.iter_extract_data(f"bench {concurrency}", args.videos, args.comments,
+                                                        max_concurrency=concurrency, use_cache=False,
+                                                        include_replies=args.replies > 0):
+            latencies.append(time.perf_counter() - start)
+            rows += 0 if df is None else len(df)
+        elapsed = time.perf_counter() - start
+    return elapsed, rows, latencies, usage.units, sum(server.requests.values()), retry_metrics.total('retries')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--videos', type=int, default=10)
+    parser.add_argument('--comments', type=int, default=500, help="comment threads per video")
+    parser.add_argument('--replies', type=int, default=0, help="replies per thread (enables reply ingestion)")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per fake API response")
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--with-aws', action='store_true', help="keep the real translation and sentiment calls")
+    args = parser.parse_args()
+
+    if not args.with_aws:
+        main_func.detect_languages = lambda texts: ['en'] * len(texts)
+        main_func.translate_texts = lambda texts, **kwargs: list(texts)
+        main_func.score_batch = lambda texts, backend=None: [0.0] * len(texts)
+
+    server = FakeYouTubeServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                               comments_per_video=args.comments, replies_per_thread=args.replies)
+    with server:
+        config.youtube_api_url = server.url
+        config.youtube_daily_quota = quota_ledger.daily_limit = 10 ** 9
+        reset_youtube_clients()
+
+        print(f"{args.videos} videos x {args.comments} threads, {args.latency * 1000:.0f} ms per API call")
+        print(f"{'workers':>7} | {'seconds':>8} | {'rows':>7} | {'rows/s':>8} | {'first video s':>13} | {'API calls':>9} | {'quota':>6} | {'retries':>7}")
+        print("-" * 86)
+        for concurrency in args.concurrency:
+            elapsed, rows, latencies, units, calls, retries = run(args, concurrency, server)
+            first = latencies[0] if latencies else float('nan')
+            print(f"{concurrency:>7} | {elapsed:>8.2f} | {rows:>7} | {rows / elapsed:>8.0f} | {first:>13.2f} | {calls:>9} | {units:>6} | {retries:>7}")
+
+if __name__ == "__main__":
+    main()
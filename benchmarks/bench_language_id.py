@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Measure how well the local language pre-filter (translate_func.guess_language)
+stands in for Comprehend on a labelled sample of comment-like texts.
+
+Only texts identified locally as one of LOCALLY_TRUSTED_LANGUAGES skip
+Comprehend and translation, so the numbers that matter are the precision of
+those skips (a wrong skip leaves a comment untranslated) and the share of
+Comprehend calls saved. No AWS calls are made.
+
+Usage: LOCAL_MODE=true python benchmarks/bench_language_id.py [--repeat 2000]
+"""
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from shared_func.translate_func import guess_language, LOCALLY_TRUSTED_LANGUAGES
+
+SAMPLES = [
+    ('en', "This video explains everything clearly, thanks for sharing"),
+    ('en', "I completely disagree with what was said here"),
+    ('en', "Someone should report this channel, it spreads lies"),
+    ('en', "Great work, keep it up!"),
+    ('en', "I don't think that is what he meant at all"),
+    ('en', "Who else is watching this in 2025?"),
+    ('en', "They are lying to you and you know it"),
+    ('en', "This is the best explanation I have seen on the topic"),
+    ('en', "What a joke, the media will never tell the truth"),
+    ('en', "lol"),
+    ('en', "First!"),
+    ('en', "Can you make a video about the elections in Brazil?"),
+    ('en', "Thank you for the video, it was very helpful"),
+    ('en', "Fake news"),
+    ('pt', "Esse vídeo é muito bom, parabéns pelo conteúdo"),
+    ('pt', "Não concordo com nada do que ele disse"),
+    ('pt', "Isso é uma vergonha para o Brasil"),
+    ('pt', "Quem está assistindo em 2025?"),
+    ('pt', "O que ele falou não faz sentido"),
+    ('pt', "kkkkkkk"),
+    ('es', "No estoy de acuerdo con esta información"),
+    ('es', "El gobierno no dice la verdad"),
+    ('es', "Qué buen video, muchas gracias"),
+    ('fr', "Ce reportage est totalement faux"),
+    ('fr', "Je ne suis pas d'accord avec ce qu'il dit"),
+    ('de', "Das ist eine interessante Perspektive"),
+    ('de', "Ich bin nicht der Meinung, dass es so ist"),
+    ('it', "Non sono d'accordo con quello che dice"),
+    ('ru', "Это очень хорошее видео и я согласен"),
+    ('ja', "この動画はとても面白いです"),
+    ('ar', "هذا الفيديو رائع جدا"),
+    ('pt', "the video is bom demais, parabéns"),
+    ('es', "the best canal de todo YouTube, saludos"),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help="passes over the sample for the throughput figure")
+    args = parser.parse_args()
+
+    outcomes = Counter()
+    for language, text in SAMPLES:
+        guess = guess_language(text)
+        skipped = guess in LOCALLY_TRUSTED_LANGUAGES
+        outcomes['skipped'] += skipped
+        outcomes['correct skips'] += skipped and guess == language
+        outcomes['trusted total'] += language in LOCALLY_TRUSTED_LANGUAGES
+        outcomes['guessed'] += guess is not None
+        outcomes['correct guesses'] += guess == language
+        if guess is not None and guess != language:
+            print(f"  wrong guess {guess!r} for {language!r}: {text}")
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for _, text in SAMPLES:
+            guess_language(text)
+    elapsed = time.perf_counter() - start
+
+    total = len(SAMPLES)
+    print(f"{total} labelled texts, trusted locally: {sorted(LOCALLY_TRUSTED_LANGUAGES)}")
+    print(f"Comprehend calls saved : {outcomes['skipped']}/{total} ({outcomes['skipped'] / total:.0%})")
+    print(f"Skip precision         : {outcomes['correct skips']}/{outcomes['skipped']}")
+    print(f"Trusted-language recall: {outcomes['correct skips']}/{outcomes['trusted total']}")
+    print(f"All guesses            : {outcomes['correct guesses']}/{outcomes['guessed']} correct, "
+          f"{total - outcomes['guessed']} left to Comprehend")
+    print(f"Throughput             : {args.repeat * total / elapsed:,.0f} texts/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Compare the per-comment pd.concat accumulation formerly used by extract_data
+with RowBuilder, reporting runtime and peak traced memory.
+
+Usage: python benchmarks/bench_row_builder.py [--sizes 1000 10000 100000] [--concat-max 10000]
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import pandas as pd
+from shared_func.row_builder import RowBuilder
+
+COLUMNS = ["title", "link", "person", "user_channel", "comment", "translated", "comment_id", "published_at"]
+
+def make_row(i):
+    return {
+        "title": f"video {i % 20}",
+        "link": f"https://www.youtube.com/watch?v=vid{i % 20:08d}",
+        "person": f"@user{i}",
+        "user_channel": f"https://www.youtube.com/channel/UC{i:022d}",
+        "comment": f"this is comment number {i} with a few words of text",
+        "translated": f"this is comment number {i} with a few words of text",
+        "comment_id": f"Ug{i:024d}",
+        "published_at": "2025-01-01T00:00:00Z"
+    }
+
+def concat_rows(n):
+    """The previous approach: one single-row DataFrame concatenated per comment"""
+    df = pd.DataFrame(columns=COLUMNS)
+    for i in range(n):
+        tmp = pd.DataFrame({column: [value] for column, value in make_row(i).items()})
+        df = pd.concat([tmp, df])
+    return df
+
+def build_rows(n):
+    rows = RowBuilder(COLUMNS)
+    for i in range(n):
+        rows.append(make_row(i))
+    return rows.to_frame()
+
+def measure(func, n):
+    # Timed and traced separately: tracemalloc slows allocation-heavy code a lot
+    start = time.perf_counter()
+    df = func(n)
+    elapsed = time.perf_counter() - start
+    assert len(df) == n
+
+    tracemalloc.start()
+    func(n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--concat-max', type=int, default=10000,
+                        help="skip the quadratic pd.concat approach above this many rows")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} | {'method':<10} | {'seconds':>9} | {'peak MiB':>9}")
+    print("-" * 46)
+    for n in args.sizes:
+        for name, func in (("pd.concat", concat_rows), ("RowBuilder", build_rows)):
+            if func is concat_rows and n > args.concat_max:
+                print(f"{n:>8} | {name:<10} | {'skipped':>9} | {'':>9}")
+                continue
+            elapsed, peak = measure(func, n)
+            print(f"{n:>8} | {name:<10} | {elapsed:>9.3f} | {peak:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Compare the sentiment backends of shared_func.sentiment_func: throughput,
+p50/p99 latency per batch, and how often each backend agrees with the others
+on negative / neutral / positive.
+
+By default the remote backends are replaced by local stand-ins that answer
+after --latency seconds per request with labels derived from the lexicon, so
+the harness measures batching and concurrency without credentials or cost;
+agreement then reflects each backend's score mapping. --real calls the actual
+services (and loads the real transformer), which gives meaningful agreement
+figures. The sentiment cache is disabled unless --cache is given.
+
+Usage: LOCAL_MODE=true python benchmarks/bench_sentiment.py [--texts 2000] [--batch-size 100]
+           [--latency 0.05] [--backends lexicon comprehend bedrock] [--real]
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import contextlib
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import numpy as np
+from shared_func import sentiment_func, sentiment_cache_func, comprehend_func, bedrock_func, openai_func, local_sentiment_func
+from shared_func.cache_func import TTLCache, TieredCache
+from shared_func.local_sentiment_func import lexicon_sentiment
+
+SAMPLE_TEXTS = [
+    "This video explains everything clearly, thanks for sharing",
+    "I completely disagree with what was said here",
+    "Someone should report this channel, it spreads lies",
+    "Great work, keep it up!",
+    "The minister spoke about the budget on Tuesday",
+    "This is not good at all, very disappointing",
+    "What a joke, these corrupt liars will never tell the truth",
+    "Not bad, but the audio could be better",
+    "I love this channel, best content on the topic",
+    "They should all be killed",
+    "Who else is watching in 2025?",
+    "Nobody cares about this nonsense",
+    "Congratulations on the award, well deserved",
+    "The video was uploaded yesterday",
+    "Stop the violence, we need peace",
+    "Honestly kind of boring",
+]
+
+def label(score):
+    """Comprehend-style label of a 0-1 score."""
+    return 'POSITIVE' if score > 0.6 else 'NEGATIVE' if score < 0.4 else 'NEUTRAL'
+
+class FakeComprehend:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def batch_detect_sentiment(self, TextList, LanguageCode):
+        time.sleep(self.latency)
+        return {'ResultList': [
+            {'Index': i, 'Sentiment': label(lexicon_sentiment(text)),
+             'SentimentScore': {'Positive': lexicon_sentiment(text)}}
+            for i, text in enumerate(TextList)
+        ], 'ErrorList': []}
+
+class FakeBedrock:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def invoke_model(self, modelId, body):
+        time.sleep(self.latency)
+        text = json.loads(body)['prompt'].split('Text: ')[-1].split('\n')[0]
+        generation = f"{round(lexicon_sentiment(text), 1)}"
+        return {'body': io.BytesIO(json.dumps({'generation': generation}).encode())}
+
+class FakeOpenAI:
+    def __init__(self, latency):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.latency = latency
+
+    def create(self, model, temperature, messages):
+        time.sleep(self.latency)
+        content = f"{round(lexicon_sentiment(messages[-1]['content']), 2)}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+def fake_pipeline(latency):
+    def classify(texts, batch_size, truncation):
+        results = []
+        for start in range(0, len(texts), batch_size):
+            time.sleep(latency)  # one forward pass
+            for text in texts[start:start + batch_size]:
+                score = lexicon_sentiment(text)
+                results.append({'label': 'POSITIVE' if score >= 0.5 else 'NEGATIVE', 'score': max(score, 1 - score)})
+        return results
+    return classify
+
+def use_stand_ins(latency):
+    comprehend, bedrock, openai = FakeComprehend(latency), FakeBedrock(latency), FakeOpenAI(latency)
+    comprehend_func.get_comprehend_client = lambda: comprehend
+    bedrock_func.get_bedrock_client = lambda: bedrock
+    openai_func.get_openai_client = lambda: openai
+    local_sentiment_func.get_transformer_pipeline = lambda: fake_pipeline(latency)
+
+def run(backend, texts, batch_size):
+    latencies, scores = [], []
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        batch_start = time.perf_counter()
+        scores.append(sentiment_func.score_batch(texts[offset:offset + batch_size], backend))
+        latencies.append(time.perf_counter() - batch_start)
+    return time.perf_counter() - start, np.array(latencies), np.concatenate(scores)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=100, help="texts per score_batch call")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per stand-in request")
+    parser.add_argument('--backends', nargs='+', default=sentiment_func.available_backends())
+    parser.add_argument('--real', action='store_true', help="call the real services instead of stand-ins")
+    parser.add_argument('--cache', action='store_true', help="keep the sentiment cache")
+    args = parser.parse_args()
+
+    if not args.real:
+        use_stand_ins(args.latency)
+    if not args.cache:
+        sentiment_cache_func.sentiment_cache = TieredCache(TTLCache(maxsize=0))
+
+    # Distinct texts, so neither deduplication nor caching hides work
+    texts = [f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} #{i}" for i in range(args.texts)]
+
+    print(f"{args.texts} texts, {args.batch_size} per batch, "
+          f"{'real services' if args.real else f'stand-ins at {args.latency * 1000:.0f} ms per request'}")
+    print(f"{'backend':>12} | {'seconds':>8} | {'texts/s':>9} | {'p50 ms':>8} | {'p99 ms':>8}")
+    print("-" * 58)
+    results = {}
+    for backend in args.backends:
+        try:
+            # The backends print their own per-text errors
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed, latencies, scores = run(backend, texts, args.batch_size)
+        except Exception as e:
+            print(f"{backend:>12} | unavailable: {e}")
+            continue
+        results[backend] = scores
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(f"{backend:>12} | {elapsed:>8.2f} | {len(texts) / elapsed:>9,.0f} | {p50:>8.1f} | {p99:>8.1f}")
+
+    if len(results) > 1:
+        print("\nAgreement on negative (< 0.4) / neutral / positive (> 0.6):")
+        names = list(results)
+        buckets = {name: np.digitize(scores, [0.4, 0.6 + 1e-9]) for name, scores in results.items()}
+        print(f"{'':>12} | " + " | ".join(f"{name:>12}" for name in names))
+        for first in names:
+            row = [np.mean(buckets[first] == buckets[second]) for second in names]
+            print(f"{first:>12} | " + " | ".join(f"{value:>12.0%}" for value in row))
+
+if __name__ == "__main__":
+    main()
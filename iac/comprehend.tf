@@ -9,6 +9,7 @@ resource "aws_iam_policy" "osintube_comprehend_policy" {
         Effect = "Allow"
         Action = [
           "comprehend:DetectSentiment",
+          "comprehend:BatchDetectSentiment",
           "comprehend:DetectEntities",
           "comprehend:DetectKeyPhrases"
         ]
@@ -124,7 +124,8 @@ resource "aws_iam_policy" "osintube_translate_policy" {
         Effect = "Allow"
         Action = [
           "translate:TranslateText",
-          "comprehend:DetectDominantLanguage"
+          "comprehend:DetectDominantLanguage",
+          "comprehend:BatchDetectDominantLanguage"
         ]
         Resource = "*"
       }
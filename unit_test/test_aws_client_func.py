@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import config
+from shared_func import aws_client_func
+from shared_func.aws_client_func import get_client, reset_clients
+
+
+class TestAwsClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        reset_clients()
+        self.addCleanup(reset_clients)
+
+    def test_one_client_per_service_and_region(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(executor.map(lambda _: get_client('comprehend'), range(32)))
+
+        self.assertEqual(len(set(map(id, clients))), 1)
+        self.assertIsNot(get_client('comprehend'), get_client('translate'))
+        self.assertIsNot(get_client('comprehend'), get_client('comprehend', 'eu-west-1'))
+        self.assertEqual(len(aws_client_func._clients), 3)
+
+    def test_clients_use_the_tuned_config(self):
+        client_config = get_client('translate').meta.config
+
+        self.assertEqual(client_config.max_pool_connections, config.aws_max_pool_connections)
+        self.assertTrue(client_config.tcp_keepalive)
+        self.assertEqual(client_config.read_timeout, config.aws_read_timeout)
+        self.assertEqual(get_client('translate').meta.region_name, config.aws_region)
+
+    def test_reset_creates_new_clients(self):
+        first = get_client('s3')
+        reset_clients()
+
+        self.assertIsNot(get_client('s3'), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import time
+import tempfile
+import unittest
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from shared_func.cache_func import TTLCache, SqliteCache, TieredCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 1})
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=10, ttl=0.05)
+        cache.set('a', 1)
+        time.sleep(0.06)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+
+class TestSqliteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'nested', 'cache.sqlite')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_values_survive_new_instance(self):
+        SqliteCache(self.path, ttl=60).set('UC1', {'title': 'Alice'})
+
+        self.assertEqual(SqliteCache(self.path, ttl=60).get('UC1'), {'title': 'Alice'})
+
+    def test_expired_rows_are_misses(self):
+        cache = SqliteCache(self.path, ttl=60)
+        cache.set('UC1', {'title': 'Alice'}, ttl=-1)
+
+        self.assertIsNone(cache.get('UC1'))
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_size_bound_evicts_oldest_entries(self):
+        cache = SqliteCache(self.path, ttl=60, max_entries=10, evict_every=5)
+        for i in range(30):
+            cache.set(f'k{i}', i)
+            time.sleep(0.001)
+
+        self.assertEqual(len(cache), 10)
+        self.assertIsNone(cache.get('k0'))
+        self.assertEqual(cache.get('k29'), 29)
+        self.assertEqual(cache.stats()['evictions'], 20)
+
+    def test_set_many(self):
+        cache = SqliteCache(self.path, ttl=60)
+        cache.set_many({'a': 1, 'b': [2]})
+
+        self.assertEqual(cache.get('b'), [2])
+        self.assertEqual(len(cache), 2)
+
+class TestTieredCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_persistent_hits_are_promoted(self):
+        SqliteCache(self.path).set('UC1', {'title': 'Alice'})
+        cache = TieredCache(TTLCache(), SqliteCache(self.path))
+
+        self.assertEqual(cache.get('UC1'), {'title': 'Alice'})
+        self.assertEqual(cache.memory.get('UC1'), {'title': 'Alice'})
+
+    def test_get_many_and_stats(self):
+        cache = TieredCache(TTLCache(), SqliteCache(self.path))
+        cache.set('UC1', {'title': 'Alice'})
+
+        found = cache.get_many(['UC1', 'UC2'])
+        stats = cache.stats()
+
+        self.assertEqual(found, {'UC1': {'title': 'Alice'}})
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import threading
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import numpy as np
+from shared_func import comprehend_func, bedrock_func, sentiment_cache_func
+from shared_func.cache_func import TTLCache, TieredCache
+
+
+def make_comprehend(sentiment_of):
+    """Fake Comprehend client answering batch_detect_sentiment with `sentiment_of(text)` -> (label, positive)"""
+    comprehend = MagicMock()
+    threads = set()
+
+    def batch_detect(TextList, LanguageCode):
+        threads.add(threading.get_ident())
+        results = []
+        for i, text in enumerate(TextList):
+            label, positive = sentiment_of(text)
+            results.append({'Index': i, 'Sentiment': label, 'SentimentScore': {'Positive': positive}})
+        return {'ResultList': results, 'ErrorList': []}
+
+    comprehend.batch_detect_sentiment.side_effect = batch_detect
+    comprehend.threads = threads
+    return comprehend
+
+
+class TestSentimentScores(unittest.TestCase):
+
+    def test_matches_the_single_text_mapping(self):
+        scores = comprehend_func.sentiment_scores(
+            ['POSITIVE', 'NEGATIVE', 'NEUTRAL', 'MIXED', ''], [0.9, 0.1, 0.2, 0.5, 0.0]
+        )
+
+        np.testing.assert_allclose(scores, [0.9, 0.0, 0.5, 0.35, 0.5])
+
+
+class TestSentimentAnalysisBatch(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(sentiment_cache_func, 'sentiment_cache', TieredCache(TTLCache()))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def score(self, comprehend, texts, **kwargs):
+        with patch.object(comprehend_func, 'get_comprehend_client', return_value=comprehend):
+            return comprehend_func.sentiment_analysis_batch(texts, **kwargs)
+
+    def test_batches_of_twenty_five_sent_concurrently(self):
+        comprehend = make_comprehend(lambda text: ('POSITIVE', 0.8) if 'good' in text else ('NEGATIVE', 0.1))
+        texts = [f'good {i}' if i % 2 else f'bad {i}' for i in range(60)]
+
+        scores = self.score(comprehend, texts, max_workers=3)
+
+        sizes = [len(call.kwargs['TextList']) for call in comprehend.batch_detect_sentiment.call_args_list]
+        self.assertEqual(sorted(sizes), [10, 25, 25])
+        np.testing.assert_allclose(scores, [0.8 if i % 2 else 0.0 for i in range(60)])
+        comprehend.detect_sentiment.assert_not_called()
+
+    def test_empty_texts_are_neutral_and_not_sent(self):
+        comprehend = make_comprehend(lambda text: ('POSITIVE', 1.0))
+
+        scores = self.score(comprehend, [None, '', 'great', ['token', 'list']])
+
+        self.assertEqual(comprehend.batch_detect_sentiment.call_args.kwargs['TextList'], ['great', 'token list'])
+        np.testing.assert_allclose(scores, [0.5, 0.5, 1.0, 1.0])
+
+    def test_failed_documents_are_neutral(self):
+        comprehend = MagicMock()
+        comprehend.batch_detect_sentiment.return_value = {
+            'ResultList': [{'Index': 1, 'Sentiment': 'POSITIVE', 'SentimentScore': {'Positive': 0.9}}],
+            'ErrorList': [{'Index': 0, 'ErrorCode': 'INTERNAL_SERVER_ERROR', 'ErrorMessage': 'boom'}]
+        }
+
+        scores = self.score(comprehend, ['this one fails', 'this one works'])
+
+        np.testing.assert_allclose(scores, [0.5, 0.9])
+
+    def test_failed_batches_fall_back_to_single_documents(self):
+        comprehend = MagicMock()
+        comprehend.batch_detect_sentiment.side_effect = RuntimeError("AccessDeniedException")
+        comprehend.detect_sentiment.return_value = {'Sentiment': 'POSITIVE', 'SentimentScore': {'Positive': 0.9}}
+
+        with self.assertLogs(comprehend_func.logger, level='ERROR'):
+            scores = self.score(comprehend, ['a', 'b'])
+
+        np.testing.assert_allclose(scores, [0.9, 0.9])
+        self.assertEqual(comprehend.detect_sentiment.call_count, 2)
+
+    def test_failed_batches_and_documents_are_neutral(self):
+        comprehend = MagicMock()
+        comprehend.batch_detect_sentiment.side_effect = RuntimeError("throttled")
+        comprehend.detect_sentiment.side_effect = RuntimeError("throttled")
+
+        np.testing.assert_allclose(self.score(comprehend, ['a', 'b']), [0.5, 0.5])
+
+    def test_cached_and_normalized_duplicates_are_not_sent(self):
+        comprehend = make_comprehend(lambda text: ('POSITIVE', 0.8))
+        self.score(comprehend, ['Great video', 'great   VIDEO', 'thanks'])
+        scores = self.score(comprehend, ['GREAT video', 'thanks', 'new one'])
+
+        sent = [call.kwargs['TextList'] for call in comprehend.batch_detect_sentiment.call_args_list]
+        self.assertEqual(sent, [['Great video', 'thanks'], ['new one']])
+        np.testing.assert_allclose(scores, [0.8, 0.8, 0.8])
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_failures_are_not_cached(self):
+        comprehend = MagicMock()
+        comprehend.batch_detect_sentiment.side_effect = RuntimeError("throttled")
+        comprehend.detect_sentiment.side_effect = RuntimeError("throttled")
+        self.score(comprehend, ['a comment'])
+
+        self.assertEqual(len(self.cache.memory), 0)
+
+
+class TestSentimentCache(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(sentiment_cache_func, 'sentiment_cache', TieredCache(TTLCache()))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_key_includes_backend_and_version(self):
+        key = sentiment_cache_func.sentiment_key
+        self.assertEqual(key('comprehend', '1', ' Great\nvideo '), key('comprehend', '1', 'great video'))
+        self.assertNotEqual(key('comprehend', '1', 'great video'), key('bedrock', '1', 'great video'))
+        self.assertNotEqual(key('comprehend', '1', 'great video'), key('comprehend', '2', 'great video'))
+
+    def test_single_text_backends_are_memoized(self):
+        comprehend = MagicMock()
+        comprehend.detect_sentiment.return_value = {'Sentiment': 'POSITIVE', 'SentimentScore': {'Positive': 0.9}}
+        bedrock = MagicMock()
+        bedrock.invoke_model.return_value = {'body': MagicMock(read=MagicMock(return_value=b'{"generation": "0.3"}'))}
+
+        with patch.object(comprehend_func, 'get_comprehend_client', return_value=comprehend), \
+             patch.object(bedrock_func, 'get_bedrock_client', return_value=bedrock):
+            for _ in range(3):
+                self.assertEqual(comprehend_func.sentiment_analysis('I love it'), 0.9)
+                self.assertEqual(bedrock_func.sentiment_analysis('I love it'), 0.3)
+
+        self.assertEqual(comprehend.detect_sentiment.call_count, 1)
+        self.assertEqual(bedrock.invoke_model.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
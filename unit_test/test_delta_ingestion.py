@@ -0,0 +1,149 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import pandas as pd
+from shared_func import main_func
+from shared_func import dynamodb_func
+
+
+def make_rows(link, comments):
+    return pd.DataFrame([{
+        'sentiment_score': 0.5, 'comment': text, 'title': 't', 'person': 'p', 'user_channel': 'c',
+        'link': link, 'translated': text, 'normalized': [text],
+        'comment_id': comment_id, 'published_at': published_at
+    } for comment_id, published_at, text in comments], columns=main_func.COLUMNS)
+
+
+class TestWatermarks(unittest.TestCase):
+
+    def test_latest_comment_per_video(self):
+        df = pd.concat([
+            make_rows('https://www.youtube.com/watch?v=vid1', [
+                ('c1', '2025-01-01T00:00:00Z', 'old'),
+                ('c2', '2025-01-02T00:00:00Z', 'new'),
+            ]),
+            make_rows('https://www.youtube.com/watch?v=vid2', [('c3', '2025-01-01T12:00:00Z', 'only')]),
+        ])
+
+        self.assertEqual(main_func.video_watermarks(df), {
+            'vid1': {'published_at': '2025-01-02T00:00:00Z', 'comment_id': 'c2'},
+            'vid2': {'published_at': '2025-01-01T12:00:00Z', 'comment_id': 'c3'},
+        })
+
+    def test_replies_do_not_move_the_watermark(self):
+        df = make_rows('https://www.youtube.com/watch?v=vid1', [
+            ('c1', '2025-01-01T00:00:00Z', 'thread'),
+            ('c1.r1', '2025-01-05T00:00:00Z', 'late reply'),
+        ])
+        df['parent_id'] = ['', 'c1']
+
+        self.assertEqual(main_func.video_watermarks(df)['vid1']['comment_id'], 'c1')
+
+    def test_merge_keeps_one_row_per_comment(self):
+        link = 'https://www.youtube.com/watch?v=vid1'
+        previous = make_rows(link, [('c1', '2025-01-01T00:00:00Z', 'old'), ('c2', '2025-01-02T00:00:00Z', 'edited')])
+        new = make_rows(link, [('c2', '2025-01-02T00:00:00Z', 'edited again'), ('c3', '2025-01-03T00:00:00Z', 'new')])
+
+        merged = main_func.merge_datasets(new, previous)
+
+        self.assertEqual(sorted(merged['comment_id']), ['c1', 'c2', 'c3'])
+        self.assertEqual(merged.loc[merged['comment_id'] == 'c2', 'comment'].item(), 'edited again')
+
+    def test_merge_keeps_legacy_rows_without_ids(self):
+        legacy = make_rows('https://www.youtube.com/watch?v=vid1', [('', '', 'a'), ('', '', 'b')])
+        legacy = legacy.drop(columns=['comment_id', 'published_at'])
+        new = make_rows('https://www.youtube.com/watch?v=vid1', [('c3', '2025-01-03T00:00:00Z', 'new')])
+
+        self.assertEqual(len(main_func.merge_datasets(new, legacy)), 3)
+
+
+class TestDeltaExtract(unittest.TestCase):
+
+    def test_only_new_comments_are_fetched_and_merged(self):
+        link = 'https://www.youtube.com/watch?v=vid1'
+        previous = make_rows(link, [('c1', '2025-01-01T00:00:00Z', 'old')])
+        watermark = {'published_at': '2025-01-01T00:00:00Z', 'comment_id': 'c1', 's3': 'dataset/x'}
+        seen_watermarks = []
+
+        def fake_comments(link, max_comments=10, time_budget=None, watermark=None, replies=False):
+            seen_watermarks.append(watermark)
+            yield {'@bob': [{'comment': 'new', 'user_channel': 'chan',
+                             'comment_id': 'c2', 'published_at': '2025-01-02T00:00:00Z'}]}
+
+        with patch.object(main_func, 'search_youtube', return_value=[{'id': 'vid1', 'title': 't', 'link': link}]), \
+             patch.object(main_func, 'get_video_watermarks', return_value={'vid1': watermark}) as get_watermarks, \
+             patch.object(main_func, 'iter_youtube_comments', side_effect=fake_comments), \
+             patch.object(main_func, 'detect_languages', new=lambda texts: ['en'] * len(texts)), \
+             patch.object(main_func, 'translate_texts', new=lambda texts, **kwargs: list(texts)), \
+             patch.object(main_func, 'score_batch', new=lambda texts, backend=None: [0.5] * len(texts)):
+            df = main_func.extract_data("test", max_videos=1, max_comments=10, previous_df=previous,
+                                        previous_s3='dataset/x')
+
+        get_watermarks.assert_called_once_with("test", ['vid1'], 'dataset/x')
+        self.assertEqual(seen_watermarks, [watermark])
+        self.assertEqual(sorted(df['comment_id']), ['c1', 'c2'])
+
+
+def fake_table():
+    """DynamoDB client stand-in keeping batch-written items in a dict keyed by 'video'"""
+    items = {}
+    client = MagicMock()
+
+    def batch_write_item(RequestItems):
+        for request in RequestItems['osintube']:
+            item = request['PutRequest']['Item']
+            items[item['video']['S']] = item
+        return {}
+
+    def batch_get_item(RequestItems):
+        keys = [key['video']['S'] for key in RequestItems['osintube']['Keys']]
+        return {'Responses': {'osintube': [items[key] for key in keys if key in items]}}
+
+    client.batch_write_item.side_effect = batch_write_item
+    client.batch_get_item.side_effect = batch_get_item
+    client.items = items
+    return client
+
+
+class TestWatermarkStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.client = fake_table()
+        patcher = patch.object(dynamodb_func, 'get_dynamodb_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_save_and_load_round_trip(self):
+        self.assertTrue(dynamodb_func.save_video_watermarks(
+            'election news', {'vid1': {'published_at': '2025-01-02T00:00:00Z', 'comment_id': 'c2'}}, 'dataset/x'))
+
+        item = self.client.items['watermark#election_news#vid1']
+        self.assertEqual(item['record_type'], {'S': 'watermark'})
+        self.assertEqual(dynamodb_func.get_video_watermarks('election news', ['vid1', 'vid2']),
+                         {'vid1': {'published_at': '2025-01-02T00:00:00Z', 'comment_id': 'c2', 's3': 'dataset/x'}})
+
+    def test_queries_sharing_a_video_keep_their_own_watermarks(self):
+        dynamodb_func.save_video_watermarks('query a', {'vid1': {'published_at': '2025-01-01T00:00:00Z', 'comment_id': 'a1'}},
+                                            'dataset/a_1')
+        # A later run of another query reaches further into the same video
+        dynamodb_func.save_video_watermarks('query b', {'vid1': {'published_at': '2025-01-09T00:00:00Z', 'comment_id': 'b9'}},
+                                            'dataset/b_1')
+
+        watermarks = dynamodb_func.get_video_watermarks('query a', ['vid1'], 'dataset/a_1')
+
+        self.assertEqual(watermarks['vid1']['comment_id'], 'a1')
+
+    def test_watermarks_of_another_dataset_version_are_dropped(self):
+        dynamodb_func.save_video_watermarks('query a', {'vid1': {'published_at': '2025-01-09T00:00:00Z', 'comment_id': 'a9'}},
+                                            'dataset/a_2')
+
+        # The delta run extends the older a_1 dataset, which lacks the comments a_2 ingested
+        self.assertEqual(dynamodb_func.get_video_watermarks('query a', ['vid1'], 'dataset/a_1'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
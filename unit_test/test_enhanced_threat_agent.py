@@ -130,7 +130,7 @@ class TestEnhancedThreatAgent(unittest.TestCase):
         self.assertIn("ROW", prompt)
         self.assertIn("style>", prompt)  # Should include CSS
     
-    @patch('shared_func.llama_agent.boto3.client')
+    @patch('shared_func.llama_agent.get_client')
     def test_bedrock_analysis_mock(self, mock_boto3):
         """Test Bedrock analysis with mocked AWS calls"""
         # Mock Bedrock response
@@ -154,7 +154,7 @@ class TestEnhancedThreatAgent(unittest.TestCase):
         self.assertIsInstance(result, str)
         self.assertIn("Mock analysis", result)
     
-    @patch('shared_func.llama_agent.boto3.client')
+    @patch('shared_func.llama_agent.get_client')
     def test_full_analysis_mock(self, mock_boto3):
         """Test full analysis pipeline with mocked AWS"""
         # Mock all AWS clients
@@ -254,7 +254,7 @@ class TestThreatAnalysisIntegration(unittest.TestCase):
         # Should return the single comment
         self.assertEqual(len(critical_comments), 1)
 
-    @patch('shared_func.llama_agent.boto3.client')
+    @patch('shared_func.llama_agent.get_client')
     def test_qa_functionality(self, mock_boto3):
         """Test Q&A functionality"""
         # Mock Bedrock response
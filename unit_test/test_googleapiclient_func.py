@@ -0,0 +1,455 @@
+import io
+import time
+import contextlib
+import threading
+import unittest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from shared_func import googleapiclient_func
+from shared_func.googleapiclient_func import (
+    analyse, fetch_channels, get_channels_metadata,
+    iter_comment_pages, scrap_youtube_comments, iter_youtube_comments,
+    connect_to_youtube, reset_youtube_clients, resolve_channel, iter_playlist_items,
+    load_replies
+)
+from shared_func.cache_func import TTLCache, TieredCache
+
+
+def make_thread(author_id, text, display_name=None, thread_id='', published_at=''):
+    snippet = {
+        'authorChannelId': {'value': author_id},
+        'textDisplay': text,
+        'publishedAt': published_at
+    }
+    if display_name is not None:
+        snippet['authorDisplayName'] = display_name
+    return {'id': thread_id, 'snippet': {'topLevelComment': {'snippet': snippet}}}
+
+
+def make_youtube(titles):
+    """Fake youtube resource whose channels().list answers from `titles`"""
+    youtube = MagicMock()
+
+    def channels_list(part, id, maxResults):
+        request = MagicMock()
+        request.execute.return_value = {
+            'items': [{'id': cid, 'snippet': {'title': titles[cid]}} for cid in id.split(',') if cid in titles]
+        }
+        return request
+
+    youtube.channels.return_value.list.side_effect = channels_list
+    return youtube
+
+
+def make_comment_youtube(total, fail_on_page=None, delay=0.0):
+    """Fake youtube resource serving `total` comment threads through nextPageToken"""
+    youtube = MagicMock()
+
+    def comment_threads_list(part, videoId, maxResults, pageToken=None, order='time'):
+        start = int(pageToken or 0)
+        request = MagicMock()
+
+        def execute():
+            time.sleep(delay)
+            if fail_on_page is not None and start // maxResults == fail_on_page:
+                raise RuntimeError("backendError")
+            end = min(start + maxResults, total)
+            # Newest first: thread i was published (total - i) minutes after midnight
+            response = {'items': [
+                make_thread(f'UC{i}', f'comment {i}', f'@user{i}', f'thread{i}',
+                            f'2025-01-01T{(total - i) // 60:02d}:{(total - i) % 60:02d}:00Z')
+                for i in range(start, end)
+            ]}
+            if end < total:
+                response['nextPageToken'] = str(end)
+            return response
+
+        request.execute.side_effect = execute
+        return request
+
+    youtube.commentThreads.return_value.list.side_effect = comment_threads_list
+    return youtube
+
+
+class TestAnalyse(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(googleapiclient_func, 'channel_cache', TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_names_come_from_snippet(self):
+        """No channels().list call when the snippet carries authorDisplayName"""
+        youtube = make_youtube({})
+        response = {'items': [
+            make_thread('UC1', 'first', '@alice'),
+            make_thread('UC2', 'second', '@bob'),
+            make_thread('UC1', 'third', '@alice'),
+        ]}
+
+        result = analyse(response, youtube)
+
+        youtube.channels.return_value.list.assert_not_called()
+        self.assertEqual([c['comment'] for c in result['@alice']], ['first', 'third'])
+        self.assertEqual(result['@bob'][0]['user_channel'], 'https://www.youtube.com/channel/UC2')
+
+    def test_missing_names_use_one_batched_lookup(self):
+        """Comments without a display name are resolved in a single deduplicated call"""
+        youtube = make_youtube({'UC1': 'Alice', 'UC2': 'Bob'})
+        response = {'items': [
+            make_thread('UC1', 'first'),
+            make_thread('UC2', 'second'),
+            make_thread('UC1', 'third'),
+        ]}
+
+        result = analyse(response, youtube)
+
+        self.assertEqual(youtube.channels.return_value.list.call_count, 1)
+        self.assertEqual(len(result['Alice']), 2)
+        self.assertEqual(len(result['Bob']), 1)
+
+
+class TestFetchChannels(unittest.TestCase):
+
+    def test_batches_of_fifty(self):
+        """120 unique ids (plus duplicates) need three requests"""
+        ids = [f'UC{i}' for i in range(120)]
+        youtube = make_youtube({cid: cid.lower() for cid in ids})
+
+        channels = fetch_channels(youtube, ids + ids[:10] + [''])
+
+        calls = youtube.channels.return_value.list.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([len(call.kwargs['id'].split(',')) for call in calls], [50, 50, 20])
+        self.assertEqual(len(channels), 120)
+
+
+class TestChannelCache(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(googleapiclient_func, 'channel_cache', TieredCache(TTLCache()))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_second_lookup_is_served_from_cache(self):
+        """Only ids missing from the cache reach channels().list"""
+        youtube = make_youtube({'UC1': 'Alice', 'UC2': 'Bob'})
+
+        first = get_channels_metadata(['UC1'], youtube)
+        second = get_channels_metadata(['UC1', 'UC2'], youtube)
+
+        calls = youtube.channels.return_value.list.call_args_list
+        self.assertEqual([call.kwargs['id'] for call in calls], ['UC1', 'UC2'])
+        self.assertEqual(first['UC1']['title'], 'Alice')
+        self.assertEqual(second['UC2']['title'], 'Bob')
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_unknown_channels_are_not_cached(self):
+        youtube = make_youtube({})
+
+        self.assertEqual(get_channels_metadata(['UCX'], youtube), {})
+        self.assertIsNone(self.cache.get('UCX'))
+
+
+class TestCommentCrawler(unittest.TestCase):
+
+    def test_follows_next_page_token(self):
+        """250 comments are fetched as pages of 100, 100 and 50"""
+        youtube = make_comment_youtube(total=1000)
+
+        pages = list(iter_comment_pages('https://www.youtube.com/watch?v=abc', youtube, max_comments=250))
+
+        self.assertEqual([len(page) for page in pages], [100, 100, 50])
+        max_results = [call.kwargs['maxResults'] for call in youtube.commentThreads.return_value.list.call_args_list]
+        self.assertEqual(max_results, [100, 100, 50])
+
+    def test_stops_when_pages_run_out(self):
+        youtube = make_comment_youtube(total=30)
+
+        pages = list(iter_comment_pages('https://www.youtube.com/watch?v=abc', youtube, max_comments=500))
+
+        self.assertEqual(sum(len(page) for page in pages), 30)
+
+    def test_time_budget_stops_paging(self):
+        youtube = make_comment_youtube(total=1000, delay=0.05)
+
+        pages = list(iter_comment_pages('https://www.youtube.com/watch?v=abc', youtube,
+                                        max_comments=1000, time_budget=0.01))
+
+        self.assertEqual(len(pages), 1)
+
+    def test_scrap_keeps_pages_fetched_before_an_error(self):
+        youtube = make_comment_youtube(total=1000, fail_on_page=2)
+
+        response = scrap_youtube_comments('https://www.youtube.com/watch?v=abc', youtube, max_comments=300)
+
+        self.assertEqual(len(response['items']), 200)
+
+    def test_scrap_returns_none_when_first_page_fails(self):
+        youtube = make_comment_youtube(total=1000, fail_on_page=0)
+
+        self.assertIsNone(scrap_youtube_comments('https://www.youtube.com/watch?v=abc', youtube, max_comments=300))
+
+    def test_watermark_stops_at_known_comments(self):
+        """Only threads newer than the watermark are yielded and paging stops there"""
+        youtube = make_comment_youtube(total=1000)
+        # thread150 was published at minute 850
+        watermark = {'published_at': '2025-01-01T14:10:00Z', 'comment_id': 'thread150'}
+
+        pages = list(iter_comment_pages('https://www.youtube.com/watch?v=abc', youtube,
+                                        max_comments=1000, watermark=watermark))
+
+        ids = [item['id'] for page in pages for item in page]
+        self.assertEqual(ids, [f'thread{i}' for i in range(150)])
+        self.assertEqual(youtube.commentThreads.return_value.list.call_count, 2)
+
+    def test_watermark_crawl_is_not_cut_by_max_comments(self):
+        """More new threads than max_comments: all are fetched, so the next watermark skips none"""
+        youtube = make_comment_youtube(total=1000)
+        watermark = {'published_at': '2025-01-01T14:10:00Z', 'comment_id': 'thread150'}
+
+        pages = list(iter_comment_pages('https://www.youtube.com/watch?v=abc', youtube,
+                                        max_comments=20, watermark=watermark))
+
+        self.assertEqual([item['id'] for page in pages for item in page], [f'thread{i}' for i in range(150)])
+
+    def test_analyse_keeps_comment_id_and_timestamp(self):
+        response = {'items': [make_thread('UC1', 'hi', '@alice', 'thread1', '2025-01-01T00:00:00Z')]}
+
+        entry = analyse(response)['@alice'][0]
+
+        self.assertEqual(entry['comment_id'], 'thread1')
+        self.assertEqual(entry['published_at'], '2025-01-01T00:00:00Z')
+
+    def test_stream_with_prefetch_matches_sequential(self):
+        for prefetch in (False, True):
+            youtube = make_comment_youtube(total=1000)
+            with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube):
+                pages = list(iter_youtube_comments('https://www.youtube.com/watch?v=abc',
+                                                   max_comments=150, prefetch=prefetch))
+
+            self.assertEqual([len(page) for page in pages], [100, 50])
+            self.assertEqual(pages[1]['@user149'][0]['comment'], 'comment 149')
+
+    def test_prefetch_pool_covers_every_concurrent_crawl(self):
+        with patch.object(googleapiclient_func.config, 'youtube_prefetch_workers', None), \
+             patch.object(googleapiclient_func.config, 'max_concurrency', 4), \
+             patch.object(googleapiclient_func.config, 'monitor_concurrency', 8):
+            self.assertEqual(googleapiclient_func.prefetch_workers(), 32)
+
+    def test_warns_when_a_crawl_waits_for_a_prefetch_worker(self):
+        youtube = make_comment_youtube(total=1000)
+        output = io.StringIO()
+        # A pool large enough that the second crawl does not hang behind the first
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube), \
+             patch.object(googleapiclient_func, '_get_prefetch_executor', return_value=executor), \
+             patch.object(googleapiclient_func.config, 'youtube_prefetch_workers', 1), \
+             contextlib.redirect_stdout(output):
+            first = iter_youtube_comments('https://www.youtube.com/watch?v=abc', max_comments=150)
+            next(first)
+            second = list(iter_youtube_comments('https://www.youtube.com/watch?v=abc', max_comments=150))
+            first.close()
+
+        self.assertEqual(len(second), 2)
+        self.assertIn("1 comment crawls waiting", output.getvalue())
+
+    def test_stream_raises_when_first_page_fails(self):
+        youtube = make_comment_youtube(total=1000, fail_on_page=0)
+        with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube):
+            with self.assertRaises(RuntimeError):
+                list(iter_youtube_comments('https://www.youtube.com/watch?v=abc', max_comments=150))
+
+
+def make_reply(parent_id, i):
+    return {'id': f'{parent_id}.r{i}', 'snippet': {
+        'authorChannelId': {'value': f'UCR{i}'}, 'authorDisplayName': f'@replier{i}',
+        'textDisplay': f'reply {i}', 'publishedAt': '2025-01-02T00:00:00Z', 'parentId': parent_id
+    }}
+
+
+def make_reply_youtube(reply_counts):
+    """Fake youtube resource whose comments().list pages through `reply_counts[parent_id]` replies"""
+    youtube = MagicMock()
+
+    def comments_list(part, parentId, maxResults, pageToken=None):
+        start = int(pageToken or 0)
+        end = min(start + maxResults, reply_counts[parentId])
+        response = {'items': [make_reply(parentId, i) for i in range(start, end)]}
+        if end < reply_counts[parentId]:
+            response['nextPageToken'] = str(end)
+        request = MagicMock()
+        request.execute.return_value = response
+        return request
+
+    youtube.comments.return_value.list.side_effect = comments_list
+    return youtube
+
+
+class TestReplies(unittest.TestCase):
+
+    def make_thread_with_replies(self, thread_id, total, inline):
+        thread = make_thread('UC1', 'top', '@alice', thread_id, '2025-01-01T00:00:00Z')
+        thread['snippet']['totalReplyCount'] = total
+        if inline:
+            thread['replies'] = {'comments': [make_reply(thread_id, i) for i in range(inline)]}
+        return thread
+
+    def test_only_incomplete_threads_are_fetched(self):
+        youtube = make_reply_youtube({'t1': 3, 't2': 250})
+        items = [self.make_thread_with_replies('t1', 3, 3), self.make_thread_with_replies('t2', 250, 5)]
+        with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube):
+            load_replies(items, max_replies=1000)
+
+        parents = [call.kwargs['parentId'] for call in youtube.comments.return_value.list.call_args_list]
+        self.assertEqual(parents, ['t2', 't2', 't2'])
+        self.assertEqual(len(items[0]['replies']['comments']), 3)
+        self.assertEqual(len(items[1]['replies']['comments']), 250)
+
+    def test_max_replies_caps_each_thread(self):
+        youtube = make_reply_youtube({'t1': 250})
+        items = [self.make_thread_with_replies('t1', 250, 0)]
+        with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube):
+            load_replies(items, max_replies=120)
+
+        self.assertEqual(len(items[0]['replies']['comments']), 120)
+
+    def test_failed_fetch_keeps_inline_replies(self):
+        youtube = MagicMock()
+        youtube.comments.return_value.list.return_value.execute.side_effect = RuntimeError("backendError")
+        items = [self.make_thread_with_replies('t1', 10, 2)]
+        with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube):
+            load_replies(items, max_replies=100)
+
+        self.assertEqual(len(items[0]['replies']['comments']), 2)
+
+    def test_analyse_tags_replies_with_their_thread(self):
+        response = {'items': [self.make_thread_with_replies('t1', 2, 2)]}
+
+        result = analyse(response)
+
+        self.assertEqual(result['@alice'][0]['parent_id'], '')
+        self.assertEqual(result['@replier1'][0]['parent_id'], 't1')
+        self.assertEqual(result['@replier1'][0]['comment_id'], 't1.r1')
+
+    def test_crawler_requests_replies_part(self):
+        youtube = make_comment_youtube(total=10)
+
+        list(iter_comment_pages('https://www.youtube.com/watch?v=abc', youtube, max_comments=10, replies=True))
+
+        self.assertEqual(youtube.commentThreads.return_value.list.call_args.kwargs['part'], 'snippet,replies')
+
+
+def make_playlist_youtube(total, private_every=None):
+    """Fake youtube resource serving a playlist of `total` videos through nextPageToken"""
+    youtube = MagicMock()
+
+    def playlist_items_list(part, playlistId, maxResults, pageToken=None):
+        start = int(pageToken or 0)
+        end = min(start + maxResults, total)
+        items = []
+        for i in range(start, end):
+            content = {'videoId': f'vid{i}'}
+            if private_every is None or i % private_every:
+                content['videoPublishedAt'] = '2025-01-01T00:00:00Z'
+            items.append({'snippet': {'title': f'video {i}'}, 'contentDetails': content})
+        response = {'items': items}
+        if end < total:
+            response['nextPageToken'] = str(end)
+        request = MagicMock()
+        request.execute.return_value = response
+        return request
+
+    youtube.playlistItems.return_value.list.side_effect = playlist_items_list
+    return youtube
+
+
+class TestChannelCrawl(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(googleapiclient_func, 'channel_cache', TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_handle_is_resolved_once(self):
+        youtube = MagicMock()
+        youtube.channels.return_value.list.return_value.execute.return_value = {'items': [{
+            'id': 'UC1', 'snippet': {'title': 'Alice'},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UU1'}}
+        }]}
+
+        first = resolve_channel('handle', 'Alice', youtube)
+        second = resolve_channel('handle', 'alice', youtube)
+        by_id = resolve_channel('id', 'UC1', youtube)
+
+        self.assertEqual(youtube.channels.return_value.list.call_count, 1)
+        self.assertEqual(youtube.channels.return_value.list.call_args.kwargs['forHandle'], 'Alice')
+        self.assertEqual(first['uploads_playlist'], 'UU1')
+        self.assertEqual(second, first)
+        self.assertEqual(by_id, first)
+
+    def test_unknown_handle_returns_none(self):
+        youtube = MagicMock()
+        youtube.channels.return_value.list.return_value.execute.return_value = {'items': []}
+
+        self.assertIsNone(resolve_channel('handle', 'nobody', youtube))
+
+    def test_playlist_pages_until_max_results(self):
+        youtube = make_playlist_youtube(total=500)
+        for prefetch in (False, True):
+            youtube.reset_mock()
+            with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube):
+                videos = list(iter_playlist_items('UU1', max_results=120, prefetch=prefetch))
+
+            self.assertEqual([video['contentDetails']['videoId'] for video in videos], [f'vid{i}' for i in range(120)])
+            self.assertEqual(youtube.playlistItems.return_value.list.call_count, 3)
+
+    def test_private_videos_are_skipped(self):
+        youtube = make_playlist_youtube(total=30, private_every=3)
+        with patch.object(googleapiclient_func, 'connect_to_youtube', return_value=youtube):
+            videos = list(iter_playlist_items('UU1', max_results=100))
+
+        self.assertEqual(len(videos), 20)
+
+
+class TestYouTubeClientPool(unittest.TestCase):
+
+    def test_client_is_reused_within_a_thread(self):
+        self.assertIs(connect_to_youtube(), connect_to_youtube())
+
+    def test_each_thread_gets_its_own_client(self):
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(connect_to_youtube())) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(client) for client in clients + [connect_to_youtube()]}), 4)
+
+    def test_reset_rebuilds_clients(self):
+        before = connect_to_youtube()
+        reset_youtube_clients()
+
+        self.assertIsNot(connect_to_youtube(), before)
+
+    def test_discovery_document_is_parsed_once(self):
+        connect_to_youtube()
+        reset_youtube_clients()
+        with patch.object(googleapiclient_func, 'get_static_doc') as get_static_doc:
+            connect_to_youtube()
+            thread = threading.Thread(target=connect_to_youtube)
+            thread.start()
+            thread.join()
+
+        get_static_doc.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
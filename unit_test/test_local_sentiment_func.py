@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import numpy as np
+from shared_func import local_sentiment_func, sentiment_cache_func
+from shared_func.local_sentiment_func import lexicon_sentiment, lexicon_sentiment_batch
+from shared_func.cache_func import TTLCache, TieredCache
+
+
+class TestLexiconSentiment(unittest.TestCase):
+
+    def test_polarity(self):
+        self.assertGreater(lexicon_sentiment("I love this video, great work"), 0.8)
+        self.assertLess(lexicon_sentiment("I hate these lying idiots"), 0.2)
+        self.assertEqual(lexicon_sentiment("The minister spoke on Tuesday"), 0.5)
+
+    def test_negation_and_intensifiers(self):
+        self.assertLess(lexicon_sentiment("this is not good"), 0.5)
+        self.assertGreater(lexicon_sentiment("not bad at all"), 0.5)
+        self.assertLess(lexicon_sentiment("very bad"), lexicon_sentiment("bad"))
+
+    def test_batch_matches_single_texts(self):
+        texts = ["great video", "not good", None, "", ["token", "list", "love"], "terrible and sad"]
+
+        scores = lexicon_sentiment_batch(texts)
+
+        self.assertEqual(scores.shape, (len(texts),))
+        np.testing.assert_allclose(scores, [lexicon_sentiment(text) for text in texts])
+        self.assertEqual(scores[2], 0.5)
+        self.assertTrue(((scores >= 0) & (scores <= 1)).all())
+
+    def test_negation_does_not_cross_texts(self):
+        scores = lexicon_sentiment_batch(["not", "good"])
+
+        self.assertEqual(scores[1], lexicon_sentiment("good"))
+
+
+class TestTransformerSentiment(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(sentiment_cache_func, 'sentiment_cache', TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pipeline = MagicMock(side_effect=lambda texts, **kwargs: [
+            {'label': 'POSITIVE', 'score': 0.9} if 'good' in text else {'label': 'NEGATIVE', 'score': 0.8}
+            for text in texts
+        ])
+        patcher = patch.object(local_sentiment_func, 'get_transformer_pipeline', return_value=self.pipeline)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_scores_are_positive_probabilities(self):
+        scores = local_sentiment_func.transformer_sentiment_batch(["good video", "awful", ""], batch_size=16)
+
+        np.testing.assert_allclose(scores, [0.9, 0.2, 0.5])
+        self.assertEqual(self.pipeline.call_args.args[0], ["good video", "awful"])
+        self.assertEqual(self.pipeline.call_args.kwargs['batch_size'], 16)
+
+    def test_cached_texts_are_not_classified_again(self):
+        local_sentiment_func.transformer_sentiment_batch(["good video"])
+        local_sentiment_func.transformer_sentiment_batch(["good video", "awful"])
+
+        self.assertEqual([call.args[0] for call in self.pipeline.call_args_list], [["good video"], ["awful"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import time
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from shared_func import main_func, youtube_search
+from shared_func.cache_func import TTLCache
+from shared_func.quota_func import QuotaLedger, QuotaExceededError
+
+
+def fake_search(query, max_results=5, order_by_date=True, use_cache=True):
+    return [
+        {'id': f'vid{i}', 'title': f'video {i}', 'link': f'https://www.youtube.com/watch?v=vid{i}'}
+        for i in range(max_results)
+    ]
+
+
+def fake_comments(link, max_comments=10, time_budget=None, watermark=None, replies=False):
+    # Earlier videos are slower so completion order is the reverse of search order
+    index = int(link[-1])
+    time.sleep(0.05 * (5 - index))
+    yield {f'user{index}a': [{'comment': f'comment {index}a', 'user_channel': 'chan'}]}
+    yield {f'user{index}b': [{'comment': f'comment {index}b', 'user_channel': 'chan'}]}
+
+
+def failing_comments(link, max_comments=10, time_budget=None, watermark=None, replies=False):
+    raise RuntimeError("commentsDisabled")
+    yield
+
+
+class TestExtractDataConcurrency(unittest.TestCase):
+
+    def run_extract(self, max_concurrency):
+        with patch.object(main_func, 'search_youtube', side_effect=fake_search), \
+             patch.object(main_func, 'iter_youtube_comments', side_effect=fake_comments), \
+             patch.object(main_func, 'detect_languages', new=lambda texts: ['en'] * len(texts)), \
+             patch.object(main_func, 'translate_texts', new=lambda texts, **kwargs: list(texts)), \
+             patch.object(main_func, 'score_batch', new=lambda texts, backend=None: [0.5] * len(texts)):
+            return main_func.extract_data("test", max_videos=5, max_comments=2,
+                                          max_concurrency=max_concurrency)
+
+    def test_output_is_deterministic(self):
+        """Concurrent and sequential runs produce identical frames"""
+        sequential = self.run_extract(max_concurrency=1)
+        concurrent = self.run_extract(max_concurrency=5)
+
+        self.assertEqual(len(sequential), 10)
+        self.assertEqual(sequential['comment'].tolist(), concurrent['comment'].tolist())
+        self.assertEqual(list(concurrent.columns), main_func.COLUMNS)
+
+    def test_concurrent_run_is_bounded_by_slowest_video(self):
+        """Wall time tracks the slowest video instead of the sum"""
+        start = time.perf_counter()
+        self.run_extract(max_concurrency=5)
+        elapsed = time.perf_counter() - start
+
+        # Sequential would take 0.05 * (5+4+3+2+1) = 0.75s
+        self.assertLess(elapsed, 0.5)
+
+    def test_streaming_yields_videos_as_they_finish(self):
+        """iter_extract_data hands out each scored video as soon as it completes"""
+        with patch.object(main_func, 'search_youtube', side_effect=fake_search), \
+             patch.object(main_func, 'iter_youtube_comments', side_effect=fake_comments), \
+             patch.object(main_func, 'detect_languages', new=lambda texts: ['en'] * len(texts)), \
+             patch.object(main_func, 'translate_texts', new=lambda texts, **kwargs: list(texts)), \
+             patch.object(main_func, 'score_batch', new=lambda texts, backend=None: [0.5] * len(texts)):
+            start = time.perf_counter()
+            stream = main_func.iter_extract_data("test", max_videos=5, max_comments=2, max_concurrency=5)
+            index, total, result, df = next(stream)
+            first_after = time.perf_counter() - start
+            rest = list(stream)
+
+        # The last video is the fastest (0.05s); the full run takes 0.25s
+        self.assertEqual((index, total), (4, 5))
+        self.assertLess(first_after, 0.2)
+        self.assertEqual(list(df.columns), main_func.COLUMNS)
+        self.assertEqual(df['sentiment_score'].tolist(), [0.5, 0.5])
+        self.assertEqual(sorted(item[0] for item in rest), [0, 1, 2, 3])
+
+    def test_videos_without_comments_are_skipped(self):
+        """Videos whose comments cannot be fetched are dropped without breaking the merge"""
+        with patch.object(main_func, 'search_youtube', side_effect=fake_search), \
+             patch.object(main_func, 'iter_youtube_comments', side_effect=failing_comments):
+            df = main_func.extract_data("test", max_videos=3, max_comments=2)
+
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), main_func.COLUMNS)
+
+    def test_cached_search_is_not_budgeted(self):
+        """A search the cache answers leaves its 100 units to the comments"""
+        cache = TTLCache()
+        cache.set(("test", None, 'date', 3), fake_search("test", max_results=3))
+        # Three single-page videos fit, a search does not
+        ledger = QuotaLedger(daily_limit=3)
+        with patch.object(youtube_search, 'search_cache', cache), \
+             patch('shared_func.quota_func.quota_ledger', ledger), \
+             patch.object(main_func, 'search_youtube') as search, \
+             patch.object(main_func, 'iter_youtube_comments', side_effect=fake_comments), \
+             patch.object(main_func, 'detect_languages', new=lambda texts: ['en'] * len(texts)), \
+             patch.object(main_func, 'translate_texts', new=lambda texts, **kwargs: list(texts)), \
+             patch.object(main_func, 'score_batch', new=lambda texts, backend=None: [0.5] * len(texts)):
+            df = main_func.extract_data("test", max_videos=3, max_comments=2)
+            with self.assertRaises(QuotaExceededError):
+                main_func.extract_data("test", max_videos=3, max_comments=2, use_cache=False)
+
+        search.assert_not_called()
+        self.assertEqual(len(df), 6)
+
+
+class TestExtractBatch(unittest.TestCase):
+
+    def test_shared_videos_are_enriched_once(self):
+        """Overlapping result sets fetch each video once and fan rows back out per query"""
+        results = {
+            'alpha': [0, 1, 2],
+            'beta': [2, 3, 1],
+        }
+        fetched = []
+
+        def search(query, max_results=5, order_by_date=True, use_cache=True):
+            return [{'id': f'vid{i}', 'title': f'video {i}', 'link': f'https://www.youtube.com/watch?v=vid{i}'}
+                    for i in results[query][:max_results]]
+
+        def comments(link, *args, **kwargs):
+            fetched.append(link)
+            return fake_comments(link)
+
+        with patch.object(main_func, 'search_youtube', side_effect=search), \
+             patch.object(main_func, 'iter_youtube_comments', side_effect=comments), \
+             patch.object(main_func, 'detect_languages', new=lambda texts: ['en'] * len(texts)), \
+             patch.object(main_func, 'translate_texts', new=lambda texts, **kwargs: list(texts)), \
+             patch.object(main_func, 'score_batch', new=lambda texts, backend=None: [0.5] * len(texts)):
+            datasets = main_func.extract_batch(['alpha', 'beta', 'alpha'], max_videos=3, max_comments=2)
+
+        self.assertEqual(sorted(fetched), [f'https://www.youtube.com/watch?v=vid{i}' for i in range(4)])
+        self.assertEqual(list(datasets), ['alpha', 'beta'])
+        self.assertEqual(sorted(set(datasets['alpha']['title'])), ['video 0', 'video 1', 'video 2'])
+        self.assertEqual(sorted(set(datasets['beta']['title'])), ['video 1', 'video 2', 'video 3'])
+        self.assertEqual(len(datasets['beta']), 6)
+
+    def test_refuses_when_not_every_query_gets_a_video(self):
+        # Three searches and two single-page videos fit, three videos do not
+        ledger = QuotaLedger(daily_limit=302)
+        with patch('shared_func.quota_func.quota_ledger', ledger), \
+             patch.object(main_func, 'search_youtube') as search:
+            with self.assertRaises(QuotaExceededError):
+                main_func.extract_batch(['alpha', 'beta', 'gamma'], max_videos=3, max_comments=50)
+
+        search.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
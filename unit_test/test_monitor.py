@@ -0,0 +1,139 @@
+import json
+import asyncio
+import tempfile
+import threading
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import pandas as pd
+import monitor
+from shared_func import main_func
+from shared_func.quota_func import QuotaLedger, QuotaExceededError
+
+
+def make_frame(link, count):
+    return pd.DataFrame([{
+        'sentiment_score': 0.5, 'comment': f'c{i}', 'title': 't', 'person': f'p{i}', 'user_channel': '',
+        'link': link, 'translated': f'c{i}', 'normalized': [f'c{i}'],
+        'comment_id': f'{link}#{i}', 'published_at': f'2025-01-01T00:00:{i:02d}Z'
+    } for i in range(count)], columns=main_func.COLUMNS)
+
+
+def make_watch(**values):
+    watch = {'query': None, 'video': None, 'interval': 60, 'max_videos': 2, 'max_comments': 10,
+             'order_by_date': True, 'replies': False, 'delta': True}
+    watch.update(values)
+    return watch
+
+
+class TestLoadWatches(unittest.TestCase):
+
+    def test_defaults_are_filled_in(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump([{'query': 'news'}, {'video': 'https://www.youtube.com/watch?v=abcdefghijk', 'delta': False}], f)
+        self.addCleanup(os.remove, f.name)
+
+        watches = monitor.load_watches(f.name)
+
+        self.assertEqual(watches[0]['interval'], monitor.config.monitor_interval)
+        self.assertTrue(watches[0]['delta'])
+        self.assertFalse(watches[1]['delta'])
+
+    def test_watch_needs_query_or_video(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump([{'interval': 10}], f)
+        self.addCleanup(os.remove, f.name)
+
+        with self.assertRaises(ValueError):
+            monitor.load_watches(f.name)
+
+
+class TestRunWatch(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(monitor, 'store_dataset')
+        self.store_dataset = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_query_run_is_stored_and_kept_for_next_delta(self):
+        frames = [(0, 2, {}, make_frame('v1', 3)), (1, 2, {}, None)]
+        state = {}
+        with patch.object(monitor, 'load_previous_dataset', return_value=(None, None)), \
+             patch.object(monitor, 'iter_extract_data', return_value=iter(frames)):
+            new_comments = monitor.run_watch(make_watch(query='news'), state)
+
+        self.assertEqual(new_comments, 3)
+        self.store_dataset.assert_called_once()
+        self.assertEqual(len(state['previous_df']), 3)
+        self.assertIs(state['previous_s3'], self.store_dataset.return_value)
+
+    def test_nothing_new_is_not_stored(self):
+        state = {'previous_df': make_frame('v1', 3), 'previous_s3': 'dataset/news_1/data.pickle'}
+        with patch.object(monitor, 'iter_extract_data', return_value=iter([(0, 1, {}, None)])) as extract:
+            self.assertEqual(monitor.run_watch(make_watch(query='news'), state), 0)
+
+        self.assertIs(extract.call_args.kwargs['previous_df'], state['previous_df'])
+        self.assertEqual(extract.call_args.kwargs['previous_s3'], 'dataset/news_1/data.pickle')
+        self.store_dataset.assert_not_called()
+
+    def test_video_watch_skips_search(self):
+        video = {'id': 'abcdefghijk', 'link': 'https://www.youtube.com/watch?v=abcdefghijk', 'title': 't'}
+        with patch.object(monitor, 'get_videos', return_value=[video]) as get_videos, \
+             patch.object(monitor, 'iter_extract_videos', return_value=iter([(0, 1, video, make_frame('v', 2))])), \
+             patch.object(monitor, 'iter_extract_data') as extract_data:
+            monitor.run_watch(make_watch(video=video['link'], delta=False), {})
+
+        get_videos.assert_called_once_with(['abcdefghijk'])
+        extract_data.assert_not_called()
+
+    def test_video_watch_is_not_charged_for_a_search(self):
+        video = {'id': 'abcdefghijk', 'link': 'https://www.youtube.com/watch?v=abcdefghijk', 'title': 't'}
+        ledger = QuotaLedger(daily_limit=10000)
+        ledger.record('search.list', units=9998)
+        with patch('shared_func.quota_func.quota_ledger', ledger), \
+             patch.object(monitor, 'get_videos', return_value=[video]), \
+             patch.object(monitor, 'iter_extract_videos', return_value=iter([(0, 1, video, make_frame('v', 2))])) as extract:
+            monitor.run_watch(make_watch(video=video['link'], max_comments=80, delta=False), {})
+
+        # One lookup plus one comment page fit in the last 2 units
+        self.assertEqual(extract.call_args.args[1], 80)
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_polls_repeat_with_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = {'now': 0, 'max': 0, 'runs': 0}
+
+        def fake_run(watch, state):
+            with lock:
+                running['now'] += 1
+                running['max'] = max(running['max'], running['now'])
+                running['runs'] += 1
+            threading.Event().wait(0.02)
+            with lock:
+                running['now'] -= 1
+            if watch['query'] == 'q0':
+                raise QuotaExceededError("no quota")
+
+        async def scenario():
+            stop = asyncio.Event()
+            watches = [make_watch(query=f'q{i}', interval=0.05) for i in range(6)]
+            task = asyncio.create_task(monitor.monitor(watches, concurrency=2, stop=stop))
+            await asyncio.sleep(0.3)
+            stop.set()
+            await task
+
+        with patch.object(monitor, 'run_watch', side_effect=fake_run):
+            asyncio.run(scenario())
+
+        self.assertLessEqual(running['max'], 2)
+        self.assertGreater(running['runs'], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import time
+import unittest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from shared_func import googleapiclient_func, resilience_func, dynamodb_func
+from shared_func.quota_func import QuotaLedger, QuotaExceededError, estimate_run_cost, plan_run, submit_in_run
+
+
+class TestQuotaLedger(unittest.TestCase):
+
+    def test_costs_per_endpoint(self):
+        ledger = QuotaLedger(daily_limit=10000)
+        ledger.record('search.list')
+        ledger.record('commentThreads.list')
+        ledger.record('channels.list')
+
+        self.assertEqual(ledger.used_today(), 102)
+        self.assertEqual(ledger.remaining_today(), 9898)
+        self.assertEqual([call[1:3] for call in ledger.calls],
+                         [('search.list', 100), ('commentThreads.list', 1), ('channels.list', 1)])
+
+    def test_run_usage_follows_copied_context_into_threads(self):
+        ledger = QuotaLedger(daily_limit=10000)
+        with ledger.run('query') as usage:
+            ledger.record('search.list')
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                for _ in range(8):
+                    submit_in_run(executor, ledger.record, 'commentThreads.list')
+        ledger.record('channels.list')
+
+        self.assertEqual(usage.units, 108)
+        self.assertEqual(usage.calls, 9)
+        self.assertEqual(usage.by_endpoint['commentThreads.list'], 8)
+        self.assertEqual(ledger.used_today(), 109)
+
+    def test_execute_request_is_recorded(self):
+        ledger = QuotaLedger(daily_limit=10000)
+        request = MagicMock()
+        request.execute.return_value = {'items': []}
+        # Earlier tests without network access may have opened the search.list circuit
+        resilience_func.reset_breakers()
+
+        with patch.object(googleapiclient_func, 'quota_ledger', ledger):
+            self.assertEqual(googleapiclient_func.execute_request(request, 'search.list'), {'items': []})
+
+        self.assertEqual(ledger.used_today(), 100)
+
+
+def fake_counter_table():
+    """DynamoDB client stand-in implementing the ADD update and get_item of the quota counter"""
+    items = {}
+    client = MagicMock()
+
+    def update_item(TableName, Key, UpdateExpression, ExpressionAttributeValues, ReturnValues):
+        item = items.setdefault(Key['video']['S'], {'units': {'N': '0'}})
+        item['units'] = {'N': str(int(item['units']['N']) + int(ExpressionAttributeValues[':units']['N']))}
+        return {'Attributes': {'units': item['units']}}
+
+    def get_item(TableName, Key, ConsistentRead):
+        item = items.get(Key['video']['S'])
+        return {'Item': item} if item else {}
+
+    client.update_item.side_effect = update_item
+    client.get_item.side_effect = get_item
+    return client
+
+
+class TestSharedLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.client = fake_counter_table()
+        patcher = patch.object(dynamodb_func, 'get_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def shared_ledger(self):
+        # No timer or size flushes during a test, only the explicit ones
+        return QuotaLedger(daily_limit=10000, shared=True, flush_interval=3600, flush_units=10 ** 9)
+
+    def test_usage_is_shared_between_processes_and_restarts(self):
+        app, monitor = self.shared_ledger(), self.shared_ledger()
+        with app.run('query'):
+            app.record('search.list')
+        monitor.record('commentThreads.list')
+        monitor.flush()
+
+        self.assertEqual(app.used_today(), 101)
+        self.assertEqual(self.shared_ledger().remaining_today(), 9899)
+        self.assertEqual(self.client.update_item.call_args.kwargs['UpdateExpression'],
+                         'ADD units :units SET record_type = :record_type')
+
+    def test_calls_are_flushed_together_off_the_calling_thread(self):
+        ledger = self.shared_ledger()
+        for _ in range(50):
+            ledger.record('commentThreads.list')
+
+        self.client.update_item.assert_not_called()
+        # Unflushed units already count towards the day
+        self.assertEqual(ledger.used_today(), 50)
+        ledger.flush()
+        self.assertEqual(self.client.update_item.call_count, 1)
+        self.assertEqual(self.client.update_item.call_args.kwargs['ExpressionAttributeValues'][':units'], {'N': '50'})
+
+    def test_enough_units_wake_the_background_flush(self):
+        ledger = QuotaLedger(daily_limit=10000, shared=True, flush_interval=3600, flush_units=100)
+        ledger.record('search.list')
+
+        for _ in range(100):
+            if self.client.update_item.called:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.client.update_item.call_count, 1)
+
+    def test_falls_back_to_process_usage_without_dynamodb(self):
+        ledger = self.shared_ledger()
+        update_item, get_item = self.client.update_item.side_effect, self.client.get_item.side_effect
+        self.client.update_item.side_effect = RuntimeError("unreachable")
+        self.client.get_item.side_effect = RuntimeError("unreachable")
+
+        ledger.record('search.list')
+        ledger.flush()
+
+        self.assertEqual(ledger.used_today(), 100)
+        # The units are kept for the next flush
+        self.client.update_item.side_effect, self.client.get_item.side_effect = update_item, get_item
+        ledger.flush()
+        self.assertEqual(self.shared_ledger().used_today(), 100)
+
+    def test_unshared_ledger_does_not_touch_dynamodb(self):
+        QuotaLedger(daily_limit=10000).record('search.list')
+
+        self.client.update_item.assert_not_called()
+
+
+class TestPlanner(unittest.TestCase):
+
+    def test_estimate(self):
+        # One search plus one page per video for up to 100 comments
+        self.assertEqual(estimate_run_cost(5, 80), 105)
+        self.assertEqual(estimate_run_cost(20, 200), 140)
+        self.assertEqual(estimate_run_cost(6, 80, searches=3), 306)
+
+    def test_estimate_with_replies(self):
+        # Every thread may need its own reply pages: 80 threads x 2 pages of up to 100 replies
+        self.assertEqual(estimate_run_cost(5, 80, max_replies=150), 105 + 5 * 80 * 2)
+
+    def test_replies_shrink_the_plan(self):
+        ledger = QuotaLedger(daily_limit=10000)
+
+        self.assertEqual(plan_run(20, 200, ledger, max_replies=100), (20, 200))
+        self.assertEqual(plan_run(5, 200, QuotaLedger(daily_limit=1000), max_replies=100), (5, 100))
+
+    def test_threads_are_reduced_below_one_page_when_replies_dominate(self):
+        # 1 video x 100 threads with two reply pages each costs 1 + 200 units; 74 threads fit in 150
+        ledger = QuotaLedger(daily_limit=150)
+
+        self.assertEqual(plan_run(1, 100, ledger, searches=0, max_replies=200), (1, 74))
+        self.assertEqual(plan_run(1, 100, ledger, max_replies=100), (1, 49))
+        with self.assertRaises(QuotaExceededError):
+            plan_run(1, 100, QuotaLedger(daily_limit=101), max_replies=100)
+
+    def test_estimate_without_search(self):
+        # A watched video: one videos.list lookup and one comment page
+        self.assertEqual(estimate_run_cost(1, 80, searches=0, lookups=1), 2)
+
+    def test_run_that_fits_is_unchanged(self):
+        self.assertEqual(plan_run(20, 200, QuotaLedger(daily_limit=10000)), (20, 200))
+
+    def test_comment_pages_are_reduced_first(self):
+        ledger = QuotaLedger(daily_limit=125)
+
+        self.assertEqual(plan_run(20, 300, ledger), (20, 100))
+
+    def test_videos_are_reduced_next(self):
+        ledger = QuotaLedger(daily_limit=110)
+
+        self.assertEqual(plan_run(20, 300, ledger), (10, 100))
+
+    def test_refuses_when_nothing_fits(self):
+        ledger = QuotaLedger(daily_limit=10000)
+        ledger.record('search.list', units=9950)
+
+        with self.assertRaises(QuotaExceededError):
+            plan_run(5, 80, ledger)
+
+
+if __name__ == '__main__':
+    unittest.main()
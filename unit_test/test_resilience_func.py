@@ -0,0 +1,152 @@
+import json
+import socket
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import httplib2
+from googleapiclient.errors import HttpError
+from shared_func import resilience_func
+from shared_func.resilience_func import (
+    classify_error, call_with_retry, CircuitBreaker, CircuitOpenError, RetryMetrics,
+    TRANSIENT, RATE_LIMITED, QUOTA, FATAL
+)
+from shared_func.quota_func import QuotaExceededError
+
+
+def http_error(status, reason='', headers=None):
+    resp = httplib2.Response({'status': status, **(headers or {})})
+    content = json.dumps({'error': {'code': status, 'message': reason, 'errors': [{'reason': reason}]}}).encode()
+    return HttpError(resp, content)
+
+
+def failing(errors, result='ok'):
+    """A call raising `errors` in turn, then returning `result`"""
+    errors = list(errors)
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return call
+
+
+class TestClassifyError(unittest.TestCase):
+
+    def test_classes(self):
+        self.assertEqual(classify_error(http_error(503, 'backendError')), TRANSIENT)
+        self.assertEqual(classify_error(http_error(429)), RATE_LIMITED)
+        self.assertEqual(classify_error(http_error(403, 'rateLimitExceeded')), RATE_LIMITED)
+        self.assertEqual(classify_error(http_error(403, 'quotaExceeded')), QUOTA)
+        self.assertEqual(classify_error(http_error(403, 'commentsDisabled')), FATAL)
+        self.assertEqual(classify_error(http_error(404, 'videoNotFound')), FATAL)
+        self.assertEqual(classify_error(socket.timeout()), TRANSIENT)
+        self.assertEqual(classify_error(ConnectionResetError()), TRANSIENT)
+        self.assertEqual(classify_error(ValueError()), FATAL)
+
+
+class TestCallWithRetry(unittest.TestCase):
+
+    def setUp(self):
+        resilience_func.reset_breakers()
+        self.addCleanup(resilience_func.reset_breakers)
+        patcher = patch.object(resilience_func, 'retry_metrics', RetryMetrics())
+        self.metrics = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.delays = []
+
+    def call(self, endpoint, func, **kwargs):
+        kwargs.setdefault('max_retries', 4)
+        kwargs.setdefault('base_delay', 1)
+        kwargs.setdefault('max_delay', 30)
+        return call_with_retry(endpoint, func, sleep=self.delays.append, **kwargs)
+
+    def test_transient_errors_are_retried(self):
+        result = self.call('test.list', failing([http_error(503, 'backendError'), socket.timeout()]))
+
+        self.assertEqual(result, 'ok')
+        self.assertEqual(len(self.delays), 2)
+        self.assertEqual(self.metrics.stats()['test.list']['retries'], 2)
+
+    def test_backoff_is_jittered_and_capped(self):
+        with self.assertRaises(HttpError):
+            self.call('test.list', failing([http_error(500)] * 10), max_retries=3, max_delay=3)
+
+        for attempt, delay in enumerate(self.delays):
+            self.assertLessEqual(delay, min(3, 2 ** attempt))
+        self.assertEqual(self.metrics.stats()['test.list']['failures'], 1)
+
+    def test_rate_limits_honour_retry_after(self):
+        self.call('test.list', failing([http_error(429, headers={'retry-after': '7'})]))
+
+        self.assertGreaterEqual(self.delays[0], 7)
+
+    def test_fatal_errors_are_not_retried(self):
+        with self.assertRaises(HttpError):
+            self.call('test.list', failing([http_error(403, 'commentsDisabled')]))
+
+        self.assertEqual(self.delays, [])
+
+    def test_quota_errors_become_quota_exceeded(self):
+        with self.assertRaises(QuotaExceededError):
+            self.call('test.list', failing([http_error(403, 'quotaExceeded')]))
+
+        self.assertEqual(self.delays, [])
+
+    def test_breaker_opens_and_fails_fast(self):
+        with patch.object(resilience_func.config, 'youtube_breaker_threshold', 3):
+            with self.assertRaises(HttpError):
+                self.call('broken.list', failing([http_error(503)] * 10), max_retries=10)
+            with self.assertRaises(CircuitOpenError):
+                self.call('broken.list', failing([]))
+
+        stats = self.metrics.stats()['broken.list']
+        self.assertEqual(stats['calls'], 3)
+        self.assertEqual(stats['circuit_opened'], 1)
+        self.assertEqual(stats['short_circuited'], 1)
+        # Other endpoints are unaffected
+        self.assertEqual(self.call('other.list', failing([])), 'ok')
+
+    def test_quota_error_in_half_open_trial_does_not_wedge_the_breaker(self):
+        with patch.object(resilience_func.config, 'youtube_breaker_threshold', 1), \
+             patch.object(resilience_func.config, 'youtube_breaker_reset', 0):
+            with self.assertRaises(HttpError):
+                self.call('quota.list', failing([http_error(503)]), max_retries=0)
+            # The half-open trial hits the daily quota
+            with self.assertRaises(QuotaExceededError):
+                self.call('quota.list', failing([http_error(403, 'quotaExceeded')]))
+
+            # Once the quota resets, calls go through again
+            self.assertEqual(self.call('quota.list', failing([])), 'ok')
+        self.assertEqual(resilience_func.get_breaker('quota.list').state, 'closed')
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_half_open_trial_closes_on_success(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+        self.assertTrue(breaker.record_failure())
+
+        breaker.allow()  # the trial call
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()  # only one trial at a time
+        breaker.record_success()
+
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_open_circuit_rejects_calls(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, 'open')
+        with self.assertRaises(CircuitOpenError):
+            breaker.allow()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import pandas as pd
+from shared_func.row_builder import RowBuilder
+
+
+class TestRowBuilder(unittest.TestCase):
+
+    def test_rows_keep_append_order(self):
+        rows = RowBuilder(["comment", "person"])
+        rows.append(comment="first", person="@alice")
+        rows.append({"comment": "second", "person": "@bob"})
+
+        df = rows.to_frame()
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(list(df.columns), ["comment", "person"])
+        self.assertEqual(df["comment"].tolist(), ["first", "second"])
+
+    def test_float_columns_are_typed(self):
+        rows = RowBuilder(["comment", "sentiment_score"], float_columns=["sentiment_score"])
+        rows.extend([{"comment": "a", "sentiment_score": 0.25}, {"comment": "b"}])
+
+        df = rows.to_frame()
+
+        self.assertEqual(df["sentiment_score"].dtype, "float64")
+        self.assertEqual(df["sentiment_score"].iloc[0], 0.25)
+        self.assertTrue(pd.isna(df["sentiment_score"].iloc[1]))
+
+    def test_list_values_stay_whole(self):
+        rows = RowBuilder(["normalized"])
+        rows.append(normalized=["hello", "world"])
+        rows.append(normalized=["bye", "now"])
+
+        self.assertEqual(rows.to_frame()["normalized"].tolist(), [["hello", "world"], ["bye", "now"]])
+
+    def test_empty_builder_has_columns(self):
+        df = RowBuilder(["comment", "person"]).to_frame()
+
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), ["comment", "person"])
+
+
+if __name__ == '__main__':
+    unittest.main()
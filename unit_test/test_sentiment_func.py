@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import numpy as np
+from shared_func import sentiment_func, bedrock_func, openai_func, main_func
+from shared_func.sentiment_func import score_batch, get_backend, check_backend
+
+
+class TestSentimentBackends(unittest.TestCase):
+
+    def test_every_backend_shares_the_batch_interface(self):
+        for name in sentiment_func.available_backends():
+            self.assertTrue(callable(get_backend(name)), name)
+
+    def test_default_comes_from_config(self):
+        with patch.object(sentiment_func.config, 'sentiment_backend', 'lexicon'):
+            scores = score_batch(["great video", "awful lies", None])
+
+        self.assertIsInstance(scores, np.ndarray)
+        self.assertEqual(scores.dtype, float)
+        self.assertGreater(scores[0], 0.5)
+        self.assertLess(scores[1], 0.5)
+        self.assertEqual(scores[2], 0.5)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            score_batch(["text"], backend='nope')
+
+    def test_backend_with_missing_packages_fails_before_any_api_call(self):
+        installed = sentiment_func.find_spec
+        with patch.object(sentiment_func, 'find_spec', side_effect=lambda name: None if name == 'torch' else installed(name)), \
+             patch.object(main_func, 'search_youtube') as search:
+            with self.assertRaisesRegex(ImportError, 'torch'):
+                check_backend('transformers')
+            with self.assertRaises(ImportError):
+                list(main_func.iter_extract_data("news", sentiment_backend='transformers'))
+
+        search.assert_not_called()
+        check_backend('lexicon')
+
+    def test_single_text_backends_are_batched_and_failures_are_neutral(self):
+        def score(text):
+            if text == 'boom':
+                raise RuntimeError("throttled")
+            return 0.9
+
+        with patch.object(bedrock_func, 'sentiment_analysis', side_effect=score) as single:
+            scores = score_batch(["one", "boom", "three"], backend='bedrock')
+
+        np.testing.assert_allclose(scores, [0.9, 0.5, 0.9])
+        self.assertEqual(single.call_count, 3)
+
+    def test_openai_backend_imports_without_a_key(self):
+        with patch.object(openai_func.config, 'openai_api_key', None), \
+             patch.object(openai_func, '_client', None):
+            scores = score_batch(["some text"], backend='openai')
+
+        np.testing.assert_allclose(scores, [0.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,235 @@
+import threading
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from shared_func import translate_func
+from shared_func.cache_func import TTLCache, TieredCache
+
+
+def make_comprehend(language_of):
+    """Fake Comprehend client answering batch_detect_dominant_language with `language_of(text)`"""
+    comprehend = MagicMock()
+    threads = set()
+
+    def batch_detect(TextList):
+        threads.add(threading.get_ident())
+        return {'ResultList': [
+            {'Index': i, 'Languages': [{'LanguageCode': language_of(text), 'Score': 0.99}]}
+            for i, text in enumerate(TextList)
+        ], 'ErrorList': []}
+
+    comprehend.batch_detect_dominant_language.side_effect = batch_detect
+    comprehend.threads = threads
+    return comprehend
+
+
+def make_translate(translate=lambda text, source: f'[{source}] {text}'):
+    """Fake Translate client translating each delimited piece with `translate(piece, source)`"""
+    client = MagicMock()
+
+    def translate_text(Text, SourceLanguageCode, TargetLanguageCode):
+        pieces = Text.split(translate_func.TRANSLATE_DELIMITER)
+        return {'TranslatedText': translate_func.TRANSLATE_DELIMITER.join(
+            translate(piece, SourceLanguageCode) for piece in pieces)}
+
+    client.translate_text.side_effect = translate_text
+    return client
+
+
+class TestBatchLanguageDetection(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(translate_func, 'translation_cache', TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batches_of_twenty_five(self):
+        comprehend = make_comprehend(lambda text: 'pt' if text.startswith('olá') else 'en')
+        texts = [f'olá mundo {i}' if i % 2 else f'hello world {i}' for i in range(60)]
+        with patch.object(translate_func, 'get_comprehend_client', return_value=comprehend):
+            languages = translate_func.detect_languages(texts, max_workers=3)
+
+        sizes = [len(call.kwargs['TextList']) for call in comprehend.batch_detect_dominant_language.call_args_list]
+        self.assertEqual(sorted(sizes), [10, 25, 25])
+        self.assertEqual(languages, ['pt' if i % 2 else 'en' for i in range(60)])
+        comprehend.detect_dominant_language.assert_not_called()
+
+    def test_short_and_failed_documents_are_auto(self):
+        comprehend = MagicMock()
+        comprehend.batch_detect_dominant_language.return_value = {
+            'ResultList': [{'Index': 1, 'Languages': [{'LanguageCode': 'fr', 'Score': 0.9}]}],
+            'ErrorList': [{'Index': 0, 'ErrorCode': 'INTERNAL_SERVER_ERROR', 'ErrorMessage': 'boom'}]
+        }
+        with patch.object(translate_func, 'get_comprehend_client', return_value=comprehend):
+            languages = translate_func.detect_languages(['hi', 'this one fails', 'bonjour le monde'])
+
+        # 'hi' is too short to be sent; indexes in the response refer to the documents sent
+        self.assertEqual(comprehend.batch_detect_dominant_language.call_args.kwargs['TextList'],
+                         ['this one fails', 'bonjour le monde'])
+        self.assertEqual(languages, ['auto', 'auto', 'fr'])
+
+    def test_long_documents_are_truncated_to_the_byte_limit(self):
+        text = 'ã' * 4000  # 8000 bytes of UTF-8
+        truncated = translate_func.truncate_utf8(text, translate_func.COMPREHEND_MAX_BYTES)
+
+        self.assertLessEqual(len(truncated.encode('utf-8')), 4999)
+        self.assertTrue(text.startswith(truncated))
+
+    def test_detected_languages_are_used_as_source(self):
+        translate = make_translate()
+        with patch.object(translate_func, 'detect_languages', return_value=['pt', 'en']), \
+             patch.object(translate_func, 'get_translate_client', return_value=translate):
+            result = translate_func.translate_texts(['olá', 'hello'])
+
+        self.assertEqual(result, ['[pt] olá', 'hello'])
+
+
+class TestTranslationCache(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(translate_func, 'translation_cache', TieredCache(TTLCache()))
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.translate = MagicMock()
+        self.translate.translate_text.side_effect = lambda Text, SourceLanguageCode, TargetLanguageCode: {
+            'TranslatedText': f'[{SourceLanguageCode}] {Text}'
+        }
+        patcher = patch.object(translate_func, 'get_translate_client', return_value=self.translate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeated_text_is_translated_once(self):
+        first = translate_func.translate_text('olá mundo', 'en', 'pt')
+        second = translate_func.translate_text('olá mundo', 'en', 'pt')
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.translate.translate_text.call_count, 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_key_includes_source_and_target(self):
+        translate_func.translate_text('olá mundo', 'en', 'pt')
+        translate_func.translate_text('olá mundo', 'en', 'gl')
+        translate_func.translate_text('olá mundo', 'es', 'pt')
+
+        self.assertEqual(self.translate.translate_text.call_count, 3)
+
+    def test_failures_are_not_cached(self):
+        self.translate.translate_text.side_effect = RuntimeError("throttled")
+
+        self.assertEqual(translate_func.translate_text('olá mundo', 'en', 'pt'), 'olá mundo')
+        self.assertEqual(len(self.cache.memory), 0)
+
+    def test_cached_and_duplicate_texts_skip_detection(self):
+        comprehend = make_comprehend(lambda text: 'pt')
+        with patch.object(translate_func, 'get_comprehend_client', return_value=comprehend):
+            translate_func.detect_languages(['olá mundo', 'olá mundo', 'bom dia'])
+            languages = translate_func.detect_languages(['olá mundo', 'bom dia', 'boa noite'])
+
+        sent = [call.kwargs['TextList'] for call in comprehend.batch_detect_dominant_language.call_args_list]
+        self.assertEqual(sent, [['olá mundo', 'bom dia'], ['boa noite']])
+        self.assertEqual(languages, ['pt', 'pt', 'pt'])
+
+
+class TestChunkedTranslation(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(translate_func, 'translation_cache', TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def translate_texts(self, translate, texts, languages, **kwargs):
+        with patch.object(translate_func, 'get_translate_client', return_value=translate):
+            return translate_func.translate_texts(texts, source_languages=languages, **kwargs)
+
+    def test_one_request_per_language_chunk(self):
+        translate = make_translate()
+        texts = [f'olá {i}' if i % 2 else f'hola {i}' for i in range(200)]
+        languages = ['pt' if i % 2 else 'es' for i in range(200)]
+
+        result = self.translate_texts(translate, texts, languages)
+
+        self.assertEqual(result, [f'[{language}] {text}' for text, language in zip(texts, languages)])
+        sources = sorted(call.kwargs['SourceLanguageCode'] for call in translate.translate_text.call_args_list)
+        self.assertEqual(sources, ['es', 'pt'])
+
+    def test_chunks_stay_under_the_size_limit(self):
+        translate = make_translate()
+        texts = [f'{i} ' + 'ã' * 1000 for i in range(20)]  # ~2 KB each
+
+        result = self.translate_texts(translate, texts, ['pt'] * 20)
+
+        sent = [call.kwargs['Text'] for call in translate.translate_text.call_args_list]
+        self.assertGreater(len(sent), 1)
+        self.assertTrue(all(len(text.encode('utf-8')) <= translate_func.TRANSLATE_MAX_BYTES for text in sent))
+        self.assertEqual(result, [f'[pt] {text}' for text in texts])
+
+    def test_mismatched_pieces_fall_back_to_single_requests(self):
+        translate = make_translate()
+        translate.translate_text.side_effect = [
+            {'TranslatedText': 'the delimiter got lost'},
+            {'TranslatedText': 'one'}, {'TranslatedText': 'two'}
+        ]
+
+        result = self.translate_texts(translate, ['um', 'dois'], ['pt', 'pt'])
+
+        self.assertEqual(result, ['one', 'two'])
+        self.assertEqual(translate.translate_text.call_count, 3)
+
+    def test_unknown_language_is_not_chunked(self):
+        translate = make_translate()
+
+        result = self.translate_texts(translate, ['olá', 'hola', 'hello'], ['auto', 'auto', 'en'])
+
+        self.assertEqual(result, ['[auto] olá', '[auto] hola', 'hello'])
+        self.assertEqual(translate.translate_text.call_count, 2)
+
+    def test_cached_and_duplicate_texts_are_not_sent(self):
+        translate = make_translate()
+        self.translate_texts(translate, ['olá', 'olá', 'bom dia'], ['pt'] * 3)
+        result = self.translate_texts(translate, ['olá', 'boa noite'], ['pt'] * 2)
+
+        sent = [call.kwargs['Text'] for call in translate.translate_text.call_args_list]
+        self.assertEqual(sent, [translate_func.TRANSLATE_DELIMITER.join(['olá', 'bom dia']), 'boa noite'])
+        self.assertEqual(result, ['[pt] olá', '[pt] boa noite'])
+
+
+class TestLocalLanguageId(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(translate_func, 'translation_cache', TieredCache(TTLCache()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_guesses_only_clear_cases(self):
+        self.assertEqual(translate_func.guess_language('This is the best video I have seen in a while'), 'en')
+        self.assertEqual(translate_func.guess_language('Esse vídeo é muito bom, parabéns pelo conteúdo'), 'pt')
+        self.assertIsNone(translate_func.guess_language('great video'))
+        self.assertIsNone(translate_func.guess_language('Это очень хорошее видео и я согласен'))
+        # English function words but Portuguese accents: leave it to Comprehend
+        self.assertIsNone(translate_func.guess_language('the and is não é não'))
+
+    def test_english_skips_comprehend(self):
+        comprehend = make_comprehend(lambda text: 'pt')
+        texts = ['I think that is not true at all', 'Esse vídeo é muito bom, parabéns pelo conteúdo']
+        with patch.object(translate_func, 'get_comprehend_client', return_value=comprehend):
+            languages = translate_func.detect_languages(texts)
+
+        # Only English is trusted locally; the Portuguese guess is still confirmed
+        self.assertEqual(comprehend.batch_detect_dominant_language.call_args.kwargs['TextList'], texts[1:])
+        self.assertEqual(languages, ['en', 'pt'])
+
+    def test_can_be_disabled(self):
+        comprehend = make_comprehend(lambda text: 'en')
+        with patch.object(translate_func.config, 'local_language_id', False), \
+             patch.object(translate_func, 'get_comprehend_client', return_value=comprehend):
+            translate_func.detect_languages(['I think that is not true at all'])
+
+        comprehend.batch_detect_dominant_language.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
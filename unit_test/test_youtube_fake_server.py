@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import config
+from googleapiclient.errors import HttpError
+from shared_func import googleapiclient_func
+from shared_func.googleapiclient_func import iter_comment_pages, connect_to_youtube, reset_youtube_clients
+from shared_func.youtube_fake_server import FakeYouTubeServer
+from shared_func.cache_func import TTLCache, TieredCache
+from shared_func import youtube_search
+
+
+class TestFakeYouTubeServer(unittest.TestCase):
+    """The real googleapiclient client, pointed at the fake server through config.youtube_api_url"""
+
+    def start_server(self, **options):
+        server = FakeYouTubeServer(**options).start()
+        self.addCleanup(server.stop)
+        patcher = patch.object(config, 'youtube_api_url', server.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        reset_youtube_clients()
+        self.addCleanup(reset_youtube_clients)
+        return server
+
+    def test_comment_pages_are_served_locally(self):
+        server = self.start_server(comments_per_video=250)
+
+        pages = list(iter_comment_pages('https://www.youtube.com/watch?v=abcdefghijk', max_comments=1000))
+
+        self.assertEqual([len(page) for page in pages], [100, 100, 50])
+        self.assertEqual(server.requests['commentThreads'], 3)
+        published = [item['snippet']['topLevelComment']['snippet']['publishedAt'] for page in pages for item in page]
+        self.assertEqual(published, sorted(published, reverse=True))
+
+    def test_search_and_channel_listing(self):
+        server = self.start_server(videos_per_channel=80)
+        with patch.object(youtube_search, 'search_cache', TTLCache()), \
+             patch.object(googleapiclient_func, 'channel_cache', TieredCache(TTLCache())):
+            videos = youtube_search.search_youtube('news', max_results=5)
+            uploads = youtube_search.search_by_channel('https://www.youtube.com/@alice', max_results=100)
+
+        self.assertEqual(len(videos), 5)
+        self.assertEqual(len(uploads), 80)
+        self.assertEqual(server.requests['search'], 1)
+        self.assertEqual(server.requests['playlistItems'], 2)
+
+    def test_errors_surface_as_http_errors(self):
+        self.start_server(error_rate=1.0)
+
+        with self.assertRaises(HttpError) as raised:
+            connect_to_youtube().channels().list(part='snippet', id='UC1').execute()
+        self.assertEqual(raised.exception.resp.status, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
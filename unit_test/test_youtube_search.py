@@ -0,0 +1,125 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from shared_func import youtube_search
+from shared_func.cache_func import TTLCache
+
+
+def make_search_item(video_id):
+    return {
+        'id': {'videoId': video_id},
+        'snippet': {'title': f'title {video_id}', 'channelTitle': 'channel', 'channelId': 'UC1',
+                    'publishedAt': '2025-01-01T00:00:00Z', 'thumbnails': {}}
+    }
+
+
+def make_search_youtube():
+    youtube = MagicMock()
+
+    def search_list(**kwargs):
+        request = MagicMock()
+        request.execute.return_value = {
+            'items': [make_search_item(f"{kwargs.get('q', kwargs.get('channelId'))}{i}") for i in range(kwargs['maxResults'])]
+        }
+        return request
+
+    youtube.search.return_value.list.side_effect = search_list
+    return youtube
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self.youtube = make_search_youtube()
+        patchers = [
+            patch.object(youtube_search, 'search_cache', TTLCache(maxsize=2, ttl=60)),
+            patch.object(youtube_search, 'connect_to_youtube', return_value=self.youtube),
+        ]
+        self.cache = patchers[0].start()
+        patchers[1].start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def search_calls(self):
+        return self.youtube.search.return_value.list.call_count
+
+    def test_repeated_search_is_served_from_cache(self):
+        first = youtube_search.search_youtube('news', max_results=3)
+        second = youtube_search.search_youtube('news', max_results=3)
+
+        self.assertEqual(self.search_calls(), 1)
+        self.assertEqual(first, second)
+
+    def test_key_includes_order_and_max_results(self):
+        youtube_search.search_youtube('news', max_results=3)
+        youtube_search.search_youtube('news', max_results=5)
+        youtube_search.search_youtube('news', max_results=3, order_by_date=False)
+
+        self.assertEqual(self.search_calls(), 3)
+
+    def test_bypass_forces_a_fresh_search(self):
+        youtube_search.search_youtube('news', max_results=3)
+        youtube_search.search_youtube('news', max_results=3, use_cache=False)
+
+        self.assertEqual(self.search_calls(), 2)
+
+    def test_cached_results_cannot_be_mutated_by_callers(self):
+        youtube_search.search_youtube('news', max_results=1)[0]['title'] = 'changed'
+
+        self.assertEqual(youtube_search.search_youtube('news', max_results=1)[0]['title'], 'title news0')
+
+    def test_channel_search_is_cached(self):
+        with patch.object(youtube_search, 'resolve_channel', return_value={'id': 'UC1'}):
+            youtube_search.search_by_channel('https://www.youtube.com/channel/UC1', max_results=2, order_by_date=False)
+            youtube_search.search_by_channel('https://www.youtube.com/channel/UC1', max_results=2, order_by_date=False)
+
+        self.assertEqual(self.search_calls(), 1)
+
+
+def make_playlist_item(i):
+    return {
+        'snippet': {'title': f'video {i}', 'channelTitle': 'channel', 'channelId': 'UC1',
+                    'publishedAt': '2025-02-01T00:00:00Z', 'thumbnails': {}},
+        'contentDetails': {'videoId': f'vid{i}', 'videoPublishedAt': f'2025-01-01T00:{i % 60:02d}:00Z'}
+    }
+
+
+class TestSearchByChannel(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(youtube_search, 'search_cache', TTLCache(maxsize=10, ttl=60))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parse_channel_url(self):
+        self.assertEqual(youtube_search.parse_channel_url('https://www.youtube.com/@alice/videos'), ('handle', 'alice'))
+        self.assertEqual(youtube_search.parse_channel_url('https://www.youtube.com/channel/UC1'), ('id', 'UC1'))
+        self.assertEqual(youtube_search.parse_channel_url('https://www.youtube.com/user/bob'), ('user', 'bob'))
+        self.assertEqual(youtube_search.parse_channel_url('https://www.youtube.com/c/Carol'), ('custom', 'Carol'))
+        self.assertEqual(youtube_search.parse_channel_url('https://example.com/@alice'), (None, None))
+
+    def test_newest_first_listing_uses_the_uploads_playlist(self):
+        channel = {'id': 'UC1', 'uploads_playlist': 'UU1'}
+        with patch.object(youtube_search, 'resolve_channel', return_value=channel) as resolve, \
+             patch.object(youtube_search, 'iter_playlist_items', return_value=iter([make_playlist_item(0)])) as items, \
+             patch.object(youtube_search, 'connect_to_youtube') as connect:
+            results = youtube_search.search_by_channel('https://www.youtube.com/@alice', max_results=120)
+
+        resolve.assert_called_once_with('handle', 'alice')
+        items.assert_called_once_with('UU1', 120)
+        connect.assert_not_called()
+        self.assertEqual(results[0]['link'], 'https://www.youtube.com/watch?v=vid0')
+        self.assertEqual(results[0]['publishedTime'], '2025-01-01T00:00:00Z')
+
+    def test_unknown_channel_raises(self):
+        with patch.object(youtube_search, 'resolve_channel', return_value=None):
+            with self.assertRaises(ValueError):
+                youtube_search.search_by_channel('https://www.youtube.com/@nobody')
+
+
+if __name__ == '__main__':
+    unittest.main()